@@ -0,0 +1,848 @@
+"""
+Benchmark por etapa do loop da lousa.
+
+Roda cada etapa de ``LousaDigital.executar`` isoladamente, com entradas
+sintéticas de vários tamanhos, e grava as latências (percentis) e a vazão em
+JSON para comparar execuções antes e depois de uma mudança:
+
+    python benchmark.py --saida antes.json
+    python benchmark.py --saida depois.json --comparar antes.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+import diario_tracos
+import exportar
+from camada_desenho import CamadaLadrilhos, Vista, regiao_desenho
+import formato_desenho
+import jogo_similaridade
+from deteccao import DetectorMaos
+from lousa import LousaDigital
+from rastreamento import RastreadorMaos
+from tracos import ArmazemTracos
+
+TAMANHOS_PONTOS = [100, 1_000, 10_000, 100_000, 1_000_000]
+TAMANHOS_RANKING = [10, 100, 1_000, 10_000, 100_000]
+LARGURA = 1280
+ALTURA = 720
+
+
+class FonteSintetica:
+    """Fonte vazia: o benchmark chama as etapas diretamente, sem câmera"""
+
+    fornece_maos = True
+
+    def ler(self):
+        return None
+
+    def liberar(self):
+        pass
+
+
+def gerar_desenho(n_pontos, semente=0):
+    """
+    Traços de passeio aleatório no formato antigo de tuplas, com um ponto de
+    caneta levantada (0, 0, ...) a cada ~50 pontos.
+    """
+    rnd = random.Random(semente)
+    cores = [(0, 0, 255), (0, 255, 0), (255, 0, 0), (0, 255, 255)]
+    desenho = []
+    x, y = LARGURA // 2, ALTURA // 2
+    cor, espessura = cores[0], 20
+    while len(desenho) < n_pontos:
+        if rnd.random() < 0.02:
+            desenho.append((0, 0, cor, espessura))
+            cor = rnd.choice(cores)
+            espessura = rnd.choice([5, 10, 20, 30])
+            continue
+        x = min(max(x + rnd.randint(-6, 6), 1), LARGURA - 1)
+        y = min(max(y + rnd.randint(-6, 6), 1), ALTURA - 1)
+        desenho.append((x, y, cor, espessura))
+    return desenho
+
+
+def gerar_caminho_dedo(n_posicoes, semente=0, ruido=0.8, periodo=300):
+    """Posições do dedo ao longo de uma curva suave, com ruído de ~1 pixel"""
+    rnd = random.Random(semente)
+    posicoes = []
+    for i in range(n_posicoes):
+        t = i / periodo
+        x = LARGURA / 2 + 400 * np.sin(2 * np.pi * t * 1.3) * np.cos(np.pi * t)
+        y = ALTURA / 2 + 250 * np.sin(2 * np.pi * t * 2.1)
+        posicoes.append(
+            (round(x + rnd.gauss(0, ruido)), round(y + rnd.gauss(0, ruido)))
+        )
+    return posicoes
+
+
+def gerar_ranking(n_entradas, semente=0):
+    rnd = random.Random(semente)
+    with open("ranking.txt", "w") as f:
+        for i in range(n_entradas):
+            f.write(f"jogador_{i}:={rnd.random():.4f}\n")
+
+
+def nova_lousa():
+    lousa = LousaDigital(fonte=FonteSintetica())
+    lousa.largura, lousa.altura = LARGURA, ALTURA
+    return lousa
+
+
+def quadro_vazio():
+    return np.full((ALTURA, LARGURA, 3), 90, np.uint8)
+
+
+def medir(
+    funcao, preparar=None, tempo_minimo=0.5, repeticoes_max=1000, repeticoes_min=3
+):
+    """
+    Chama ``funcao`` repetidamente (pelo menos ``repeticoes_min`` vezes e até
+    somar ``tempo_minimo``) e retorna as latências em segundos. ``preparar``
+    roda antes de cada chamada, fora da medição.
+    """
+    latencias = []
+    inicio = time.perf_counter()
+    while len(latencias) < repeticoes_min or (
+        time.perf_counter() - inicio < tempo_minimo and len(latencias) < repeticoes_max
+    ):
+        argumentos = preparar() if preparar is not None else ()
+        t0 = time.perf_counter()
+        funcao(*argumentos)
+        latencias.append(time.perf_counter() - t0)
+    return latencias
+
+
+def resumir(etapa, tamanho, unidade, latencias, itens_por_chamada=1):
+    latencias_ms = sorted(t * 1000 for t in latencias)
+
+    def percentil(p):
+        indice = min(
+            len(latencias_ms) - 1, int(round(p / 100 * (len(latencias_ms) - 1)))
+        )
+        return latencias_ms[indice]
+
+    media = statistics.fmean(latencias_ms)
+    return {
+        "etapa": etapa,
+        "tamanho": tamanho,
+        "unidade": unidade,
+        "repeticoes": len(latencias_ms),
+        "p50_ms": percentil(50),
+        "p90_ms": percentil(90),
+        "p99_ms": percentil(99),
+        "media_ms": media,
+        "max_ms": latencias_ms[-1],
+        "chamadas_por_s": 1000 / media if media else None,
+        "itens_por_s": itens_por_chamada * 1000 / media if media else None,
+    }
+
+
+def bench_simplificacao(n_pontos, tempo_minimo):
+    """
+    Posições do dedo guardadas no armazém, sem e com simplificação: latência
+    e pontos guardados.
+    """
+    posicoes = gerar_caminho_dedo(n_pontos)
+    resultados = []
+    for tolerancia in (0.0, 1.0):
+        lousa = nova_lousa()
+
+        def rodar():
+            lousa.desenho = ArmazemTracos(tolerancia=tolerancia)
+            for x, y in posicoes:
+                lousa.desenho.adicionar_ponto(x, y, lousa.cor, lousa.espessura)
+            lousa.desenho.finalizar_traco()
+
+        latencias = medir(
+            rodar, tempo_minimo=tempo_minimo, repeticoes_max=20, repeticoes_min=1
+        )
+        resultado = resumir(
+            f"simplificacao[tolerancia={tolerancia:g}]",
+            n_pontos,
+            "posicoes",
+            latencias,
+            n_pontos,
+        )
+        resultado["pontos_armazenados"] = len(lousa.desenho)
+        resultados.append(resultado)
+    return resultados
+
+
+class DetectorSintetico:
+    """
+    Detector que devolve uma mão com a ponta do indicador em
+    ``posicoes[quadro]`` (``quadro`` é avançado por quem chama) e conta as
+    chamadas
+    """
+
+    def __init__(self, posicoes):
+        self.posicoes = posicoes
+        self.quadro = 0
+        self.chamadas = 0
+
+    def findHands(self, img, draw=False, flipType=True):
+        x, y = self.posicoes[self.quadro]
+        self.chamadas += 1
+        lm_list = [[x + 10 * (i % 5), y + 20 * (i // 5), 0] for i in range(21)]
+        lm_list[8] = [x, y, 0]
+        return [{"lmList": lm_list, "bbox": (x, y, 40, 80), "center": (x, y)}], img
+
+    def fingersUp(self, myHand):
+        return [0, 1, 0, 0, 0]
+
+
+def bench_rastreamento(n_pontos, tempo_minimo):
+    """
+    Ponta do indicador medida com ruído de ~2 pixels ao longo de um caminho
+    conhecido: fração dos quadros detectados, erro até o caminho real e
+    tremor, sem rastreamento e com detecção a cada 1, 2 e 3 quadros.
+    """
+    # Velocidade típica de desenho (~110 pixels/s a 30 quadros/s)
+    real = np.array(gerar_caminho_dedo(n_pontos, ruido=0, periodo=1200), np.float64)
+    medido = gerar_caminho_dedo(n_pontos, ruido=2.0, periodo=1200)
+    img = quadro_vazio()
+    resultados = []
+    for intervalo in (None, 1, 2, 3):
+        nome = "bruto" if intervalo is None else f"intervalo={intervalo}"
+        posicoes = []
+
+        def rodar():
+            sintetico = DetectorSintetico(medido)
+            detector = sintetico
+            if intervalo is not None:
+                detector = RastreadorMaos(sintetico, intervalo=intervalo)
+            posicoes.clear()
+            for quadro in range(n_pontos):
+                sintetico.quadro = quadro
+                mao = detector.findHands(img)[0][0]
+                posicoes.append(mao["lmList"][8][:2])
+            return sintetico
+
+        latencias = medir(
+            rodar, tempo_minimo=tempo_minimo, repeticoes_max=20, repeticoes_min=1
+        )
+        resultado = resumir(
+            f"rastreamento[{nome}]", n_pontos, "quadros", latencias, n_pontos
+        )
+        chamadas = rodar().chamadas
+        desvios = np.array(posicoes, np.float64) - real
+        erros = np.hypot(*desvios.T)
+        # Tremor: quanto o desvio muda de um quadro para o outro
+        tremor = np.hypot(*np.diff(desvios, axis=0).T)
+        resultado["fracao_detectada"] = chamadas / n_pontos
+        resultado["erro_medio_px"] = float(erros.mean())
+        resultado["erro_p99_px"] = float(np.percentile(erros, 99))
+        resultado["tremor_medio_px"] = float(tremor.mean())
+        resultados.append(resultado)
+    return resultados
+
+
+def bench_renderizar(n_pontos, tempo_minimo):
+    resultados = []
+    desenho = gerar_desenho(n_pontos)
+
+    for draw_on_canvas in (False, True):
+        nome = "renderizar_desenho" + ("[canvas]" if draw_on_canvas else "")
+        lousa = nova_lousa()
+        lousa.desenho = ArmazemTracos.de_legado(desenho)
+
+        # Primeiro quadro depois de carregar: a camada é montada do zero
+        def reconstruir():
+            lousa.camada_desenho.redesenhar(lousa.desenho)
+            lousa.renderizar_desenho(quadro_vazio(), draw_on_canvas=draw_on_canvas)
+
+        latencias = medir(
+            reconstruir, tempo_minimo=tempo_minimo, repeticoes_max=20, repeticoes_min=1
+        )
+        resultados.append(
+            resumir(nome + "[reconstrucao]", n_pontos, "pontos", latencias, n_pontos)
+        )
+
+        # Regime normal: alguns pontos novos por quadro
+        extra = gerar_desenho(2000, semente=7)
+        posicao = [0]
+
+        def preparar():
+            inicio = posicao[0] % len(extra)
+            for x, y, cor, espessura in extra[inicio : inicio + 5]:
+                if x == 0:
+                    lousa.desenho.finalizar_traco()
+                else:
+                    lousa.desenho.adicionar_ponto(x, y, cor, espessura)
+            posicao[0] += 5
+            return (quadro_vazio(),)
+
+        latencias = medir(
+            lambda img: lousa.renderizar_desenho(img, draw_on_canvas=draw_on_canvas),
+            preparar,
+            tempo_minimo,
+        )
+        resultados.append(resumir(nome + "[quadro]", n_pontos, "pontos", latencias))
+    return resultados
+
+
+# Roda num interpretador novo: mede a importação e o caminho até o primeiro
+# quadro como na abertura do programa
+SCRIPT_INICIALIZACAO = """
+import json, sys, time
+inicio = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import numpy as np
+from deteccao import DetectorMaos
+from lousa import LousaDigital
+importado = time.perf_counter()
+
+from fontes import SaidaHeadless
+from pipeline import Quadro, detectar_maos
+
+class FonteQuadroVazio:
+    fornece_maos = False
+    def ler(self):
+        return Quadro(np.full((720, 1280, 3), 90, np.uint8), time.perf_counter())
+    def liberar(self):
+        pass
+
+lousa = LousaDigital(fonte=FonteQuadroVazio(), saida=SaidaHeadless())
+construido = time.perf_counter()
+quadro = lousa.fonte.ler()
+quadro.maos, quadro.dedos = detectar_maos(lousa.detector, quadro.img)
+lousa.processar_quadro(quadro.img, quadro.maos, quadro.dedos, quadro.momento)
+primeiro_quadro = time.perf_counter()
+if lousa.carregador_detector is not None:
+    lousa.carregador_detector.esperar()
+detector_pronto = time.perf_counter()
+lousa.executor_io.fechar()
+print(json.dumps({
+    "importar": importado - inicio,
+    "construir": construido - importado,
+    "primeiro_quadro": primeiro_quadro - inicio,
+    "detector_pronto": detector_pronto - inicio,
+}))
+"""
+
+
+def bench_inicializacao(repeticoes=5):
+    """
+    Importação do lousa, construção da LousaDigital, tempo até o primeiro
+    quadro e até o detector ficar pronto, cada repetição num processo novo
+    """
+    tempos = {}
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    for _ in range(repeticoes):
+        try:
+            saida = subprocess.run(
+                [sys.executable, "-c", SCRIPT_INICIALIZACAO, pasta],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+        except subprocess.CalledProcessError as erro:
+            # Sem as dependências da lousa (cvzone, câmera) a etapa é pulada
+            # e as demais continuam
+            linhas = erro.stderr.strip().splitlines()
+            motivo = linhas[-1] if linhas else f"código {erro.returncode}"
+            return [
+                {
+                    "etapa": "inicializacao",
+                    "tamanho": 1,
+                    "unidade": "processo",
+                    "pulada": motivo,
+                }
+            ]
+        for etapa, segundos in json.loads(saida.splitlines()[-1]).items():
+            tempos.setdefault(etapa, []).append(segundos)
+    return [
+        resumir(f"inicializacao[{etapa}]", 1, "processo", latencias)
+        for etapa, latencias in tempos.items()
+    ]
+
+
+def bench_alocacao_quadro(n_quadros=100):
+    """
+    Memória alocada (pico medido pelo tracemalloc) por chamada de
+    processar_quadro, no modo desenho, com o jogo e com o ranking abertos, e
+    por detecção no DetectorMaos (com um detector que não faz inferência)
+    """
+
+    class DetectorVazio:
+        def findHands(self, img, draw=False, flipType=True):
+            return [], img
+
+    def alocado(funcao, n):
+        # Aquecimento: sprites, caches e buffers do pool são criados aqui
+        for i in range(10):
+            funcao(i)
+        tracemalloc.start()
+        total = 0
+        for i in range(n):
+            antes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            funcao(i)
+            total += tracemalloc.get_traced_memory()[1] - antes
+        tracemalloc.stop()
+        return total / n
+
+    def mao(i):
+        x = 300 + (i * 7) % 600
+        return [{"lmList": [[x, 300 + i % 50, 0]] * 21}], [[0, 1, 0, 0, 0]]
+
+    resultados = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for modo in ("desenho", "jogo", "ranking"):
+            lousa = nova_lousa()
+            lousa.jogo_ativo = modo == "jogo"
+            lousa.indice_forma = 0
+            lousa.mostrar_ranking = modo == "ranking"
+            quadro = quadro_vazio()
+
+            def processar(i):
+                quadro[:] = 90
+                lousa.processar_quadro(quadro, *mao(i), i / 30)
+
+            resultados.append(
+                {
+                    "etapa": f"alocacao[processar_quadro,{modo}]",
+                    "tamanho": n_quadros,
+                    "unidade": "quadros",
+                    "bytes_por_quadro": alocado(processar, n_quadros),
+                }
+            )
+            lousa.executor_io.fechar()
+
+    detector = DetectorMaos(DetectorVazio(), escala=0.5)
+    quadro = quadro_vazio()
+    resultados.append(
+        {
+            "etapa": "alocacao[DetectorMaos.findHands]",
+            "tamanho": n_quadros,
+            "unidade": "quadros",
+            "bytes_por_quadro": alocado(
+                lambda i: detector.findHands(quadro), n_quadros
+            ),
+        }
+    )
+    return resultados
+
+
+def bench_interface(tempo_minimo):
+    lousa = nova_lousa()
+    lousa.desenho = ArmazemTracos.de_legado(gerar_desenho(1000))
+    latencias = medir(lousa.desenhar_interface, lambda: (quadro_vazio(),), tempo_minimo)
+    return [resumir("desenhar_interface", 1, "quadro", latencias)]
+
+
+def bench_ranking(n_entradas, tempo_minimo):
+    gerar_ranking(n_entradas)
+    lousa = nova_lousa()
+    lousa.mostrar_ranking = True
+    resultados = []
+
+    latencias = medir(lousa.desenhar_ranking, lambda: (quadro_vazio(),), tempo_minimo)
+    resultados.append(resumir("desenhar_ranking", n_entradas, "entradas", latencias))
+
+    latencias = medir(jogo_similaridade.carrega_ranking, tempo_minimo=tempo_minimo)
+    resultados.append(
+        resumir("carrega_ranking", n_entradas, "entradas", latencias, n_entradas)
+    )
+
+    contador = iter(range(10**9))
+    latencias = medir(
+        lambda: jogo_similaridade.salvar_pontuacao(f"novo_{next(contador)}", 0.5),
+        tempo_minimo=tempo_minimo,
+    )
+    resultados.append(resumir("salvar_pontuacao", n_entradas, "entradas", latencias))
+    return resultados
+
+
+def bench_similaridade(n_pontos, tempo_minimo):
+    lousa = nova_lousa()
+    lousa.desenho = ArmazemTracos.de_legado(gerar_desenho(n_pontos))
+    resultados = []
+
+    # Pontuação do desenho inteiro de uma vez (por exemplo, depois de carregar)
+    for forma in lousa.formas:
+        forma.preparar(LARGURA, ALTURA)
+
+        def pontuar():
+            avaliador = jogo_similaridade.AvaliadorForma(forma, LARGURA, ALTURA, 12.5)
+            avaliador.atualizar(lousa.desenho)
+            return avaliador.pontuacao()
+
+        latencias = medir(pontuar, tempo_minimo=tempo_minimo)
+        resultados.append(
+            resumir(f"pontuacao_completa[{forma.nome}]", n_pontos, "pontos", latencias)
+        )
+
+    # Métricas ao vivo do jogo: alguns pontos novos por quadro
+    avaliador = jogo_similaridade.AvaliadorForma(lousa.formas[0], LARGURA, ALTURA, 12.5)
+    avaliador.atualizar(lousa.desenho)
+    extra = gerar_desenho(2000, semente=7)
+    posicao = [0]
+
+    def preparar():
+        inicio = posicao[0] % len(extra)
+        for x, y, cor, espessura in extra[inicio : inicio + 5]:
+            if x == 0:
+                lousa.desenho.finalizar_traco()
+            else:
+                lousa.desenho.adicionar_ponto(x, y, cor, espessura)
+        posicao[0] += 5
+        return ()
+
+    def avaliar():
+        avaliador.atualizar(lousa.desenho)
+        return avaliador.pontuacao()
+
+    latencias = medir(avaliar, preparar, tempo_minimo)
+    resultados.append(resumir("metricas_jogo[quadro]", n_pontos, "pontos", latencias))
+    return resultados
+
+
+def bench_arquivos(n_pontos, tempo_minimo):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return _bench_arquivos(n_pontos, tempo_minimo)
+
+
+def _bench_arquivos(n_pontos, tempo_minimo):
+    lousa = nova_lousa()
+    lousa.desenho = ArmazemTracos.de_legado(gerar_desenho(n_pontos))
+    resultados = []
+
+    # Custo no loop de quadros: cópia do desenho e envio à thread de E/S
+    latencias = medir(
+        lousa.salvar_desenho,
+        tempo_minimo=tempo_minimo,
+        repeticoes_max=20,
+        repeticoes_min=1,
+    )
+    resultados.append(
+        resumir("salvar_desenho[quadro]", n_pontos, "pontos", latencias, n_pontos)
+    )
+    lousa.executor_io.fechar()
+
+    # A gravação e a leitura em si, que rodam na thread de E/S
+    latencias = medir(
+        lambda: formato_desenho.salvar(lousa.desenho, "desenho_bench.lsd"),
+        tempo_minimo=tempo_minimo,
+        repeticoes_max=20,
+        repeticoes_min=1,
+    )
+    resultados.append(
+        resumir("salvar_desenho[arquivo]", n_pontos, "pontos", latencias, n_pontos)
+    )
+
+    latencias = medir(
+        formato_desenho.carregar_recente,
+        tempo_minimo=tempo_minimo,
+        repeticoes_max=20,
+        repeticoes_min=1,
+    )
+    resultados.append(
+        resumir("carregar_desenho[arquivo]", n_pontos, "pontos", latencias, n_pontos)
+    )
+    for arquivo in os.listdir("."):
+        if arquivo.startswith("desenho_"):
+            os.remove(arquivo)
+    return resultados
+
+
+def bench_diario(n_pontos, tempo_minimo):
+    """
+    Diário de traços: custo no loop de quadros por ponto gravado (com um
+    levantar de caneta a cada 50 pontos) e tempo de recuperação do desenho
+    """
+    posicoes = [(x, y) for x, y, _, _ in gerar_desenho(n_pontos) if x]
+    resultados = []
+
+    def gravar(pasta):
+        desenho = ArmazemTracos()
+        diario = diario_tracos.DiarioTracos(pasta, desenho)
+        latencias = []
+        for i, (x, y) in enumerate(posicoes):
+            desenho.adicionar_ponto(x, y, (0, 0, 255), 20)
+            t0 = time.perf_counter()
+            diario.ponto(x, y, (0, 0, 255), 20)
+            if i % 50 == 49:
+                desenho.finalizar_traco()
+                diario.levantar()
+            diario.atualizar()
+            latencias.append(time.perf_counter() - t0)
+        diario.fechar()
+        return latencias
+
+    with tempfile.TemporaryDirectory() as pasta:
+        latencias = gravar(pasta)
+        resultados.append(resumir("diario[ponto]", n_pontos, "pontos", latencias))
+        latencias = medir(
+            lambda: diario_tracos.recuperar(pasta),
+            tempo_minimo=tempo_minimo,
+            repeticoes_max=20,
+            repeticoes_min=1,
+        )
+        resultados.append(
+            resumir("diario[recuperar]", n_pontos, "pontos", latencias, n_pontos)
+        )
+    return resultados
+
+
+def bench_ladrilhos(n_pontos, tempo_minimo):
+    """
+    Quadro infinito: o desenho espalhado numa área 8x a da tela, composto na
+    vista a cada quadro (parada, arrastando e com o zoom mínimo), e a memória
+    dos ladrilhos contra a de uma camada única do tamanho da área
+    """
+    legado = [
+        (x * 8, y * 8, cor, espessura) if x else (x, y, cor, espessura)
+        for x, y, cor, espessura in gerar_desenho(n_pontos)
+    ]
+    desenho = ArmazemTracos.de_legado(legado)
+    camada = CamadaLadrilhos()
+    latencias = medir(
+        lambda: camada.redesenhar(desenho),
+        tempo_minimo=tempo_minimo,
+        repeticoes_max=20,
+        repeticoes_min=1,
+    )
+    resultados = [
+        resumir("ladrilhos[reconstrucao]", n_pontos, "pontos", latencias, n_pontos)
+    ]
+
+    img = quadro_vazio()
+    vista = Vista()
+    vista.mover(-LARGURA * 3, -ALTURA * 3)
+    resultados.append(
+        resumir(
+            "ladrilhos[compor]",
+            n_pontos,
+            "pontos",
+            medir(lambda: camada.compor(img, vista), tempo_minimo=tempo_minimo),
+        )
+    )
+    passos = iter(range(10**9))
+
+    def arrastar():
+        # Vai e volta, para a vista não sair da área desenhada
+        sentido = 1 if next(passos) // 100 % 2 == 0 else -1
+        vista.mover(7 * sentido, 3 * sentido)
+        camada.compor(img, vista)
+
+    resultados.append(
+        resumir(
+            "ladrilhos[arrastar]",
+            n_pontos,
+            "pontos",
+            medir(arrastar, tempo_minimo=tempo_minimo),
+        )
+    )
+    vista.definir_zoom(Vista.ZOOM_MINIMO, LARGURA / 2, ALTURA / 2)
+    resultados.append(
+        resumir(
+            "ladrilhos[compor,zoom_minimo]",
+            n_pontos,
+            "pontos",
+            medir(lambda: camada.compor(img, vista), tempo_minimo=tempo_minimo),
+        )
+    )
+    resultados.append(
+        {
+            "etapa": "ladrilhos[memoria]",
+            "tamanho": n_pontos,
+            "unidade": "pontos",
+            "ladrilhos": len(camada),
+            "despejados": len(camada.despejados),
+            "bytes_ladrilhos": camada.memoria(),
+            "bytes_camada_unica": LARGURA * 8 * ALTURA * 8 * 4,
+        }
+    )
+    camada.fechar()
+    return resultados
+
+
+def bench_exportar(n_pontos, tempo_minimo):
+    """Exportação de um desenho salvo, por formato (ver exportar.py)"""
+    desenho = ArmazemTracos.de_legado(gerar_desenho(n_pontos))
+    regiao = regiao_desenho(desenho)
+    resultados = []
+    with tempfile.TemporaryDirectory() as pasta:
+        for formato, funcao in (
+            ("png", exportar.exportar_png),
+            ("svg", exportar.exportar_svg),
+        ):
+            caminho = os.path.join(pasta, f"desenho.{formato}")
+            latencias = medir(
+                lambda: funcao(desenho, caminho, regiao),
+                tempo_minimo=tempo_minimo,
+                repeticoes_max=50,
+                repeticoes_min=1,
+            )
+            resultados.append(
+                resumir(f"exportar[{formato}]", n_pontos, "pontos", latencias, n_pontos)
+            )
+    return resultados
+
+
+def bench_memoria(n_pontos, tempo_minimo):
+    """Memória por ponto: lista de tuplas antiga contra o ArmazemTracos"""
+    tracemalloc.start()
+    inicio = tracemalloc.get_traced_memory()[0]
+    # Cores como tuplas novas, como chegavam do json.load no formato antigo
+    lista = [
+        (x, y, tuple(list(cor)), espessura)
+        for x, y, cor, espessura in gerar_desenho(n_pontos)
+    ]
+    bytes_lista = tracemalloc.get_traced_memory()[0] - inicio
+    tracemalloc.stop()
+
+    armazem = ArmazemTracos.de_legado(lista)
+    bytes_armazem = armazem.memoria()
+    return [
+        {
+            "etapa": "memoria_por_ponto",
+            "tamanho": n_pontos,
+            "unidade": "pontos",
+            "bytes_por_ponto_lista": bytes_lista / n_pontos,
+            "bytes_por_ponto_armazem": bytes_armazem / n_pontos,
+        }
+    ]
+
+
+ETAPAS_PONTOS = {
+    "simplificacao": bench_simplificacao,
+    "rastreamento": bench_rastreamento,
+    "renderizar_desenho": bench_renderizar,
+    "similaridade": bench_similaridade,
+    "arquivos": bench_arquivos,
+    "diario": bench_diario,
+    "ladrilhos": bench_ladrilhos,
+    "exportar": bench_exportar,
+    "memoria": bench_memoria,
+}
+ETAPAS_RANKING = {"ranking": bench_ranking}
+
+
+def comparar(resultados, caminho_referencia):
+    """Imprime a razão entre o p50 desta execução e o de uma execução anterior"""
+    with open(caminho_referencia, "r") as f:
+        referencia = json.load(f)
+    anteriores = {
+        (r["etapa"], r["tamanho"]): r["p50_ms"]
+        for r in referencia["resultados"]
+        if "p50_ms" in r
+    }
+    print(f"\nComparação com {caminho_referencia} (p50 atual / p50 anterior):")
+    for r in resultados:
+        anterior = anteriores.get((r["etapa"], r["tamanho"]))
+        if "p50_ms" not in r:
+            continue
+        if anterior:
+            print(
+                f"  {r['etapa']:<40} {r['tamanho']:>9}  {r['p50_ms'] / anterior:6.2f}x"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pontos", type=int, nargs="+", default=TAMANHOS_PONTOS)
+    parser.add_argument("--ranking", type=int, nargs="+", default=TAMANHOS_RANKING)
+    parser.add_argument(
+        "--etapas",
+        nargs="+",
+        choices=list(ETAPAS_PONTOS)
+        + list(ETAPAS_RANKING)
+        + ["desenhar_interface", "inicializacao", "alocacao"],
+        help="roda só as etapas indicadas",
+    )
+    parser.add_argument(
+        "--tempo-minimo",
+        type=float,
+        default=0.5,
+        help="tempo mínimo (s) medido por etapa e tamanho",
+    )
+    parser.add_argument("--saida", default="bench_output.json")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior")
+    args = parser.parse_args()
+
+    def ativa(etapa):
+        return args.etapas is None or etapa in args.etapas
+
+    saida = os.path.abspath(args.saida)
+    referencia = os.path.abspath(args.comparar) if args.comparar else None
+    resultados = []
+    diretorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as diretorio:
+        # Arquivos de desenho e ranking são criados numa pasta temporária
+        os.chdir(diretorio)
+        try:
+            if ativa("inicializacao"):
+                resultados += bench_inicializacao()
+            if ativa("alocacao"):
+                resultados += bench_alocacao_quadro()
+            if ativa("desenhar_interface"):
+                resultados += bench_interface(args.tempo_minimo)
+            for etapa, bench in ETAPAS_PONTOS.items():
+                if ativa(etapa):
+                    for n in args.pontos:
+                        resultados += bench(n, args.tempo_minimo)
+            for etapa, bench in ETAPAS_RANKING.items():
+                if ativa(etapa):
+                    for n in args.ranking:
+                        resultados += bench(n, args.tempo_minimo)
+        finally:
+            os.chdir(diretorio_original)
+
+    for r in resultados:
+        if "pulada" in r:
+            print(f"{r['etapa']:<40} pulada: {r['pulada']}")
+        if "bytes_por_quadro" in r:
+            print(f"{r['etapa']:<40} {r['bytes_por_quadro'] / 1024:9.1f} KB/quadro")
+        if "p50_ms" not in r:
+            continue
+        print(
+            f"{r['etapa']:<40} {r['tamanho']:>9} {r['unidade']:<8}"
+            f" p50={r['p50_ms']:9.3f}ms p99={r['p99_ms']:9.3f}ms"
+        )
+        if "erro_medio_px" in r:
+            print(
+                f"{'':<40} detectados={r['fracao_detectada']:.0%}"
+                f" erro medio={r['erro_medio_px']:.2f}px"
+                f" p99={r['erro_p99_px']:.2f}px"
+                f" tremor={r['tremor_medio_px']:.2f}px"
+            )
+
+    relatorio = {
+        "meta": {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "argumentos": vars(args),
+        },
+        "resultados": resultados,
+    }
+    with open(saida, "w") as f:
+        json.dump(relatorio, f, indent=2)
+    print(f"\nResultados salvos em {saida}")
+
+    if referencia:
+        comparar(resultados, referencia)
+
+
+if __name__ == "__main__":
+    main()
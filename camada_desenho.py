@@ -0,0 +1,650 @@
+import collections
+import math
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+from pool_buffers import PoolBuffers
+
+# Lado (pixels do mundo) dos ladrilhos da CamadaLadrilhos
+LADO_LADRILHO = 256
+# Área mínima de regiao_desenho: a tela da lousa
+LARGURA_TELA = 1280
+ALTURA_TELA = 720
+
+
+class CamadaDesenho:
+    """
+    Camada raster persistente com os traços já desenhados.
+
+    A camada guarda os traços numa imagem BGR e numa máscara de um canal
+    (255 onde existe tinta). A cada quadro só os pontos novos do armazém de
+    traços são rasterizados; a camada é então composta sobre o quadro da
+    câmera usando a máscara, sem percorrer todos os pontos novamente.
+    """
+
+    def __init__(self, largura, altura):
+        self.largura = largura
+        self.altura = altura
+        self.imagem = np.zeros((altura, largura, 3), np.uint8)
+        self.mascara = np.zeros((altura, largura), np.uint8)
+        # Quantos pontos do armazém já estão na camada
+        self.n_rasterizados = 0
+        # Bounding box [x1, y1, x2, y2] da região com tinta (None = vazia)
+        self.regiao_ocupada = None
+        # Áreas auxiliares do redesenho parcial
+        self.pool = PoolBuffers()
+
+    def garantir_tamanho(self, largura, altura, desenho):
+        """Recria a camada se o tamanho do quadro da câmera mudou"""
+        if largura == self.largura and altura == self.altura:
+            return
+        self.largura = largura
+        self.altura = altura
+        self.imagem = np.zeros((altura, largura, 3), np.uint8)
+        self.mascara = np.zeros((altura, largura), np.uint8)
+        self.redesenhar(desenho)
+
+    def limpar(self):
+        self.imagem[:] = 0
+        self.mascara[:] = 0
+        self.n_rasterizados = 0
+        self.regiao_ocupada = None
+
+    def atualizar(self, desenho):
+        """Rasteriza apenas os pontos do armazém adicionados desde a última chamada"""
+        if self.n_rasterizados > len(desenho):
+            # O desenho encolheu sem aviso: não há como saber o que mudou
+            self.redesenhar(desenho)
+            return
+
+        for pontos, cor, espessura, _ in desenho.tracos_a_partir(self.n_rasterizados):
+            # O ponto anterior, já desenhado, só liga a linha
+            _rasterizar_tracos(self.imagem, self.mascara, [pontos], cor, espessura)
+            self._ocupar(self._recortar(_caixa_pontos(pontos, espessura)))
+        self.n_rasterizados = len(desenho)
+
+    def redesenhar(self, desenho, regiao=None):
+        """
+        Refaz a camada a partir do armazém de traços.
+
+        Se ``regiao`` ([x1, y1, x2, y2]) for informada, apenas essa área é
+        apagada e redesenhada; o restante da camada continua válido.
+        """
+        if regiao is None:
+            self.limpar()
+            _rasterizar_em_lotes(self.imagem, self.mascara, desenho)
+            self.n_rasterizados = len(desenho)
+            if len(desenho):
+                caixas, espessuras = desenho.caixas()
+                raios = espessuras // 2 + 2
+                self._ocupar(
+                    self._recortar(
+                        [
+                            (caixas[:, 0] - raios).min(),
+                            (caixas[:, 1] - raios).min(),
+                            (caixas[:, 2] + raios + 1).max(),
+                            (caixas[:, 3] + raios + 1).max(),
+                        ]
+                    )
+                )
+            return
+
+        x1, y1, x2, y2 = self._recortar(regiao)
+        if x1 >= x2 or y1 >= y2:
+            self.n_rasterizados = len(desenho)
+            return
+
+        # Traços que alcançam a região, filtrados pelas bounding boxes
+        caixas, espessuras = desenho.caixas()
+        raios = espessuras // 2 + 2
+        tocados = np.nonzero(
+            (caixas[:, 0] - raios < x2)
+            & (caixas[:, 2] + raios + 1 > x1)
+            & (caixas[:, 1] - raios < y2)
+            & (caixas[:, 3] + raios + 1 > y1)
+        )[0]
+
+        self.imagem[y1:y2, x1:x2] = 0
+        self.mascara[y1:y2, x1:x2] = 0
+        if len(tocados):
+            # O OpenCV cria pontas novas ao recortar linhas grossas na borda da
+            # imagem, então os traços são redesenhados inteiros numa área
+            # auxiliar que os contém, e só a região pedida é copiada de volta.
+            ax1, ay1 = (caixas[tocados, :2] - raios[tocados, None]).min(axis=0)
+            ax2, ay2 = (caixas[tocados, 2:] + raios[tocados, None] + 1).max(axis=0)
+            ax1, ay1, ax2, ay2 = self._recortar(
+                [min(ax1, x1), min(ay1, y1), max(ax2, x2), max(ay2, y2)]
+            )
+            imagem_aux = self.pool.zerado("imagem_aux", (ay2 - ay1, ax2 - ax1, 3))
+            mascara_aux = self.pool.zerado("mascara_aux", (ay2 - ay1, ax2 - ax1))
+            deslocamento = np.array([ax1, ay1], np.int32)
+            _rasterizar_em_lotes(
+                imagem_aux,
+                mascara_aux,
+                (
+                    (pontos - deslocamento, cor, espessura)
+                    for pontos, cor, espessura in map(desenho.traco, tocados)
+                ),
+            )
+            self.imagem[y1:y2, x1:x2] = imagem_aux[
+                y1 - ay1 : y2 - ay1, x1 - ax1 : x2 - ax1
+            ]
+            self.mascara[y1:y2, x1:x2] = mascara_aux[
+                y1 - ay1 : y2 - ay1, x1 - ax1 : x2 - ax1
+            ]
+        self.n_rasterizados = len(desenho)
+
+    def remover(self, traco_removido, desenho):
+        """
+        Apaga da camada apenas a área coberta por um traço removido do fim do
+        armazém (o retorno de ArmazemTracos.desfazer).
+        """
+        pontos, _, espessura = traco_removido
+        raio = espessura // 2 + 2
+        x1, y1 = pontos.min(axis=0) - raio
+        x2, y2 = pontos.max(axis=0) + raio + 1
+        self.redesenhar(desenho, [x1, y1, x2, y2])
+
+    def compor(self, img):
+        """Copia a tinta da camada para ``img``, apenas onde a máscara é 255"""
+        if self.regiao_ocupada is None:
+            return img
+
+        x1, y1, x2, y2 = self.regiao_ocupada
+        cv2.copyTo(
+            self.imagem[y1:y2, x1:x2], self.mascara[y1:y2, x1:x2], img[y1:y2, x1:x2]
+        )
+        return img
+
+    def _ocupar(self, caixa):
+        if caixa[0] >= caixa[2] or caixa[1] >= caixa[3]:
+            return
+        if self.regiao_ocupada is None:
+            self.regiao_ocupada = caixa
+        else:
+            self.regiao_ocupada = _unir(self.regiao_ocupada, caixa)
+
+    def _recortar(self, regiao):
+        x1, y1, x2, y2 = regiao
+        return [
+            max(0, min(int(x1), self.largura)),
+            max(0, min(int(y1), self.altura)),
+            max(0, min(int(x2), self.largura)),
+            max(0, min(int(y2), self.altura)),
+        ]
+
+
+class Vista:
+    """
+    Enquadramento da tela sobre o quadro infinito: o ponto (x, y) do mundo
+    aparece na tela em ((x - self.x) * zoom, (y - self.y) * zoom). Na vista
+    inicial (origem 0, zoom 1) mundo e tela coincidem.
+    """
+
+    ZOOM_MINIMO = 0.25
+    ZOOM_MAXIMO = 4.0
+    # A origem fica longe do limite das coordenadas int16 do formato .lsd
+    LIMITE = 25000
+
+    def __init__(self):
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.x = 0.0
+        self.y = 0.0
+        self.zoom = 1.0
+
+    @property
+    def identidade(self):
+        return self.x == 0 and self.y == 0 and self.zoom == 1
+
+    def para_mundo(self, x, y):
+        """Ponto da tela em coordenadas (inteiras) do mundo"""
+        return (
+            int(round(x / self.zoom + self.x)),
+            int(round(y / self.zoom + self.y)),
+        )
+
+    def para_tela(self, pontos):
+        """Array (n, 2) de pontos do mundo em pixels da tela (int32)"""
+        if self.identidade:
+            return pontos
+        tela = (pontos - np.array([self.x, self.y])) * self.zoom
+        return np.round(tela).astype(np.int32)
+
+    def mover(self, dx, dy):
+        """Arrasta o conteúdo ``dx``, ``dy`` pixels da tela"""
+        self._posicionar(self.x - dx / self.zoom, self.y - dy / self.zoom)
+
+    def ampliar(self, fator, cx, cy):
+        """Multiplica o zoom por ``fator``, com o ponto (cx, cy) da tela parado"""
+        self.definir_zoom(self.zoom * fator, cx, cy)
+
+    def definir_zoom(self, zoom, cx, cy):
+        zoom = min(max(zoom, self.ZOOM_MINIMO), self.ZOOM_MAXIMO)
+        if abs(zoom - 1) < 1e-9:
+            zoom = 1.0
+        mundo_x = cx / self.zoom + self.x
+        mundo_y = cy / self.zoom + self.y
+        self.zoom = zoom
+        self._posicionar(mundo_x - cx / zoom, mundo_y - cy / zoom)
+
+    def regiao_mundo(self, largura, altura):
+        """Retângulo [x1, y1, x2, y2] do mundo visível numa tela desse tamanho"""
+        return [
+            self.x,
+            self.y,
+            self.x + largura / self.zoom,
+            self.y + altura / self.zoom,
+        ]
+
+    def _posicionar(self, x, y):
+        self.x = min(max(x, -self.LIMITE), self.LIMITE)
+        self.y = min(max(y, -self.LIMITE), self.LIMITE)
+
+
+class Ladrilho:
+    """Tinta (BGR) e máscara de um ladrilho; ``versao`` muda a cada alteração"""
+
+    def __init__(self, lado, dados=None):
+        if dados is None:
+            dados = np.zeros(lado * lado * 4, np.uint8)
+        # Um bloco só, gravado e lido de uma vez no despejo
+        self.dados = dados
+        self.imagem = dados[: lado * lado * 3].reshape(lado, lado, 3)
+        self.mascara = dados[lado * lado * 3 :].reshape(lado, lado)
+        self.versao = 0
+
+
+class CamadaLadrilhos:
+    """
+    Camada de traços do quadro infinito, em ladrilhos de ``lado`` pixels do
+    mundo.
+
+    Um ladrilho só é criado quando um traço passa por ele, então a memória
+    acompanha a área desenhada e não a extensão do quadro. A cada quadro só os
+    pontos novos são rasterizados, e só nos ladrilhos que o trecho novo toca;
+    ``compor`` copia para a tela apenas os ladrilhos visíveis na Vista (com
+    zoom, a cópia redimensionada de cada um é guardada até ele mudar).
+
+    Com mais de ``maximo_memoria`` ladrilhos na memória, os usados há mais
+    tempo vão para arquivos numa pasta temporária e voltam quando são vistos
+    ou desenhados de novo.
+
+    Tem as operações da CamadaDesenho usadas pela lousa (atualizar,
+    redesenhar, remover, limpar), com ``compor`` recebendo a Vista.
+    """
+
+    def __init__(self, lado=LADO_LADRILHO, maximo_memoria=128):
+        self.lado = lado
+        self.maximo_memoria = maximo_memoria
+        # Ordem de uso: o primeiro é o usado há mais tempo
+        self.ladrilhos = collections.OrderedDict()
+        self.despejados = set()
+        self.pasta_despejo = None
+        self.n_rasterizados = 0
+        self.despejos = 0
+        self.recargas = 0
+        self._escalados = {}
+        self._visiveis = set()
+        self.pool = PoolBuffers()
+
+    def __len__(self):
+        """Ladrilhos com tinta, na memória ou despejados"""
+        return len(self.ladrilhos) + len(self.despejados)
+
+    def memoria(self):
+        """Bytes dos ladrilhos na memória"""
+        return sum(ladrilho.dados.nbytes for ladrilho in self.ladrilhos.values())
+
+    def atualizar(self, desenho):
+        """Rasteriza os pontos novos do armazém nos ladrilhos que eles tocam"""
+        if self.n_rasterizados > len(desenho):
+            self.redesenhar(desenho)
+            return
+
+        for pontos, cor, espessura, _ in desenho.tracos_a_partir(self.n_rasterizados):
+            for chave in self._chaves(_caixa_pontos(pontos, espessura)):
+                trechos = self._trechos(chave, [(pontos, cor, espessura)])
+                if trechos:
+                    ladrilho = self._obter(chave, criar=True)
+                    self._rasterizar_ladrilho(chave, ladrilho, trechos)
+        self.n_rasterizados = len(desenho)
+
+    def redesenhar(self, desenho):
+        """Refaz todos os ladrilhos a partir do armazém de traços"""
+        self.limpar()
+        if desenho.n_tracos:
+            caixas, espessuras = desenho.caixas()
+            raios = espessuras // 2 + 2
+            # Ladrilhos de cada traço, com os traços de cada ladrilho em ordem
+            por_ladrilho = {}
+            for i, (x1, y1, x2, y2) in enumerate(
+                zip(
+                    ((caixas[:, 0] - raios) // self.lado).tolist(),
+                    ((caixas[:, 1] - raios) // self.lado).tolist(),
+                    ((caixas[:, 2] + raios) // self.lado).tolist(),
+                    ((caixas[:, 3] + raios) // self.lado).tolist(),
+                )
+            ):
+                for ty in range(y1, y2 + 1):
+                    for tx in range(x1, x2 + 1):
+                        por_ladrilho.setdefault((tx, ty), []).append(i)
+            for chave, indices in por_ladrilho.items():
+                self._redesenhar_ladrilho(chave, indices, desenho)
+        self.n_rasterizados = len(desenho)
+
+    def remover(self, traco_removido, desenho):
+        """
+        Refaz só os ladrilhos cobertos por um traço removido do fim do
+        armazém (o retorno de ArmazemTracos.desfazer).
+        """
+        pontos, _, espessura = traco_removido
+        caixas, espessuras = desenho.caixas()
+        raios = espessuras // 2 + 2
+        for chave in self._chaves(_caixa_pontos(pontos, espessura)):
+            if chave not in self.ladrilhos and chave not in self.despejados:
+                continue
+            x1, y1 = self._origem(chave).tolist()
+            x2, y2 = x1 + self.lado, y1 + self.lado
+            tocados = np.nonzero(
+                (caixas[:, 0] - raios < x2)
+                & (caixas[:, 2] + raios + 1 > x1)
+                & (caixas[:, 1] - raios < y2)
+                & (caixas[:, 3] + raios + 1 > y1)
+            )[0]
+            if len(tocados):
+                self._redesenhar_ladrilho(chave, tocados, desenho)
+            else:
+                # Sem tinta: a memória do ladrilho é liberada
+                self._descartar(chave)
+        self.n_rasterizados = len(desenho)
+
+    def limpar(self):
+        for chave in list(self.despejados):
+            self._descartar(chave)
+        self.ladrilhos.clear()
+        self._escalados.clear()
+        self.n_rasterizados = 0
+
+    def fechar(self):
+        """Apaga os ladrilhos despejados e a pasta temporária"""
+        self.limpar()
+        if self.pasta_despejo is not None:
+            os.rmdir(self.pasta_despejo)
+            self.pasta_despejo = None
+
+    def compor(self, img, vista):
+        """Copia para ``img`` a tinta dos ladrilhos visíveis na ``vista``"""
+        altura, largura = img.shape[:2]
+        lado = self.lado
+        x1, y1, x2, y2 = vista.regiao_mundo(largura, altura)
+        self._visiveis = {
+            (tx, ty)
+            for ty in range(math.floor(y1 / lado), math.ceil(y2 / lado))
+            for tx in range(math.floor(x1 / lado), math.ceil(x2 / lado))
+            if (tx, ty) in self.ladrilhos or (tx, ty) in self.despejados
+        }
+
+        for chave in self._visiveis:
+            ladrilho = self._obter(chave)
+            # Bordas arredondadas uma vez: ladrilhos vizinhos não deixam frestas
+            ox, oy = self._origem(chave).tolist()
+            sx1 = round((ox - vista.x) * vista.zoom)
+            sy1 = round((oy - vista.y) * vista.zoom)
+            sx2 = round((ox + lado - vista.x) * vista.zoom)
+            sy2 = round((oy + lado - vista.y) * vista.zoom)
+            if sx2 - sx1 == lado and sy2 - sy1 == lado:
+                imagem, mascara = ladrilho.imagem, ladrilho.mascara
+            else:
+                imagem, mascara = self._escalado(chave, ladrilho, sx2 - sx1, sy2 - sy1)
+
+            cx1, cy1 = max(sx1, 0), max(sy1, 0)
+            cx2, cy2 = min(sx2, largura), min(sy2, altura)
+            if cx1 >= cx2 or cy1 >= cy2:
+                continue
+            cv2.copyTo(
+                imagem[cy1 - sy1 : cy2 - sy1, cx1 - sx1 : cx2 - sx1],
+                mascara[cy1 - sy1 : cy2 - sy1, cx1 - sx1 : cx2 - sx1],
+                img[cy1:cy2, cx1:cx2],
+            )
+
+        if len(self._escalados) > len(self._visiveis):
+            for chave in [c for c in self._escalados if c not in self._visiveis]:
+                del self._escalados[chave]
+        return img
+
+    def _chaves(self, caixa):
+        """Ladrilhos que a caixa [x1, y1, x2, y2) toca"""
+        x1, y1, x2, y2 = caixa
+        for ty in range(y1 // self.lado, (y2 - 1) // self.lado + 1):
+            for tx in range(x1 // self.lado, (x2 - 1) // self.lado + 1):
+                yield tx, ty
+
+    def _origem(self, chave):
+        return np.array(chave, np.int32) * self.lado
+
+    def _redesenhar_ladrilho(self, chave, indices, desenho):
+        trechos = self._trechos(chave, map(desenho.traco, indices))
+        if not trechos:
+            self._descartar(chave)
+            return
+        ladrilho = self._obter(chave, criar=True)
+        ladrilho.dados[:] = 0
+        self._rasterizar_ladrilho(chave, ladrilho, trechos)
+
+    def _trechos(self, chave, tracos):
+        """
+        Trechos dos traços (pontos, cor, espessura) com os segmentos cuja
+        tinta toca o ladrilho. O OpenCV desenha cada segmento de uma linha
+        grossa com as pontas arredondadas, então um traço é a união dos seus
+        segmentos e os trechos dão no ladrilho os mesmos pixels do traço todo.
+        """
+        x1, y1 = self._origem(chave).tolist()
+        x2, y2 = x1 + self.lado, y1 + self.lado
+        trechos = []
+        for pontos, cor, espessura in tracos:
+            raio = espessura // 2 + 2
+            if len(pontos) == 1:
+                px, py = pontos[0].tolist()
+                if (
+                    px - raio < x2
+                    and px + raio + 1 > x1
+                    and py - raio < y2
+                    and py + raio + 1 > y1
+                ):
+                    trechos.append((pontos, cor, espessura))
+                continue
+            minimos = np.minimum(pontos[:-1], pontos[1:]) - raio
+            maximos = np.maximum(pontos[:-1], pontos[1:]) + raio + 1
+            segmentos = np.flatnonzero(
+                (minimos[:, 0] < x2)
+                & (maximos[:, 0] > x1)
+                & (minimos[:, 1] < y2)
+                & (maximos[:, 1] > y1)
+            )
+            if not len(segmentos):
+                continue
+            # Segmentos seguidos formam um trecho só
+            quebras = np.flatnonzero(np.diff(segmentos) > 1) + 1
+            for grupo in np.split(segmentos, quebras):
+                trechos.append((pontos[grupo[0] : grupo[-1] + 2], cor, espessura))
+        return trechos
+
+    def _rasterizar_ladrilho(self, chave, ladrilho, trechos):
+        """
+        Rasteriza os trechos (de ``_trechos``) sobre a tinta do ladrilho. O
+        OpenCV muda os pixels de uma linha grossa recortada na borda da
+        imagem, então, quando algum trecho sai do ladrilho, o desenho é feito
+        numa área auxiliar que contém todos, e só o ladrilho volta dela: a
+        emenda entre ladrilhos fica igual ao desenho numa imagem só.
+        """
+        origem = self._origem(chave)
+        x1, y1 = origem.tolist()
+        caixa = [x1, y1, x1 + self.lado, y1 + self.lado]
+        regiao = caixa
+        for pontos, _, espessura in trechos:
+            regiao = _unir(regiao, _caixa_pontos(pontos, espessura))
+
+        if regiao == caixa:
+            _rasterizar_em_lotes(
+                ladrilho.imagem,
+                ladrilho.mascara,
+                (
+                    (pontos - origem, cor, espessura)
+                    for pontos, cor, espessura in trechos
+                ),
+            )
+        else:
+            ax1, ay1, ax2, ay2 = regiao
+            imagem_aux = self.pool.obter("imagem_aux", (ay2 - ay1, ax2 - ax1, 3))
+            mascara_aux = self.pool.obter("mascara_aux", (ay2 - ay1, ax2 - ax1))
+            # Fora do ladrilho o conteúdo da área auxiliar não importa
+            dx, dy = x1 - ax1, y1 - ay1
+            janela = (slice(dy, dy + self.lado), slice(dx, dx + self.lado))
+            imagem_aux[janela] = ladrilho.imagem
+            mascara_aux[janela] = ladrilho.mascara
+            deslocamento = np.array([ax1, ay1], np.int32)
+            _rasterizar_em_lotes(
+                imagem_aux,
+                mascara_aux,
+                (
+                    (pontos - deslocamento, cor, espessura)
+                    for pontos, cor, espessura in trechos
+                ),
+            )
+            ladrilho.imagem[:] = imagem_aux[janela]
+            ladrilho.mascara[:] = mascara_aux[janela]
+        ladrilho.versao += 1
+
+    def _escalado(self, chave, ladrilho, largura, altura):
+        """Ladrilho redimensionado para (largura, altura), guardado até mudar"""
+        versao = (largura, altura, ladrilho.versao)
+        guardado = self._escalados.get(chave)
+        if guardado is None or guardado[0] != versao:
+            # Vizinho mais próximo: a tinta não se mistura com o fundo preto
+            guardado = (
+                versao,
+                cv2.resize(ladrilho.imagem, (largura, altura), None, 0, 0, 0),
+                cv2.resize(ladrilho.mascara, (largura, altura), None, 0, 0, 0),
+            )
+            self._escalados[chave] = guardado
+        return guardado[1], guardado[2]
+
+    def _obter(self, chave, criar=False):
+        ladrilho = self.ladrilhos.get(chave)
+        if ladrilho is not None:
+            self.ladrilhos.move_to_end(chave)
+            return ladrilho
+        if chave in self.despejados:
+            caminho = self._caminho_despejo(chave)
+            ladrilho = Ladrilho(self.lado, np.fromfile(caminho, np.uint8))
+            os.remove(caminho)
+            self.despejados.discard(chave)
+            self.recargas += 1
+        elif criar:
+            ladrilho = Ladrilho(self.lado)
+        else:
+            return None
+        self.ladrilhos[chave] = ladrilho
+        self._despejar()
+        return ladrilho
+
+    def _despejar(self):
+        """Grava em disco os ladrilhos usados há mais tempo, acima do limite"""
+        while len(self.ladrilhos) > self.maximo_memoria:
+            chave = next(iter(self.ladrilhos))
+            if chave in self._visiveis:
+                # Todos os que sobraram estão na tela: o limite cede
+                break
+            ladrilho = self.ladrilhos.pop(chave)
+            if self.pasta_despejo is None:
+                self.pasta_despejo = tempfile.mkdtemp(prefix="lousa_ladrilhos_")
+            ladrilho.dados.tofile(self._caminho_despejo(chave))
+            self.despejados.add(chave)
+            self._escalados.pop(chave, None)
+            self.despejos += 1
+
+    def _descartar(self, chave):
+        self.ladrilhos.pop(chave, None)
+        self._escalados.pop(chave, None)
+        if chave in self.despejados:
+            os.remove(self._caminho_despejo(chave))
+            self.despejados.discard(chave)
+
+    def _caminho_despejo(self, chave):
+        return os.path.join(self.pasta_despejo, f"{chave[0]}_{chave[1]}.bin")
+
+
+def regiao_desenho(desenho, margem=20):
+    """
+    Região [x1, y1, x2, y2) do mundo a exportar: a tela da lousa, aumentada
+    para conter os traços desenhados fora dela (quadro infinito).
+    """
+    regiao = [0, 0, LARGURA_TELA, ALTURA_TELA]
+    if desenho.n_tracos:
+        caixas, espessuras = desenho.caixas()
+        raios = espessuras // 2 + margem
+        regiao = [
+            min(regiao[0], int((caixas[:, 0] - raios).min())),
+            min(regiao[1], int((caixas[:, 1] - raios).min())),
+            max(regiao[2], int((caixas[:, 2] + raios + 1).max())),
+            max(regiao[3], int((caixas[:, 3] + raios + 1).max())),
+        ]
+    return regiao
+
+
+def desenhar_traco(imagem, pontos, cor, espessura):
+    """
+    Desenha um traço (pontos: array int32 (n, 2)) numa imagem. Com as pontas
+    arredondadas das linhas grossas do OpenCV, o resultado é o mesmo da regra
+    antiga de um círculo por ponto mais uma linha até o anterior.
+    """
+    if len(pontos) == 1:
+        cv2.circle(imagem, pontos[0].tolist(), espessura // 2, cor, cv2.FILLED)
+    else:
+        cv2.polylines(imagem, [pontos], False, cor, espessura)
+
+
+def _rasterizar_tracos(imagem, mascara, lista_pontos, cor, espessura):
+    """Vários traços da mesma cor e espessura, numa chamada de polylines só"""
+    linhas = [pontos for pontos in lista_pontos if len(pontos) > 1]
+    if linhas:
+        cv2.polylines(imagem, linhas, False, cor, espessura)
+        cv2.polylines(mascara, linhas, False, 255, espessura)
+    for pontos in lista_pontos:
+        if len(pontos) == 1:
+            desenhar_traco(imagem, pontos, cor, espessura)
+            desenhar_traco(mascara, pontos, 255, espessura)
+
+
+def _rasterizar_em_lotes(imagem, mascara, tracos):
+    """
+    Rasteriza (pontos, cor, espessura) em ordem, agrupando os traços
+    consecutivos de mesma cor e espessura, para manter a sobreposição correta.
+    """
+    lote = []
+    chave = None
+    for pontos, cor, espessura in tracos:
+        if (cor, espessura) != chave and lote:
+            _rasterizar_tracos(imagem, mascara, lote, *chave)
+            lote = []
+        chave = (cor, espessura)
+        lote.append(np.ascontiguousarray(pontos, np.int32))
+    if lote:
+        _rasterizar_tracos(imagem, mascara, lote, *chave)
+
+
+def _caixa_pontos(pontos, espessura):
+    """Bounding box da tinta de um trecho de traço"""
+    raio = espessura // 2 + 2
+    x1, y1 = pontos.min(axis=0).tolist()
+    x2, y2 = pontos.max(axis=0).tolist()
+    return [x1 - raio, y1 - raio, x2 + raio + 1, y2 + raio + 1]
+
+
+def _unir(a, b):
+    return [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
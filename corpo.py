@@ -1,26 +1,25 @@
 import cv2
-import mediapipe as mp
 
-video = cv2.VideoCapture(0)
-video.set(3, 1280)
-video.set(4, 720)
+from fontes import FonteCamera
+from servico_visao import AnalisadorPose, ServicoVisao, desenhar_pose
 
-mp_pose = mp.solutions.pose
-pose = mp_pose.Pose()
-mp_draw = mp.solutions.drawing_utils
+# A câmera e a pose ficam no serviço de visão, o mesmo que a lousa usa com
+# --pose; outros analisadores podem ser ligados sem abrir a câmera de novo
+servico = ServicoVisao(FonteCamera(0, 1280, 720), [AnalisadorPose(intervalo=1)])
+servico.iniciar()
 
 while True:
-    check, img = video.read()
-    imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    results = pose.process(imgRGB)
-
-    if results.pose_landmarks:
-        mp_draw.draw_landmarks(img, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
+    quadro = servico.proximo()
+    if quadro is None:
+        break
+    img = quadro.img
+    _, pontos = servico.ultimo("pose")
+    desenhar_pose(img, pontos)
 
     imgFlip = cv2.flip(img, 1)
     cv2.imshow("Img", imgFlip)
     if cv2.waitKey(1) == 27:
         break
 
-video.release()
+servico.parar()
 cv2.destroyAllWindows()
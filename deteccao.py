@@ -0,0 +1,191 @@
+import threading
+
+import cv2
+import numpy as np
+
+from pool_buffers import PoolBuffers
+
+# Entrada do detector de palmas do MediaPipe; reduzir abaixo disso não economiza
+# nada e só piora a precisão
+LADO_MINIMO_MODELO = 192
+
+
+class DetectorMaos:
+    """
+    Front-end do HandDetector que roda o modelo numa cópia reduzida do quadro.
+
+    Enquanto há uma mão sendo acompanhada, a detecção roda só numa região de
+    interesse (ROI) em volta dos landmarks do quadro anterior; se a mão não for
+    encontrada ali, a busca é refeita no quadro inteiro. As coordenadas
+    retornadas (lmList, bbox, center) estão sempre na resolução original, então
+    o restante da lousa não precisa saber da redução.
+
+    Tem a mesma interface usada de HandDetector (findHands/fingersUp).
+    """
+
+    def __init__(self, detector, escala=0.5, margem_roi=0.5):
+        """
+        :param detector: HandDetector do cvzone que faz a inferência.
+        :param escala: Fator de redução aplicado antes da inferência (0 < escala <= 1).
+        :param margem_roi: Margem em volta da mão, como fração do maior lado da bbox.
+        """
+        if not 0 < escala <= 1:
+            raise ValueError("escala deve estar entre 0 (exclusivo) e 1")
+        self.detector = detector
+        self.escala = escala
+        self.margem_roi = margem_roi
+        # ROI [x1, y1, x2, y2] em coordenadas do quadro, ou None (busca completa)
+        self.roi = None
+        # Destino da redução, reaproveitado entre quadros
+        self.pool = PoolBuffers()
+
+    def findHands(self, img, draw=False, flipType=True):
+        altura, largura = img.shape[:2]
+
+        maos = []
+        if self.roi is not None:
+            maos = self._detectar_regiao(img, self.roi, flipType)
+        if not maos:
+            # Rastreamento perdido (ou ainda não iniciado): busca no quadro todo
+            maos = self._detectar_regiao(img, [0, 0, largura, altura], flipType)
+
+        self.roi = self._calcular_roi(maos, largura, altura)
+
+        if draw:
+            for mao in maos:
+                x, y, w, h = mao["bbox"]
+                cv2.rectangle(img, (x, y), (x + w, y + h), (255, 0, 255), 2)
+        return maos, img
+
+    def fingersUp(self, myHand):
+        return self.detector.fingersUp(myHand)
+
+    def _detectar_regiao(self, img, regiao, flipType):
+        x1, y1, x2, y2 = regiao
+        recorte = img[y1:y2, x1:x2]
+        if recorte.size == 0:
+            return []
+
+        lado_menor = min(recorte.shape[:2])
+        escala = min(1, max(self.escala, LADO_MINIMO_MODELO / lado_menor))
+        if escala < 1:
+            # Mesmo arredondamento do OpenCV para o tamanho calculado por fx/fy
+            forma = (
+                round(recorte.shape[0] * escala),
+                round(recorte.shape[1] * escala),
+            ) + recorte.shape[2:]
+            recorte = cv2.resize(
+                recorte,
+                None,
+                dst=self.pool.obter("reduzido", forma),
+                fx=escala,
+                fy=escala,
+                interpolation=cv2.INTER_AREA,
+            )
+
+        maos = self.detector.findHands(recorte, draw=False, flipType=flipType)[0]
+        escala_x = (x2 - x1) / recorte.shape[1]
+        escala_y = (y2 - y1) / recorte.shape[0]
+        for mao in maos:
+            mao["lmList"] = [
+                [int(x * escala_x) + x1, int(y * escala_y) + y1, int(z * escala_x)]
+                for x, y, z in mao["lmList"]
+            ]
+            bx, by, bw, bh = mao["bbox"]
+            mao["bbox"] = (
+                int(bx * escala_x) + x1,
+                int(by * escala_y) + y1,
+                int(bw * escala_x),
+                int(bh * escala_y),
+            )
+            cx, cy = mao["center"]
+            mao["center"] = (int(cx * escala_x) + x1, int(cy * escala_y) + y1)
+        return maos
+
+    def _calcular_roi(self, maos, largura, altura):
+        if not maos:
+            return None
+
+        xs = [ponto[0] for mao in maos for ponto in mao["lmList"]]
+        ys = [ponto[1] for mao in maos for ponto in mao["lmList"]]
+        margem = int(max(max(xs) - min(xs), max(ys) - min(ys)) * self.margem_roi)
+        roi = [
+            max(0, min(xs) - margem),
+            max(0, min(ys) - margem),
+            min(largura, max(xs) + margem),
+            min(altura, max(ys) + margem),
+        ]
+        if roi[0] >= roi[2] or roi[1] >= roi[3]:
+            return None
+        return roi
+
+
+def criar_detector_maos(escala=0.5, margem_roi=0.5):
+    """
+    HandDetector do cvzone atrás do DetectorMaos. O cvzone (e com ele o
+    MediaPipe) só é importado aqui, porque a importação leva segundos.
+    """
+    from cvzone.HandTrackingModule import HandDetector
+
+    return DetectorMaos(
+        HandDetector(detectionCon=0.8), escala=escala, margem_roi=margem_roi
+    )
+
+
+class CarregadorDetector:
+    """
+    Cria o detector numa thread e o aquece com uma inferência num quadro
+    vazio, enquanto a câmera abre e os primeiros quadros são exibidos.
+
+    Até o detector ficar pronto ``findHands`` não encontra mãos; depois
+    disso repassa as chamadas. Tem a mesma interface usada de HandDetector
+    (findHands/fingersUp).
+    """
+
+    def __init__(self, criar, *args, forma_aquecimento=(720, 1280, 3)):
+        """
+        :param criar: Função que cria o detector, chamada com ``args``.
+        :param forma_aquecimento: Forma do quadro vazio da primeira inferência.
+        """
+        self.criar = criar
+        self.args = args
+        self.forma_aquecimento = forma_aquecimento
+        self.detector = None
+        self.erro = None
+        self.pronto = threading.Event()
+        self._thread = threading.Thread(target=self._carregar, daemon=True)
+        self._thread.start()
+
+    @property
+    def resultado_novo(self):
+        """Antes de o detector ficar pronto nenhum quadro foi detectado"""
+        if self.detector is None:
+            return False
+        return getattr(self.detector, "resultado_novo", True)
+
+    def findHands(self, img, draw=False, flipType=True):
+        if self.detector is None:
+            if self.erro is not None:
+                raise RuntimeError("Falha ao carregar o detector de mãos") from (
+                    self.erro
+                )
+            return [], img
+        return self.detector.findHands(img, draw=draw, flipType=flipType)
+
+    def fingersUp(self, myHand):
+        return self.detector.fingersUp(myHand)
+
+    def esperar(self, timeout=None):
+        """Espera o detector ficar pronto; retorna False se o tempo acabou"""
+        return self.pronto.wait(timeout)
+
+    def _carregar(self):
+        try:
+            detector = self.criar(*self.args)
+            # A primeira inferência inicializa o grafo do MediaPipe
+            detector.findHands(np.zeros(self.forma_aquecimento, np.uint8), draw=False)
+            self.detector = detector
+        except Exception as e:
+            self.erro = e
+        finally:
+            self.pronto.set()
@@ -0,0 +1,283 @@
+"""
+Detecção de mãos num processo separado.
+
+O quadro não é serializado: o processo principal copia cada quadro para um
+anel de buffers em ``multiprocessing.shared_memory`` e manda pelo Pipe só o
+índice do buffer. O processo de detecção lê o quadro direto da memória
+compartilhada e devolve as mãos (listas pequenas de landmarks) pelo mesmo
+Pipe. Assim o MediaPipe roda em outro núcleo e o loop da lousa continua
+renderizando no ritmo da câmera, usando o resultado mais recente.
+"""
+
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from deteccao import CarregadorDetector, criar_detector_maos
+
+# Tempo para o processo encerrar sozinho antes de ser terminado à força
+ESPERA_ENCERRAMENTO = 2.0
+# Espera antes do primeiro reinício do processo; dobra a cada falha seguida
+ESPERA_REINICIO = 0.5
+ESPERA_REINICIO_MAXIMA = 8.0
+
+
+class DetectorProcesso:
+    """
+    Front-end com a interface de HandDetector (findHands/fingersUp) para a
+    detecção num processo separado.
+
+    ``findHands`` não espera pela detecção: entrega o quadro ao processo (se
+    houver um buffer livre no anel) e retorna as mãos do último resultado
+    que chegou, que pode ser de um quadro anterior. O processo sempre pula
+    para o quadro mais novo, então o atraso não se acumula.
+
+    Se o processo morrer, é reiniciado com espera crescente entre as
+    tentativas (zerada quando chega uma detecção). Depois de
+    ``maximo_falhas`` mortes seguidas a detecção passa a ser feita no próprio
+    processo da lousa, com o detector de ``criar_detector`` criado numa
+    thread (CarregadorDetector): até ele ficar pronto não há mãos, mas o loop
+    de quadros não para.
+    """
+
+    def __init__(
+        self,
+        escala=0.5,
+        margem_roi=0.5,
+        n_buffers=3,
+        criar_detector=criar_detector_maos,
+        maximo_falhas=5,
+    ):
+        """
+        :param n_buffers: Tamanho do anel de buffers de quadro.
+        :param criar_detector: Função (escala, margem_roi) -> detector,
+            chamada dentro do processo; precisa poder ser importada por ele.
+        :param maximo_falhas: Mortes seguidas do processo até desistir dele.
+        """
+        if n_buffers < 2:
+            raise ValueError("n_buffers deve ser 2 ou mais")
+        self.escala = escala
+        self.margem_roi = margem_roi
+        self.n_buffers = n_buffers
+        self.criar_detector = criar_detector
+        self.maximo_falhas = maximo_falhas
+        self._contexto = mp.get_context("spawn")
+        self._buffers = []
+        self._quadros = []
+        self._forma = None
+        self._livres = []
+        self._processo = None
+        self._conexao = None
+        self._numero = 0
+        self._resultado_numero = -1
+        self.maos = []
+        # Se a última chamada de findHands trouxe uma detecção nova (ver
+        # RastreadorMaos)
+        self.resultado_novo = False
+        self.reinicios = 0
+        self.falhas_seguidas = 0
+        # Última mensagem de erro enviada pelo processo antes de morrer
+        self.ultimo_erro = None
+        self._proximo_reinicio = 0.0
+        # Detector no próprio processo, depois de desistir do processo separado
+        self.detector_local = None
+
+    def findHands(self, img, draw=False, flipType=True):
+        if self.detector_local is not None:
+            maos, _ = self.detector_local.findHands(img, draw=False, flipType=flipType)
+            self.resultado_novo = self.detector_local.resultado_novo
+            for mao in maos:
+                mao["dedos"] = self.detector_local.fingersUp(mao)
+            return maos, img
+
+        if img.shape != self._forma:
+            # Primeiro quadro ou resolução nova: buffers do tamanho certo
+            self.fechar()
+            self._iniciar(img.shape)
+        elif self._processo is None or not self._processo.is_alive():
+            if not self._reiniciar_com_espera():
+                return self.findHands(img, draw, flipType)
+            if self._processo is None:
+                # Ainda esperando para reiniciar: segue sem mãos
+                self.resultado_novo = False
+                return self.maos, img
+
+        self.resultado_novo = False
+        self._receber()
+        if self._livres:
+            indice = self._livres.pop()
+            np.copyto(self._quadros[indice], img)
+            self._numero += 1
+            try:
+                self._conexao.send((indice, self._numero, flipType))
+            except (BrokenPipeError, OSError):
+                # O processo morreu agora; é reiniciado na próxima chamada
+                self._livres.append(indice)
+        return self.maos, img
+
+    def fingersUp(self, myHand):
+        # Os dedos levantados são calculados no processo, junto com as mãos
+        return myHand["dedos"]
+
+    def _reiniciar_com_espera(self):
+        """
+        Trata a morte do processo: reinicia quando a espera da falha atual
+        passar. Retorna False se as falhas esgotaram e a detecção passou a
+        ser local.
+        """
+        if self._processo is not None:
+            # Acabou de morrer: conta a falha e agenda o reinício
+            self._receber()
+            codigo = self._processo.exitcode
+            self._parar_processo()
+            self.falhas_seguidas += 1
+            motivo = f"código de saída {codigo}"
+            if self.ultimo_erro is not None:
+                motivo += f": {self.ultimo_erro}"
+            if self.falhas_seguidas >= self.maximo_falhas:
+                print(
+                    f"Processo de detecção parou {self.falhas_seguidas} vezes"
+                    f" seguidas ({motivo}); detectando no processo da lousa"
+                )
+                forma = self._forma
+                self.fechar()
+                self.maos = []
+                self.detector_local = CarregadorDetector(
+                    self.criar_detector,
+                    self.escala,
+                    self.margem_roi,
+                    forma_aquecimento=forma,
+                )
+                return False
+            espera = min(
+                ESPERA_REINICIO * 2 ** (self.falhas_seguidas - 1),
+                ESPERA_REINICIO_MAXIMA,
+            )
+            print(
+                f"Processo de detecção parou ({motivo}); reiniciando em {espera:.1f}s"
+            )
+            self._proximo_reinicio = time.monotonic() + espera
+            self.maos = []
+        if time.monotonic() >= self._proximo_reinicio:
+            self.reinicios += 1
+            self._iniciar_processo()
+        return True
+
+    def fechar(self):
+        """Encerra o processo e libera a memória compartilhada"""
+        self._parar_processo()
+        for buffer in self._buffers:
+            buffer.close()
+            buffer.unlink()
+        self._buffers = []
+        self._quadros = []
+        self._forma = None
+
+    def _iniciar(self, forma):
+        tamanho = int(np.prod(forma))
+        self._buffers = [
+            shared_memory.SharedMemory(create=True, size=tamanho)
+            for _ in range(self.n_buffers)
+        ]
+        self._quadros = [
+            np.ndarray(forma, np.uint8, buffer=buffer.buf) for buffer in self._buffers
+        ]
+        self._forma = forma
+        self._iniciar_processo()
+
+    def _iniciar_processo(self):
+        self._parar_processo()
+        conexao, conexao_processo = self._contexto.Pipe()
+        self._processo = self._contexto.Process(
+            target=_trabalhar,
+            args=(
+                conexao_processo,
+                [buffer.name for buffer in self._buffers],
+                self._forma,
+                self.criar_detector,
+                self.escala,
+                self.margem_roi,
+            ),
+            daemon=True,
+        )
+        self._processo.start()
+        conexao_processo.close()
+        self._conexao = conexao
+        self._livres = list(range(self.n_buffers))
+        # Resultados de antes do reinício não valem mais
+        self._resultado_numero = -1
+        self.maos = []
+
+    def _parar_processo(self):
+        if self._processo is None:
+            return
+        try:
+            self._conexao.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self._processo.join(ESPERA_ENCERRAMENTO)
+        if self._processo.is_alive():
+            self._processo.terminate()
+            self._processo.join()
+        self._conexao.close()
+        self._processo = None
+        self._conexao = None
+
+    def _receber(self):
+        """Lê os resultados já prontos e devolve os buffers ao anel"""
+        try:
+            while self._conexao.poll():
+                indice, numero, maos = self._conexao.recv()
+                if indice is None:
+                    # Erro do processo, enviado antes de ele terminar
+                    self.ultimo_erro = maos
+                    continue
+                self._livres.append(indice)
+                if maos is not None and numero > self._resultado_numero:
+                    self._resultado_numero = numero
+                    self.maos = maos
+                    self.resultado_novo = True
+                    self.falhas_seguidas = 0
+        except (EOFError, OSError):
+            # Conexão fechada pelo processo que morreu; a próxima chamada
+            # percebe e reinicia
+            pass
+
+
+def _trabalhar(conexao, nomes_buffers, forma, criar_detector, escala, margem_roi):
+    """Loop do processo de detecção"""
+    buffers = [shared_memory.SharedMemory(name=nome) for nome in nomes_buffers]
+    quadros = [np.ndarray(forma, np.uint8, buffer=buffer.buf) for buffer in buffers]
+    try:
+        detector = criar_detector(escala, margem_roi)
+        while True:
+            pedido = conexao.recv()
+            # Só o quadro mais novo é detectado; os anteriores voltam ao anel
+            while pedido is not None and conexao.poll():
+                conexao.send((pedido[0], pedido[1], None))
+                pedido = conexao.recv()
+            if pedido is None:
+                break
+
+            indice, numero, flip_type = pedido
+            maos, _ = detector.findHands(
+                quadros[indice], draw=False, flipType=flip_type
+            )
+            for mao in maos:
+                mao["dedos"] = detector.fingersUp(mao)
+            conexao.send((indice, numero, maos))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    except Exception as e:
+        # O motivo vai para o processo principal, que decide se reinicia
+        try:
+            conexao.send((None, None, f"{type(e).__name__}: {e}"))
+        except (BrokenPipeError, OSError):
+            pass
+        raise
+    finally:
+        del quadros
+        for buffer in buffers:
+            buffer.close()
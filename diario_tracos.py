@@ -0,0 +1,643 @@
+"""
+Diário dos traços: cada mudança no desenho vai para o disco enquanto se
+desenha, para recuperar a sessão depois de uma queda e para reproduzir a aula.
+
+A pasta do diário tem
+
+    segmento_000003.lsj    eventos, só acrescentados
+    checkpoint_000003.lsd  o desenho no início do segmento 3 (formato .lsd
+                           de formato_desenho)
+
+Segmento:
+
+    cabeçalho   "LSDJ", versão (uint16), flags (uint16), início da sessão
+                (float64, time.time()), momento do início do segmento
+                (uint32, ms desde o início da sessão), tolerância de
+                simplificação (float32)
+    lotes       tamanho (uint32) e CRC32 (uint32) dos dados, seguidos dos
+                eventos, 17 bytes cada: momento (uint32, ms desde o início da
+                sessão), tipo (uint8), a, b, c (int32)
+
+Um lote cortado por uma queda (tamanho ou CRC que não batem) encerra a leitura
+do segmento; os lotes anteriores valem.
+
+No loop de quadros um evento só é empacotado num bytearray. Os lotes seguem
+para uma thread de gravação a cada ``intervalo_lote`` segundos, e ela faz
+fsync a cada ``intervalo_fsync``. Num levantar de caneta, depois de
+``eventos_checkpoint`` eventos ou ``intervalo_checkpoint`` segundos, o desenho
+é gravado como checkpoint e um segmento novo começa, então a recuperação só
+repete os eventos do último segmento.
+
+Para reproduzir um diário numa janela:
+
+    python diario_tracos.py pasta_do_diario [--velocidade 4]
+"""
+
+import argparse
+import collections
+import os
+import struct
+import threading
+import time
+import zlib
+
+import cv2
+import numpy as np
+
+import formato_desenho
+from camada_desenho import CamadaLadrilhos, Vista, desenhar_traco, regiao_desenho
+from tracos import ArmazemTracos
+
+MAGICO = b"LSDJ"
+VERSAO = 1
+CABECALHO = struct.Struct("<4sHHdIf")
+LOTE = struct.Struct("<II")
+EVENTO = struct.Struct("<IBiii")
+TIPO_EVENTO = np.dtype(
+    [("ms", "<u4"), ("tipo", "u1"), ("a", "<i4"), ("b", "<i4"), ("c", "<i4")]
+)
+PREFIXO_SEGMENTO = "segmento_"
+PREFIXO_CHECKPOINT = "checkpoint_"
+EXTENSAO_SEGMENTO = ".lsj"
+
+# Tipos de evento. SUBSTITUIR não é gravado: marca, na leitura, os segmentos
+# que começam de um desenho que não sai dos eventos anteriores
+PONTO, LEVANTAR, FIXAR, DESFAZER, LIMPAR, COR, ESPESSURA, SUBSTITUIR = range(1, 9)
+# Flag do segmento que começa de um estado novo (sessão nova, desenho carregado)
+SUBSTITUI = 1
+
+
+class DiarioTracos:
+    """
+    Grava as mudanças do desenho (ver o início do módulo).
+
+    A lousa chama ``ponto``, ``levantar``, ``fixar``, ``desfazer``,
+    ``limpar`` e ``substituir`` junto com as operações de mesmo efeito no
+    ArmazemTracos, e ``atualizar`` uma vez por quadro. A gravação tem thread
+    própria em vez do ExecutorIO porque os lotes não podem ser trocados nem
+    recusados, só gravados em ordem.
+    """
+
+    def __init__(
+        self,
+        pasta,
+        desenho,
+        tolerancia=0.0,
+        intervalo_lote=0.25,
+        eventos_lote=512,
+        intervalo_fsync=1.0,
+        eventos_checkpoint=20000,
+        intervalo_checkpoint=60.0,
+    ):
+        """
+        :param pasta: Pasta do diário; uma sessão nova continua a numeração.
+        :param desenho: ArmazemTracos no início da sessão (sem traço aberto).
+        :param tolerancia: Tolerância de simplificação do desenho, gravada
+            para que a reprodução guarde os mesmos pontos.
+        :param intervalo_lote: Idade máxima (s) de um lote antes de ir para
+            a thread de gravação.
+        :param eventos_lote: Eventos que fazem o lote ir antes disso.
+        :param intervalo_fsync: Intervalo (s) entre fsyncs do segmento.
+        :param eventos_checkpoint: Eventos por segmento que pedem checkpoint.
+        :param intervalo_checkpoint: Tempo (s) por segmento que pede checkpoint.
+        """
+        os.makedirs(pasta, exist_ok=True)
+        self.pasta = pasta
+        self.desenho = desenho
+        self.tolerancia = tolerancia
+        self.intervalo_lote = intervalo_lote
+        self.eventos_lote = eventos_lote
+        self.intervalo_fsync = intervalo_fsync
+        self.eventos_checkpoint = eventos_checkpoint
+        self.intervalo_checkpoint = intervalo_checkpoint
+        self.inicio_sessao = time.time()
+        self._inicio = time.perf_counter()
+
+        # Estado do loop de quadros
+        self._lote = bytearray()
+        self._n_lote = 0
+        self._momento_lote = 0.0
+        self._cor = None
+        self._espessura = None
+        self._aberto = False
+        self._limpo = False
+        self._eventos_segmento = 0
+        self._momento_checkpoint = self._inicio
+        self.eventos = 0
+
+        # Estado da thread de gravação
+        self._condicao = threading.Condition()
+        self._fila = collections.deque()
+        self._fechado = False
+        indices = _indices(pasta, PREFIXO_SEGMENTO, EXTENSAO_SEGMENTO)
+        indices += _indices(pasta, PREFIXO_CHECKPOINT, formato_desenho.EXTENSAO)
+        self._segmento = max(indices, default=-1)
+        self._arquivo = None
+        # Checkpoints periódicos ainda no disco, de sessões anteriores
+        # inclusive: saem quando o próximo periódico for gravado
+        self._periodicos = _checkpoints_periodicos(pasta)
+        self.erro = None
+        self._thread = threading.Thread(target=self._gravar, daemon=True)
+        self._thread.start()
+
+        # A sessão começa do desenho atual
+        self._checkpoint(SUBSTITUI)
+
+    def ponto(self, x, y, cor, espessura):
+        """Ponto recebido por ArmazemTracos.adicionar_ponto"""
+        if cor != self._cor:
+            self._cor = cor
+            self._registrar(COR, *cor)
+        if espessura != self._espessura:
+            self._espessura = espessura
+            self._registrar(ESPESSURA, espessura)
+        self._registrar(PONTO, x, y)
+        self._aberto = True
+        self._limpo = False
+
+    def levantar(self):
+        """Caneta levantada (finalizar_traco); sem traço aberto não grava nada"""
+        if not self._aberto:
+            return
+        self._aberto = False
+        self._registrar(LEVANTAR)
+        # Sem traço aberto o armazém cabe inteiro num checkpoint
+        if self._eventos_segmento >= self.eventos_checkpoint or (
+            time.perf_counter() - self._momento_checkpoint >= self.intervalo_checkpoint
+        ):
+            self._checkpoint(0)
+
+    def fixar(self):
+        """Cauda da simplificação guardada (fixar_cauda)"""
+        if self._aberto:
+            self._registrar(FIXAR)
+
+    def desfazer(self):
+        self._aberto = False
+        self._registrar(DESFAZER)
+
+    def limpar(self):
+        if self._limpo:
+            return
+        self._aberto = False
+        self._limpo = True
+        self._registrar(LIMPAR)
+
+    def substituir(self, desenho):
+        """O desenho foi trocado (por exemplo, carregado de um arquivo)"""
+        self.desenho = desenho
+        self._aberto = False
+        self._limpo = False
+        self._checkpoint(SUBSTITUI)
+
+    def atualizar(self):
+        """Chamado a cada quadro: envia o lote que já esperou demais"""
+        if self._n_lote and (
+            time.perf_counter() - self._momento_lote >= self.intervalo_lote
+        ):
+            self._enviar_lote()
+
+    def fechar(self):
+        """Grava o que falta e encerra a thread de gravação"""
+        self._enviar_lote()
+        with self._condicao:
+            self._fechado = True
+            self._condicao.notify()
+        self._thread.join()
+
+    def _registrar(self, tipo, a=0, b=0, c=0):
+        agora = time.perf_counter()
+        if not self._n_lote:
+            self._momento_lote = agora
+        self._lote += EVENTO.pack(
+            int((agora - self._inicio) * 1000), tipo, int(a), int(b), int(c)
+        )
+        self._n_lote += 1
+        self._eventos_segmento += 1
+        self.eventos += 1
+        if self._n_lote >= self.eventos_lote:
+            self._enviar_lote()
+
+    def _enviar_lote(self):
+        if not self._n_lote:
+            return
+        lote, self._lote, self._n_lote = self._lote, bytearray(), 0
+        self._enfileirar(("lote", lote))
+
+    def _checkpoint(self, flags):
+        self._enviar_lote()
+        momento = int((time.perf_counter() - self._inicio) * 1000)
+        # Cópia no loop de quadros (uma cópia de memória); a gravação é na
+        # thread. Cor e espessura são repetidas no segmento novo
+        self._enfileirar(("checkpoint", self.desenho.copia(), flags, momento))
+        self._cor = None
+        self._espessura = None
+        self._eventos_segmento = 0
+        self._momento_checkpoint = time.perf_counter()
+
+    def _enfileirar(self, item):
+        with self._condicao:
+            self._fila.append(item)
+            self._condicao.notify()
+
+    def _gravar(self):
+        ultimo_fsync = time.perf_counter()
+        pendente = False
+        while True:
+            with self._condicao:
+                if pendente:
+                    espera = self.intervalo_fsync - (time.perf_counter() - ultimo_fsync)
+                    self._condicao.wait_for(
+                        lambda: self._fila or self._fechado, max(espera, 0)
+                    )
+                else:
+                    self._condicao.wait_for(lambda: self._fila or self._fechado)
+                item = self._fila.popleft() if self._fila else None
+                fechado = self._fechado
+
+            try:
+                if item is not None and item[0] == "lote":
+                    if self._arquivo is None:
+                        # O primeiro segmento não pôde ser criado (erro já
+                        # informado); os eventos se perdem
+                        continue
+                    lote = item[1]
+                    self._arquivo.write(LOTE.pack(len(lote), zlib.crc32(lote)))
+                    self._arquivo.write(lote)
+                    pendente = True
+                elif item is not None:
+                    self._novo_segmento(*item[1:])
+                    pendente = False
+                    ultimo_fsync = time.perf_counter()
+                if pendente and (
+                    item is None
+                    or time.perf_counter() - ultimo_fsync >= self.intervalo_fsync
+                ):
+                    _sincronizar(self._arquivo)
+                    pendente = False
+                    ultimo_fsync = time.perf_counter()
+            except (OSError, ValueError) as e:
+                self.erro = e
+                print(f"Erro no diário de traços: {e}")
+
+            if item is None and fechado:
+                break
+        if self._arquivo is not None:
+            self._arquivo.close()
+
+    def _novo_segmento(self, desenho, flags, momento):
+        """Grava o checkpoint e troca de segmento (na thread de gravação)"""
+        if self._arquivo is not None:
+            _sincronizar(self._arquivo)
+        indice = self._segmento + 1
+        # Se o checkpoint falhar, os eventos continuam no segmento atual
+        formato_desenho.salvar(desenho, _caminho_checkpoint(self.pasta, indice))
+        arquivo = open(_caminho_segmento(self.pasta, indice), "wb")
+        arquivo.write(
+            CABECALHO.pack(
+                MAGICO, VERSAO, flags, self.inicio_sessao, momento, self.tolerancia
+            )
+        )
+        _sincronizar(arquivo)
+        _sincronizar_pasta(self.pasta)
+        if self._arquivo is not None:
+            self._arquivo.close()
+        self._arquivo = arquivo
+        self._segmento = indice
+
+        # Checkpoints periódicos saem dos eventos anteriores: só o último é
+        # guardado. Os de começo de sessão ou desenho carregado ficam, porque
+        # a reprodução precisa deles
+        if not flags & SUBSTITUI:
+            while self._periodicos:
+                os.remove(_caminho_checkpoint(self.pasta, self._periodicos.pop()))
+            self._periodicos.append(indice)
+
+
+class DiarioNulo:
+    """Diário desligado: as mesmas chamadas, sem efeito"""
+
+    def ponto(self, x, y, cor, espessura):
+        pass
+
+    def levantar(self):
+        pass
+
+    def fixar(self):
+        pass
+
+    def desfazer(self):
+        pass
+
+    def limpar(self):
+        pass
+
+    def substituir(self, desenho):
+        pass
+
+    def atualizar(self):
+        pass
+
+    def fechar(self):
+        pass
+
+
+class ReconstrutorTracos:
+    """Aplica eventos do diário a um ArmazemTracos, como a lousa os gerou"""
+
+    def __init__(self, desenho=None):
+        self.desenho = desenho if desenho is not None else ArmazemTracos()
+        self.cor = None
+        self.espessura = None
+
+    def aplicar(self, tipo, a=0, b=0, c=0):
+        """
+        Aplica um evento. Retorna True quando traços foram removidos ou o
+        desenho foi trocado, casos em que a camada raster precisa ser refeita.
+        """
+        if tipo == PONTO:
+            self.desenho.adicionar_ponto(a, b, self.cor, self.espessura)
+        elif tipo == LEVANTAR:
+            self.desenho.finalizar_traco()
+        elif tipo == FIXAR:
+            self.desenho.fixar_cauda()
+        elif tipo == DESFAZER:
+            self.desenho.desfazer()
+            return True
+        elif tipo == LIMPAR:
+            self.desenho.limpar()
+            return True
+        elif tipo == COR:
+            self.cor = (a, b, c)
+        elif tipo == ESPESSURA:
+            self.espessura = a
+        elif tipo == SUBSTITUIR:
+            self.desenho = a
+            return True
+        return False
+
+
+def ler_segmento(caminho):
+    """
+    Lê um segmento. Retorna (flags, início da sessão, momento do início em
+    ms, tolerância, eventos), com os eventos como tuplas (ms, tipo, a, b, c).
+    """
+    with open(caminho, "rb") as f:
+        dados = f.read()
+    if len(dados) < CABECALHO.size:
+        raise ValueError(f"{caminho}: segmento truncado")
+    magico, versao, flags, inicio, momento, tolerancia = CABECALHO.unpack_from(dados)
+    if magico != MAGICO:
+        raise ValueError(f"{caminho}: não é um diário da lousa")
+    if versao != VERSAO:
+        raise ValueError(f"{caminho}: versão {versao} não suportada")
+
+    lotes = []
+    posicao = CABECALHO.size
+    while posicao + LOTE.size <= len(dados):
+        tamanho, crc = LOTE.unpack_from(dados, posicao)
+        lote = dados[posicao + LOTE.size : posicao + LOTE.size + tamanho]
+        if len(lote) < tamanho or tamanho % EVENTO.size or zlib.crc32(lote) != crc:
+            # Lote gravado pela metade: o resto do segmento não é confiável
+            break
+        lotes.append(lote)
+        posicao += LOTE.size + tamanho
+    eventos = np.frombuffer(b"".join(lotes), TIPO_EVENTO).tolist()
+    return flags, inicio, momento, tolerancia, eventos
+
+
+def eventos_diario(pasta, desde=0, inicial=None):
+    """
+    Eventos (momento, tipo, a, b, c) dos segmentos de índice >= ``desde``,
+    com o momento em segundos (time.time()). Um segmento que começa de um
+    desenho novo produz antes um evento SUBSTITUIR com o ArmazemTracos do
+    checkpoint em ``a``.
+
+    :param inicial: ArmazemTracos já lido do checkpoint de ``desde``; o
+        primeiro segmento começa com um SUBSTITUIR dele (com a tolerância do
+        segmento), sem ler o checkpoint de novo.
+    """
+    for indice in _indices(pasta, PREFIXO_SEGMENTO, EXTENSAO_SEGMENTO):
+        if indice < desde:
+            continue
+        flags, inicio, momento, tolerancia, eventos = ler_segmento(
+            _caminho_segmento(pasta, indice)
+        )
+        desenho = None
+        if indice == desde and inicial is not None:
+            desenho = inicial
+        elif flags & SUBSTITUI:
+            desenho = formato_desenho.carregar(_caminho_checkpoint(pasta, indice))
+        if desenho is not None:
+            desenho.tolerancia = tolerancia
+            yield inicio + momento / 1000, SUBSTITUIR, desenho, 0, 0
+        for ms, tipo, a, b, c in eventos:
+            yield inicio + ms / 1000, tipo, a, b, c
+
+
+def recuperar(pasta):
+    """
+    Reconstrói o desenho do diário em ``pasta``: o último checkpoint mais os
+    eventos gravados depois dele. Retorna (ArmazemTracos, cor, espessura),
+    com a cor e a espessura do último ponto (None se não houver), ou None
+    se a pasta não tem diário.
+    """
+    if not os.path.isdir(pasta):
+        return None
+    checkpoints = _indices(pasta, PREFIXO_CHECKPOINT, formato_desenho.EXTENSAO)
+    if not checkpoints:
+        return None
+
+    inicio = checkpoints[-1]
+    desenho = formato_desenho.carregar(_caminho_checkpoint(pasta, inicio))
+    reconstrutor = ReconstrutorTracos(desenho)
+    for _, *evento in eventos_diario(pasta, inicio, desenho):
+        reconstrutor.aplicar(*evento)
+    # Um traço interrompido pela queda termina aqui
+    reconstrutor.desenho.finalizar_traco()
+    return reconstrutor.desenho, reconstrutor.cor, reconstrutor.espessura
+
+
+class ReprodutorDiario:
+    """
+    Reproduz um diário no ritmo em que foi gravado (ou ``velocidade`` vezes
+    mais rápido), avançado pelo loop de quadros com ``avancar(dt)``. Pausas
+    maiores que ``pausa_maxima`` segundos (de diário) são encurtadas.
+    """
+
+    def __init__(self, pasta, velocidade=1.0, pausa_maxima=2.0):
+        if velocidade <= 0:
+            raise ValueError("velocidade deve ser positiva")
+        self.velocidade = velocidade
+        self.pausa_maxima = pausa_maxima
+        self.reconstrutor = ReconstrutorTracos()
+        self._eventos = eventos_diario(pasta)
+        self._proximo = next(self._eventos, None)
+        self.posicao = self._proximo[0] if self._proximo is not None else 0.0
+
+    @property
+    def desenho(self):
+        return self.reconstrutor.desenho
+
+    @property
+    def terminou(self):
+        return self._proximo is None
+
+    def avancar(self, dt):
+        """
+        Avança ``dt`` segundos reais e aplica os eventos até a nova posição.
+        Retorna True se a camada raster precisa ser refeita.
+        """
+        if self._proximo is None:
+            return False
+        if self._proximo[0] - self.posicao > self.pausa_maxima:
+            self.posicao = self._proximo[0] - self.pausa_maxima
+        self.posicao += dt * self.velocidade
+
+        redesenhar = False
+        while self._proximo is not None and self._proximo[0] <= self.posicao:
+            redesenhar |= self.reconstrutor.aplicar(*self._proximo[1:])
+            self._proximo = next(self._eventos, None)
+        return redesenhar
+
+
+def _indices(pasta, prefixo, extensao):
+    """Índices dos arquivos ``prefixo`` + número + ``extensao``, em ordem"""
+    indices = []
+    for arquivo in os.listdir(pasta):
+        numero = arquivo[len(prefixo) : -len(extensao)]
+        if arquivo.startswith(prefixo) and arquivo.endswith(extensao):
+            if numero.isdigit():
+                indices.append(int(numero))
+    return sorted(indices)
+
+
+def _checkpoints_periodicos(pasta):
+    """
+    Índices dos checkpoints cujo segmento não começa de um desenho novo. Só o
+    cabeçalho do segmento é lido; um checkpoint sem segmento legível fica.
+    """
+    periodicos = []
+    for indice in _indices(pasta, PREFIXO_CHECKPOINT, formato_desenho.EXTENSAO):
+        try:
+            with open(_caminho_segmento(pasta, indice), "rb") as f:
+                cabecalho = f.read(CABECALHO.size)
+            magico, _, flags, *_ = CABECALHO.unpack(cabecalho)
+        except (OSError, struct.error):
+            continue
+        if magico == MAGICO and not flags & SUBSTITUI:
+            periodicos.append(indice)
+    return periodicos
+
+
+def _caminho_segmento(pasta, indice):
+    return os.path.join(pasta, f"{PREFIXO_SEGMENTO}{indice:06d}{EXTENSAO_SEGMENTO}")
+
+
+def _caminho_checkpoint(pasta, indice):
+    nome = f"{PREFIXO_CHECKPOINT}{indice:06d}{formato_desenho.EXTENSAO}"
+    return os.path.join(pasta, nome)
+
+
+def _sincronizar(arquivo):
+    arquivo.flush()
+    os.fsync(arquivo.fileno())
+
+
+def _sincronizar_pasta(pasta):
+    """fsync da pasta, para que os arquivos novos sobrevivam a uma queda"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    descritor = os.open(pasta, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(descritor)
+    finally:
+        os.close(descritor)
+
+
+def regiao_diario(pasta, margem=20):
+    """
+    Região [x1, y1, x2, y2) do mundo que contém todos os pontos do diário,
+    inclusive os de traços desfeitos ou apagados depois, e a tela da lousa
+    (como ``camada_desenho.regiao_desenho``).
+    """
+    regiao = regiao_desenho(ArmazemTracos(), margem)
+    raio = margem
+    for _, tipo, a, b, c in eventos_diario(pasta):
+        if tipo == PONTO:
+            regiao[0] = min(regiao[0], a - raio)
+            regiao[1] = min(regiao[1], b - raio)
+            regiao[2] = max(regiao[2], a + raio + 1)
+            regiao[3] = max(regiao[3], b + raio + 1)
+        elif tipo == ESPESSURA:
+            raio = a // 2 + margem
+        elif tipo == SUBSTITUIR:
+            x1, y1, x2, y2 = regiao_desenho(a, margem)
+            regiao = [
+                min(regiao[0], x1),
+                min(regiao[1], y1),
+                max(regiao[2], x2),
+                max(regiao[3], y2),
+            ]
+    return regiao
+
+
+def reproduzir(pasta, velocidade=1.0, pausa_maxima=2.0, largura=1280, altura=720):
+    """
+    Reproduz o diário numa janela do OpenCV (Esc sai). Os traços ficam numa
+    CamadaLadrilhos, no espaço do mundo, e a vista enquadra a região de todo
+    o diário, então o que foi desenhado fora da tela também aparece.
+    """
+    x1, y1, x2, y2 = regiao_diario(pasta)
+    vista = Vista()
+    zoom = min(largura / (x2 - x1), altura / (y2 - y1), 1.0)
+    vista.definir_zoom(zoom, 0, 0)
+    # Região centralizada na janela
+    vista.mover(
+        -(x1 - (largura / vista.zoom - (x2 - x1)) / 2) * vista.zoom,
+        -(y1 - (altura / vista.zoom - (y2 - y1)) / 2) * vista.zoom,
+    )
+
+    reprodutor = ReprodutorDiario(pasta, velocidade, pausa_maxima)
+    camada = CamadaLadrilhos()
+    fundo = np.full((altura, largura, 3), 255, np.uint8)
+    img = np.empty_like(fundo)
+    anterior = time.perf_counter()
+    while not reprodutor.terminou:
+        agora = time.perf_counter()
+        if reprodutor.avancar(agora - anterior):
+            camada.redesenhar(reprodutor.desenho)
+        anterior = agora
+        camada.atualizar(reprodutor.desenho)
+
+        img[:] = fundo
+        camada.compor(img, vista)
+        cauda = reprodutor.desenho.cauda()
+        if cauda is not None:
+            pontos, cor, espessura = cauda
+            desenhar_traco(
+                img,
+                vista.para_tela(pontos),
+                cor,
+                max(int(round(espessura * vista.zoom)), 1),
+            )
+        # Espelhado, como na lousa
+        cv2.imshow("Diario", cv2.flip(img, 1))
+        if cv2.waitKey(15) & 0xFF == 27:
+            break
+    camada.fechar()
+    cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reproduz um diário de traços")
+    parser.add_argument("pasta")
+    parser.add_argument("--velocidade", type=float, default=1.0)
+    parser.add_argument(
+        "--pausa-maxima",
+        type=float,
+        default=2.0,
+        help="pausas maiores (s) são encurtadas para esse tempo",
+    )
+    args = parser.parse_args()
+    reproduzir(args.pasta, args.velocidade, args.pausa_maxima)
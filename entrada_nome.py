@@ -0,0 +1,183 @@
+import cv2
+
+from sprite_interface import SpriteInterface, TextoCache
+
+# Linhas do teclado na tela; a última linha tem as teclas especiais
+LINHAS_TECLADO = ["1234567890", "QWERTYUIOP", "ASDFGHJKL", "ZXCVBNM"]
+TECLAS_ESPECIAIS = [("ESPACO", 3), ("<", 1.5), ("OK", 1.5), ("X", 1.5)]
+LADO_TECLA = 56
+ESPACO_TECLA = 8
+
+TECLA_ENTER = (10, 13)
+TECLA_APAGAR = (8, 127)
+TECLA_ESC = 27
+
+
+class EntradaNome:
+    """
+    Entrada do nome do jogador dentro do loop do OpenCV, sem bloquear a
+    captura: pelo teclado físico ou por um teclado na tela, em que o
+    indicador aponta uma tecla e levantar dois dedos a pressiona.
+
+    ``ao_confirmar(nome)`` é chamado quando o nome é confirmado (Enter ou
+    "OK"); Esc ou "X" cancelam.
+    """
+
+    def __init__(self, limite=20):
+        self.limite = limite
+        self.ativa = False
+        self.texto = ""
+        self.ao_confirmar = None
+        self.tecla_apontada = None
+        # Dois dedos continuam levantados depois de uma tecla: só a próxima
+        # vez que levantarem conta como outro toque
+        self.dois_dedos = False
+        self.teclas = []
+        self.painel = [0, 0, 0, 0]
+        self.sprite = SpriteInterface(self.desenhar_teclado)
+        self.texto_campo = None
+
+    def iniciar(self, ao_confirmar, largura, altura):
+        self.ativa = True
+        self.texto = ""
+        self.ao_confirmar = ao_confirmar
+        self.tecla_apontada = None
+        self.dois_dedos = False
+        self.montar_teclas(largura, altura)
+
+    def cancelar(self):
+        self.ativa = False
+        self.ao_confirmar = None
+
+    def confirmar(self):
+        nome = self.texto.strip() or "Jogador"
+        ao_confirmar = self.ao_confirmar
+        self.cancelar()
+        if ao_confirmar is not None:
+            ao_confirmar(nome)
+
+    def tecla(self, codigo):
+        """Trata um código de tecla do cv2.waitKey"""
+        if codigo in TECLA_ENTER:
+            self.confirmar()
+        elif codigo == TECLA_ESC:
+            self.cancelar()
+        elif codigo in TECLA_APAGAR:
+            self.texto = self.texto[:-1]
+        elif 32 <= codigo < 127 and codigo != ord(":") and codigo != ord(";"):
+            # ":" e ";" separam os campos do ranking.txt
+            if len(self.texto) < self.limite:
+                self.texto += chr(codigo)
+
+    def processar_dedo(self, x, y, dedos_levantados):
+        """
+        Atualiza a tecla apontada pelo indicador em (x, y) (coordenadas da
+        imagem espelhada) e a pressiona quando dois dedos são levantados.
+        """
+        self.tecla_apontada = None
+        for tecla in self.teclas:
+            x1, y1, x2, y2, _ = tecla
+            if x1 <= x < x2 and y1 <= y < y2:
+                self.tecla_apontada = tecla
+                break
+
+        if dedos_levantados == 2:
+            if not self.dois_dedos and self.tecla_apontada is not None:
+                self.pressionar(self.tecla_apontada[4])
+            self.dois_dedos = True
+        else:
+            self.dois_dedos = False
+
+    def pressionar(self, rotulo):
+        if rotulo == "OK":
+            self.confirmar()
+        elif rotulo == "X":
+            self.cancelar()
+        elif rotulo == "<":
+            self.tecla(TECLA_APAGAR[0])
+        elif rotulo == "ESPACO":
+            self.tecla(ord(" "))
+        else:
+            self.tecla(ord(rotulo))
+
+    def montar_teclas(self, largura, altura):
+        """Posições [x1, y1, x2, y2, rótulo] das teclas, centralizadas"""
+        passo = LADO_TECLA + ESPACO_TECLA
+        largura_teclado = max(len(linha) for linha in LINHAS_TECLADO) * passo
+        x0 = (largura - largura_teclado) // 2
+        y0 = altura // 2 - 2 * passo
+        self.teclas = []
+        for i, linha in enumerate(LINHAS_TECLADO):
+            # Linhas menores ficam centralizadas
+            x = x0 + (largura_teclado - len(linha) * passo) // 2
+            for caractere in linha:
+                self.teclas.append(
+                    [
+                        x,
+                        y0 + i * passo,
+                        x + LADO_TECLA,
+                        y0 + i * passo + LADO_TECLA,
+                        caractere,
+                    ]
+                )
+                x += passo
+
+        y = y0 + len(LINHAS_TECLADO) * passo
+        x = x0 + (largura_teclado - sum(l for _, l in TECLAS_ESPECIAIS) * passo) // 2
+        for rotulo, unidades in TECLAS_ESPECIAIS:
+            x2 = int(x + unidades * passo) - ESPACO_TECLA
+            self.teclas.append([int(x), y, x2, y + LADO_TECLA, rotulo])
+            x = x2 + ESPACO_TECLA
+
+        self.painel = [x0 - 20, y0 - 110, x0 + largura_teclado + 12, y + passo + 40]
+        self.texto_campo = TextoCache((x0 + 10, y0 - 30), 0.9, (255, 255, 255), 2)
+
+    def desenhar_teclado(self, img):
+        """Painel, campo e teclas (conteúdo do sprite)"""
+        px1, py1, px2, py2 = self.painel
+        cv2.rectangle(img, (px1, py1), (px2, py2), (40, 40, 40), cv2.FILLED)
+        cv2.rectangle(img, (px1, py1), (px2, py2), (255, 255, 255), 2)
+        cv2.putText(
+            img,
+            "Nome do jogador:",
+            (px1 + 20, py1 + 35),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.7,
+            (200, 200, 200),
+            2,
+        )
+        cv2.putText(
+            img,
+            "Aponte a tecla e levante 2 dedos. Enter confirma, Esc cancela.",
+            (px1 + 20, py2 - 15),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.5,
+            (200, 200, 200),
+            1,
+        )
+        for x1, y1, x2, y2, rotulo in self.teclas:
+            cv2.rectangle(img, (x1, y1), (x2, y2), (128, 128, 128), cv2.FILLED)
+            cv2.rectangle(img, (x1, y1), (x2, y2), (50, 50, 50), 2)
+            text_size = cv2.getTextSize(rotulo, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
+            text_x = x1 + (x2 - x1 - text_size[0]) // 2
+            text_y = y1 + (y2 - y1 + text_size[1]) // 2
+            cv2.putText(
+                img,
+                rotulo,
+                (text_x, text_y),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.6,
+                (255, 255, 255),
+                2,
+            )
+
+    def desenhar(self, img):
+        """Compõe o teclado, a tecla apontada e o texto digitado sobre ``img``"""
+        if not self.ativa:
+            return img
+        self.sprite.compor(img, tuple(self.painel))
+        if self.tecla_apontada is not None:
+            x1, y1, x2, y2, _ = self.tecla_apontada
+            cv2.rectangle(img, (x1 - 3, y1 - 3), (x2 + 3, y2 + 3), (0, 255, 0), 3)
+        self.texto_campo.compor(img, self.texto + "_")
+        return img
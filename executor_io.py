@@ -0,0 +1,101 @@
+import collections
+import threading
+
+
+class ExecutorIO:
+    """
+    Thread única para leitura e gravação de arquivos, fora do loop de quadros.
+
+    As tarefas esperam numa fila limitada (``maximo`` posições). Uma tarefa
+    com ``chave`` substitui a que ainda espera na fila com a mesma chave, em
+    vez de ocupar outra posição: uma sequência de cliques em "Salvar" grava
+    só o estado mais recente.
+
+    Os resultados não voltam pela thread de E/S: ``ao_concluir(resultado)`` e
+    ``ao_erro(excecao)`` são chamados por ``aplicar_concluidos()``, no loop
+    principal, que pode então alterar o estado da lousa sem travas.
+    """
+
+    def __init__(self, maximo=8):
+        self.maximo = maximo
+        self._condicao = threading.Condition()
+        # Tarefas [funcao, args, ao_concluir, ao_erro, chave] na ordem de envio
+        self._fila = collections.deque()
+        self._por_chave = {}
+        self._concluidas = collections.deque()
+        self._executando = 0
+        self._fechado = False
+        self._thread = threading.Thread(target=self._trabalhar, daemon=True)
+        self._thread.start()
+
+    def enviar(self, funcao, *args, chave=None, ao_concluir=None, ao_erro=None):
+        """
+        Agenda ``funcao(*args)``. Retorna False se a fila está cheia (ou o
+        executor foi fechado) e a tarefa foi recusada.
+        """
+        with self._condicao:
+            if self._fechado:
+                return False
+            if chave is not None and chave in self._por_chave:
+                self._por_chave[chave][:4] = [funcao, args, ao_concluir, ao_erro]
+                return True
+            if len(self._fila) >= self.maximo:
+                return False
+            tarefa = [funcao, args, ao_concluir, ao_erro, chave]
+            self._fila.append(tarefa)
+            if chave is not None:
+                self._por_chave[chave] = tarefa
+            self._condicao.notify()
+            return True
+
+    def pendentes(self):
+        """Tarefas na fila ou em execução"""
+        with self._condicao:
+            return len(self._fila) + self._executando
+
+    def aplicar_concluidos(self):
+        """Chama os retornos das tarefas já concluídas (no loop principal)"""
+        while self._concluidas:
+            ao_concluir, ao_erro, resultado, erro = self._concluidas.popleft()
+            if erro is not None:
+                if ao_erro is not None:
+                    ao_erro(erro)
+                else:
+                    print(f"Erro de E/S: {erro}")
+            elif ao_concluir is not None:
+                ao_concluir(resultado)
+
+    def fechar(self, esperar=True):
+        """
+        Encerra a thread. Com ``esperar`` as tarefas na fila são executadas e
+        os retornos aplicados antes; sem, são descartadas.
+        """
+        with self._condicao:
+            self._fechado = True
+            if not esperar:
+                self._fila.clear()
+                self._por_chave.clear()
+            self._condicao.notify_all()
+        self._thread.join()
+        if esperar:
+            self.aplicar_concluidos()
+
+    def _trabalhar(self):
+        while True:
+            with self._condicao:
+                self._condicao.wait_for(lambda: self._fila or self._fechado)
+                if not self._fila:
+                    return
+                funcao, args, ao_concluir, ao_erro, chave = self._fila.popleft()
+                if chave is not None:
+                    del self._por_chave[chave]
+                self._executando += 1
+
+            resultado = erro = None
+            try:
+                resultado = funcao(*args)
+            except Exception as e:
+                erro = e
+            self._concluidas.append((ao_concluir, ao_erro, resultado, erro))
+            with self._condicao:
+                self._executando -= 1
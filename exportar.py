@@ -0,0 +1,418 @@
+"""
+Exportação em lote dos desenhos salvos, sem abrir a lousa.
+
+Cada desenho_* (.lsd ou o JSON antigo) vira PNG, SVG (os traços como
+polilinhas vetoriais) e/ou um timelapse em vídeo (MP4 ou AVI) do desenho
+sendo traçado. As imagens são feitas pela mesma camada de traços da lousa
+(CamadaDesenho), espelhadas como aparecem na tela.
+
+Os arquivos são distribuídos num pool de processos. A memória de cada
+processo é limitada pelo tamanho máximo da imagem (``--lado-maximo``), pela
+reciclagem do processo a cada ``--tarefas-por-processo`` desenhos e,
+opcionalmente, por um teto rígido (``--memoria-maxima``, só em Unix):
+
+    python exportar.py desenhos/ --formatos png svg mp4 --saida exportados
+"""
+
+import argparse
+import itertools
+import math
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import cv2
+import numpy as np
+
+import formato_desenho
+from camada_desenho import CamadaDesenho, regiao_desenho
+from tracos import ArmazemTracos
+
+FORMATOS = ("png", "svg", "mp4", "avi")
+# Codec de cada formato de vídeo
+CODECS = {"mp4": "mp4v", "avi": "MJPG"}
+FUNDOS = {"branco": (255, 255, 255), "preto": (0, 0, 0)}
+
+
+def escala_regiao(regiao, escala=1.0, lado_maximo=4096):
+    """``escala`` reduzida o necessário para o maior lado caber em ``lado_maximo``"""
+    x1, y1, x2, y2 = regiao
+    return min(escala, lado_maximo / max(x2 - x1, y2 - y1))
+
+
+def transformar(desenho, regiao, escala=1.0, par=False):
+    """
+    Cópia do desenho em pixels da imagem exportada (origem no canto da
+    região, coordenadas e espessuras multiplicadas por ``escala``). Retorna
+    (ArmazemTracos, largura, altura); com ``par`` o tamanho é arredondado
+    para números pares, que os codecs de vídeo exigem.
+    """
+    x1, y1, x2, y2 = regiao
+    largura = max(math.ceil((x2 - x1) * escala), 1)
+    altura = max(math.ceil((y2 - y1) * escala), 1)
+    if par:
+        largura += largura % 2
+        altura += altura % 2
+
+    inicios, fins, cores, espessuras = desenho.tabela()
+    pontos = (desenho.pontos[: len(desenho)] - (x1, y1)) * escala
+    transformado = ArmazemTracos.de_arrays(
+        np.round(pontos).astype(np.int32),
+        inicios,
+        fins,
+        cores,
+        np.maximum(np.round(espessuras * escala), 1).astype(np.int32),
+    )
+    return transformado, largura, altura
+
+
+def renderizar(desenho, regiao, escala=1.0, fundo=FUNDOS["branco"], espelhar=True):
+    """Imagem BGR do desenho na região, sobre um fundo de cor sólida"""
+    transformado, largura, altura = transformar(desenho, regiao, escala)
+    camada = CamadaDesenho(largura, altura)
+    camada.redesenhar(transformado)
+    img = np.full((altura, largura, 3), fundo, np.uint8)
+    camada.compor(img)
+    return cv2.flip(img, 1) if espelhar else img
+
+
+def exportar_png(
+    desenho, caminho, regiao, escala=1.0, fundo=FUNDOS["branco"], espelhar=True
+):
+    img = renderizar(desenho, regiao, escala, fundo, espelhar)
+    ok, dados = cv2.imencode(".png", img)
+    if not ok:
+        raise RuntimeError(f"{caminho}: falha ao codificar o PNG")
+    temporario = f"{caminho}.tmp"
+    dados.tofile(temporario)
+    os.replace(temporario, caminho)
+
+
+def exportar_svg(
+    desenho, caminho, regiao, escala=1.0, fundo=FUNDOS["branco"], espelhar=True
+):
+    """
+    SVG com um <polyline> por traço (um <circle> nos traços de um ponto),
+    nas coordenadas do mundo: ``escala`` só muda o tamanho de exibição.
+    """
+    x1, y1, x2, y2 = regiao
+    largura, altura = x2 - x1, y2 - y1
+    # Espelhado em torno do centro da região, como na tela
+    transformacao = f' transform="matrix(-1 0 0 1 {x1 + x2} 0)"' if espelhar else ""
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(
+            '<svg xmlns="http://www.w3.org/2000/svg"'
+            f' width="{round(largura * escala)}" height="{round(altura * escala)}"'
+            f' viewBox="{x1} {y1} {largura} {altura}">\n'
+            f'<rect x="{x1}" y="{y1}" width="{largura}" height="{altura}"'
+            f' fill="{_cor_svg(fundo)}"/>\n'
+            f'<g fill="none" stroke-linecap="round" stroke-linejoin="round"'
+            f"{transformacao}>\n"
+        )
+        for pontos, cor, espessura in desenho:
+            if len(pontos) == 1:
+                x, y = pontos[0].tolist()
+                f.write(
+                    f'<circle cx="{x}" cy="{y}" r="{espessura // 2}"'
+                    f' fill="{_cor_svg(cor)}"/>\n'
+                )
+            else:
+                # A lista de pontos aceita vírgulas entre todos os números
+                coordenadas = ",".join(map(str, pontos.ravel().tolist()))
+                f.write(
+                    f'<polyline points="{coordenadas}" stroke="{_cor_svg(cor)}"'
+                    f' stroke-width="{espessura}"/>\n'
+                )
+        f.write("</g>\n</svg>\n")
+    os.replace(temporario, caminho)
+
+
+def exportar_timelapse(
+    desenho,
+    caminho,
+    regiao,
+    escala=1.0,
+    fundo=FUNDOS["branco"],
+    espelhar=True,
+    fps=30,
+    duracao=10.0,
+    espera_final=2.0,
+):
+    """
+    Vídeo do desenho sendo traçado em ``duracao`` segundos, com o desenho
+    pronto parado por mais ``espera_final`` segundos. Os arquivos salvos não
+    guardam o momento de cada ponto, então o ritmo é o de pontos por quadro
+    constante (para o ritmo real, ver ReprodutorDiario).
+
+    Cada quadro rasteriza só os pontos novos, com CamadaDesenho.atualizar,
+    como o loop da lousa.
+    """
+    raiz, extensao = os.path.splitext(caminho)
+    codec = CODECS[extensao[1:].lower()]
+    transformado, largura, altura = transformar(desenho, regiao, escala, par=True)
+    n_quadros = max(int(round(fps * duracao)), 1)
+    limites = [round(len(transformado) * (i + 1) / n_quadros) for i in range(n_quadros)]
+
+    # O container é escolhido pela extensão, que o temporário também precisa ter
+    temporario = f"{raiz}.tmp{extensao}"
+    escritor = cv2.VideoWriter(
+        temporario, cv2.VideoWriter_fourcc(*codec), fps, (largura, altura)
+    )
+    if not escritor.isOpened():
+        raise RuntimeError(f"{caminho}: codec {codec} indisponível no OpenCV")
+    try:
+        camada = CamadaDesenho(largura, altura)
+        fundo_quadro = np.full((altura, largura, 3), fundo, np.uint8)
+        img = np.empty_like(fundo_quadro)
+        espelhado = np.empty_like(fundo_quadro)
+        for parcial in _crescente(transformado, limites):
+            camada.atualizar(parcial)
+            np.copyto(img, fundo_quadro)
+            camada.compor(img)
+            escritor.write(cv2.flip(img, 1, dst=espelhado) if espelhar else img)
+        for _ in range(int(round(fps * espera_final))):
+            escritor.write(espelhado if espelhar else img)
+        escritor.release()
+        os.replace(temporario, caminho)
+    except BaseException:
+        escritor.release()
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def exportar_arquivo(
+    caminho,
+    pasta_saida,
+    formatos=("png",),
+    escala=1.0,
+    lado_maximo=4096,
+    fundo="branco",
+    espelhar=True,
+    fps=30,
+    duracao=10.0,
+    pular_existentes=False,
+):
+    """
+    Exporta um desenho em cada um dos ``formatos`` para ``pasta_saida``, com
+    o nome do arquivo de origem. Roda nos processos do pool; retorna um dict
+    com as saídas, os pontos, os bytes gravados e a duração.
+    """
+    inicio = time.perf_counter()
+    desenho = formato_desenho.carregar_arquivo(caminho)
+    regiao = regiao_desenho(desenho)
+    escala = escala_regiao(regiao, escala, lado_maximo)
+    cor_fundo = FUNDOS[fundo]
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+
+    saidas = []
+    for formato in formatos:
+        destino = os.path.join(pasta_saida, f"{nome}.{formato}")
+        if pular_existentes and os.path.exists(destino):
+            continue
+        if formato == "png":
+            exportar_png(desenho, destino, regiao, escala, cor_fundo, espelhar)
+        elif formato == "svg":
+            exportar_svg(desenho, destino, regiao, escala, cor_fundo, espelhar)
+        elif formato in CODECS:
+            exportar_timelapse(
+                desenho, destino, regiao, escala, cor_fundo, espelhar, fps, duracao
+            )
+        else:
+            raise ValueError(f"Formato desconhecido: {formato}")
+        saidas.append(destino)
+
+    return {
+        "arquivo": caminho,
+        "saidas": saidas,
+        "pontos": len(desenho),
+        "bytes": sum(os.path.getsize(saida) for saida in saidas),
+        "segundos": time.perf_counter() - inicio,
+    }
+
+
+def exportar_lote(
+    arquivos,
+    pasta_saida,
+    processos=None,
+    tarefas_por_processo=20,
+    memoria_maxima=None,
+    **opcoes,
+):
+    """
+    Exporta ``arquivos`` num pool de processos e gera o resultado de cada um
+    (ver ``exportar_arquivo``) à medida que terminam; um arquivo com erro
+    gera {"arquivo", "erro"} e os outros seguem.
+
+    Só dois arquivos por processo ficam na fila de cada vez, então a lista
+    pode ter milhares de desenhos sem acumular pedidos nem resultados.
+
+    :param tarefas_por_processo: Desenhos exportados por um processo antes de
+        ele ser substituído por um novo, devolvendo a memória ao sistema.
+    :param memoria_maxima: Limite (MB) de memória virtual de cada processo;
+        None não limita. Um desenho que passar do limite falha com
+        MemoryError sem derrubar o lote.
+    :param opcoes: Repassadas a ``exportar_arquivo``.
+    """
+    processos = processos or os.cpu_count() or 1
+    os.makedirs(pasta_saida, exist_ok=True)
+    arquivos = iter(arquivos)
+    pendentes = {}
+    with ProcessPoolExecutor(
+        processos,
+        mp_context=mp.get_context("spawn"),
+        initializer=_iniciar_processo,
+        initargs=(memoria_maxima,),
+        max_tasks_per_child=tarefas_por_processo,
+    ) as pool:
+        while True:
+            for caminho in itertools.islice(arquivos, 2 * processos - len(pendentes)):
+                futuro = pool.submit(exportar_arquivo, caminho, pasta_saida, **opcoes)
+                pendentes[futuro] = caminho
+            if not pendentes:
+                break
+            prontos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                caminho = pendentes.pop(futuro)
+                try:
+                    yield futuro.result()
+                except Exception as e:
+                    yield {"arquivo": caminho, "erro": f"{type(e).__name__}: {e}"}
+
+
+def listar_desenhos(entradas):
+    """Arquivos das ``entradas``, com as pastas trocadas pelos desenho_* delas"""
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            for nome in sorted(formato_desenho.arquivos_desenho(entrada)):
+                yield os.path.join(entrada, nome)
+        else:
+            yield entrada
+
+
+def _iniciar_processo(memoria_maxima):
+    # O paralelismo é entre processos: o OpenCV não abre threads próprias
+    cv2.setNumThreads(1)
+    if memoria_maxima is not None:
+        import resource
+
+        limite = memoria_maxima * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limite, limite))
+
+
+def _crescente(desenho, limites):
+    """
+    Gera o desenho crescendo até cada número de pontos de ``limites``, num
+    ArmazemTracos só, reaproveitado. O pedaço de um traço cortado por um
+    limite continua como um traço novo a partir do último ponto desenhado,
+    o que rasteriza a mesma linha.
+    """
+    crescente = ArmazemTracos(max(len(desenho), 16))
+    inicios = desenho.tabela()[0].tolist()
+    i = 0
+    feitos = 0
+    for limite in limites:
+        while i < desenho.n_tracos and inicios[i] + feitos < limite:
+            pontos, cor, espessura = desenho.traco(i)
+            fim = min(len(pontos), limite - inicios[i])
+            crescente.adicionar_traco(pontos[max(feitos - 1, 0) : fim], cor, espessura)
+            if fim < len(pontos):
+                feitos = fim
+                break
+            i += 1
+            feitos = 0
+        yield crescente
+
+
+def _cor_svg(cor):
+    b, g, r = cor
+    return f"rgb({r},{g},{b})"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Exporta desenhos salvos para PNG, SVG e timelapse em vídeo"
+    )
+    parser.add_argument("entradas", nargs="+", help="arquivos desenho_* ou pastas")
+    parser.add_argument("--saida", default="exportados", help="pasta de saída")
+    parser.add_argument(
+        "--formatos", nargs="+", choices=FORMATOS, default=["png"], metavar="FORMATO"
+    )
+    parser.add_argument("--processos", type=int, default=None)
+    parser.add_argument("--tarefas-por-processo", type=int, default=20)
+    parser.add_argument(
+        "--memoria-maxima",
+        type=int,
+        default=None,
+        help="limite de memória (MB) de cada processo (só em Unix)",
+    )
+    parser.add_argument("--escala", type=float, default=1.0)
+    parser.add_argument(
+        "--lado-maximo",
+        type=int,
+        default=4096,
+        help="maior lado (pixels) das imagens e vídeos; a escala é reduzida",
+    )
+    parser.add_argument("--fundo", choices=list(FUNDOS), default="branco")
+    parser.add_argument(
+        "--sem-espelhar",
+        action="store_true",
+        help="não espelha as imagens (a lousa mostra o desenho espelhado)",
+    )
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument(
+        "--duracao", type=float, default=10.0, help="duração (s) dos timelapses"
+    )
+    parser.add_argument(
+        "--pular-existentes",
+        action="store_true",
+        help="não refaz as saídas que já existem",
+    )
+    args = parser.parse_args()
+    if args.memoria_maxima is not None and os.name != "posix":
+        parser.error("--memoria-maxima só é suportado em Unix")
+
+    arquivos = list(listar_desenhos(args.entradas))
+    print(f"{len(arquivos)} desenho(s) -> {args.saida}")
+    inicio = time.perf_counter()
+    n_ok = n_erros = pontos = n_bytes = 0
+    for resultado in exportar_lote(
+        arquivos,
+        args.saida,
+        processos=args.processos,
+        tarefas_por_processo=args.tarefas_por_processo,
+        memoria_maxima=args.memoria_maxima,
+        formatos=args.formatos,
+        escala=args.escala,
+        lado_maximo=args.lado_maximo,
+        fundo=args.fundo,
+        espelhar=not args.sem_espelhar,
+        fps=args.fps,
+        duracao=args.duracao,
+        pular_existentes=args.pular_existentes,
+    ):
+        if "erro" in resultado:
+            n_erros += 1
+            print(f"ERRO {resultado['arquivo']}: {resultado['erro']}")
+            continue
+        n_ok += 1
+        pontos += resultado["pontos"]
+        n_bytes += resultado["bytes"]
+        print(
+            f"{resultado['arquivo']}: {len(resultado['saidas'])} saída(s),"
+            f" {resultado['pontos']} pontos, {resultado['segundos']:.2f}s"
+        )
+
+    tempo = time.perf_counter() - inicio
+    print(
+        f"\n{n_ok} desenho(s) em {tempo:.1f}s"
+        f" ({n_ok / tempo:.2f} desenhos/s, {pontos / tempo / 1000:.0f} mil pontos/s,"
+        f" {n_bytes / 1e6:.1f} MB gravados), {n_erros} erro(s)"
+    )
+    return 1 if n_erros else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,160 @@
+import json
+import time
+
+import cv2
+import numpy as np
+
+from pipeline import Quadro
+
+
+class FonteCamera:
+    """Quadros ao vivo da webcam"""
+
+    fornece_maos = False
+
+    def __init__(self, indice=0, largura=1280, altura=720):
+        self.video = cv2.VideoCapture(indice)
+        self.video.set(3, largura)
+        self.video.set(4, altura)
+
+    def ler(self):
+        check, img = self.video.read()
+        if not check:
+            return None
+        return Quadro(img, time.perf_counter())
+
+    def liberar(self):
+        self.video.release()
+
+
+class FonteVideo:
+    """
+    Quadros de um arquivo de vídeo. O momento de cada quadro vem do índice e do
+    FPS do arquivo (não do relógio), então repetir o mesmo vídeo dá o mesmo
+    resultado, mesmo rodando mais rápido que o tempo real.
+    """
+
+    fornece_maos = False
+
+    def __init__(self, caminho):
+        self.video = cv2.VideoCapture(caminho)
+        if not self.video.isOpened():
+            raise FileNotFoundError(f"Não foi possível abrir o vídeo {caminho}")
+        self.fps = self.video.get(cv2.CAP_PROP_FPS) or 30.0
+        self.indice = 0
+
+    def ler(self):
+        check, img = self.video.read()
+        if not check:
+            return None
+        quadro = Quadro(img, time.perf_counter(), momento=self.indice / self.fps)
+        self.indice += 1
+        return quadro
+
+    def liberar(self):
+        self.video.release()
+
+
+class FonteRegistroLandmarks:
+    """
+    Reproduz um registro JSONL de landmarks (gravado com GravadorLandmarks).
+
+    Cada linha tem o momento ``t`` do quadro e as mãos detectadas, com
+    ``lmList``, ``type`` e os dedos levantados (``dedos``). Os quadros são
+    imagens pretas do tamanho gravado; o detector de mãos não é usado.
+    """
+
+    fornece_maos = True
+
+    def __init__(self, caminho, largura=1280, altura=720):
+        self.arquivo = open(caminho, "r")
+        self.largura = largura
+        self.altura = altura
+
+    def ler(self):
+        for linha in self.arquivo:
+            if not linha.strip():
+                continue
+            registro = json.loads(linha)
+            largura = registro.get("largura", self.largura)
+            altura = registro.get("altura", self.altura)
+            quadro = Quadro(
+                np.zeros((altura, largura, 3), np.uint8),
+                time.perf_counter(),
+                momento=registro["t"],
+            )
+            for mao in registro["maos"]:
+                quadro.dedos.append(mao.pop("dedos"))
+                quadro.maos.append(mao)
+            return quadro
+        return None
+
+    def liberar(self):
+        self.arquivo.close()
+
+
+class GravadorLandmarks:
+    """Grava, quadro a quadro, as mãos detectadas no formato de FonteRegistroLandmarks"""
+
+    def __init__(self, caminho):
+        self.arquivo = open(caminho, "w")
+
+    def gravar(self, quadro):
+        altura, largura = quadro.img.shape[:2]
+        maos = []
+        for mao, dedos in zip(quadro.maos, quadro.dedos):
+            maos.append(
+                {
+                    "lmList": [list(ponto) for ponto in mao["lmList"]],
+                    "bbox": list(mao.get("bbox", ())),
+                    "center": list(mao.get("center", ())),
+                    "type": mao.get("type"),
+                    "dedos": list(dedos),
+                }
+            )
+        registro = {"t": quadro.momento, "largura": largura, "altura": altura}
+        registro["maos"] = maos
+        self.arquivo.write(json.dumps(registro) + "\n")
+
+    def fechar(self):
+        self.arquivo.close()
+
+
+class SaidaJanela:
+    """Exibe os quadros numa janela do OpenCV e lê o teclado"""
+
+    def __init__(self, nome="Lousa Digital"):
+        self.nome = nome
+
+    def mostrar(self, img):
+        cv2.imshow(self.nome, img)
+
+    def tecla(self):
+        return cv2.waitKey(1) & 0xFF
+
+    def fechar(self):
+        cv2.destroyAllWindows()
+
+
+class SaidaHeadless:
+    """
+    Saída sem janela: guarda uma cópia do último quadro, sem esperar pelo
+    teclado. A imagem recebida é um buffer do pool que a lousa reaproveita
+    no quadro seguinte, por isso é copiada para um array próprio
+    """
+
+    def __init__(self):
+        self.ultimo_quadro = None
+        self.quadros = 0
+
+    def mostrar(self, img):
+        if self.ultimo_quadro is None or self.ultimo_quadro.shape != img.shape:
+            self.ultimo_quadro = np.empty_like(img)
+        np.copyto(self.ultimo_quadro, img)
+        self.quadros += 1
+
+    def tecla(self):
+        return 0xFF
+
+    def fechar(self):
+        pass
@@ -0,0 +1,150 @@
+"""
+Formas alvo do jogo de similaridade.
+
+Cada forma é um contorno em coordenadas normalizadas ([0, 1] x [0, 1]),
+posicionado num quadrado de ``TAMANHO_FORMA`` pixels no centro do quadro.
+Para cada resolução de quadro a forma calcula, na primeira vez que é usada,
+o contorno em pixels e a transformada de distância até ele; depois disso a
+pontuação de um desenho é só uma consulta vetorizada nesse mapa.
+
+Formas extras podem ser carregadas de um arquivo JSON, no formato
+
+    {"casa": [[0, 1], [0, 0.4], [0.5, 0], [1, 0.4], [1, 1]], ...}
+
+com os vértices de cada polígono em qualquer escala (são normalizados).
+"""
+
+import json
+import math
+
+import cv2
+import numpy as np
+
+TAMANHO_FORMA = 300
+ESPESSURA_CONTORNO = 8
+COR_CONTORNO = (255, 255, 255)  # Branco
+
+
+class FormaAlvo:
+    def __init__(self, nome, pontos, fechada=True):
+        """
+        :param nome: Nome exibido da forma.
+        :param pontos: Vértices do contorno, normalizados em [0, 1] x [0, 1].
+        :param fechada: Se o último vértice se liga ao primeiro.
+        """
+        self.nome = nome
+        self.pontos = np.asarray(pontos, np.float64).reshape(-1, 2)
+        self.fechada = fechada
+        # (largura, altura) -> (contorno em pixels, limites, mapa de distância)
+        self._cache = {}
+
+    def preparar(self, largura, altura):
+        """
+        Contorno em pixels, limites [x1, y1, x2, y2] e mapa de distância
+        (float32, distância em pixels até o contorno) para a resolução dada.
+        Calculados uma vez por resolução.
+        """
+        chave = (largura, altura)
+        if chave not in self._cache:
+            x1 = largura // 2 - TAMANHO_FORMA // 2
+            y1 = altura // 2 - TAMANHO_FORMA // 2
+            contorno = np.round(self.pontos * TAMANHO_FORMA + (x1, y1)).astype(np.int32)
+            limites = [x1, y1, x1 + TAMANHO_FORMA, y1 + TAMANHO_FORMA]
+
+            linha = np.full((altura, largura), 255, np.uint8)
+            cv2.polylines(linha, [contorno], self.fechada, 0, 1)
+            mapa_distancia = cv2.distanceTransform(
+                linha, cv2.DIST_L2, cv2.DIST_MASK_PRECISE
+            )
+            mapa_distancia.setflags(write=False)
+            self._cache[chave] = (contorno, limites, mapa_distancia)
+        return self._cache[chave]
+
+    def amostras_contorno(self, largura, altura, passo=4.0):
+        """
+        Pontos (float64, (m, 2)) ao longo do contorno em pixels, espaçados de
+        ``passo`` pixels, e o espaçamento real entre eles.
+        """
+        contorno, _, _ = self.preparar(largura, altura)
+        vertices = contorno.astype(np.float64)
+        if self.fechada:
+            vertices = np.vstack([vertices, vertices[:1]])
+        deltas = np.diff(vertices, axis=0)
+        acumulado = np.concatenate(
+            [[0], np.cumsum(np.hypot(deltas[:, 0], deltas[:, 1]))]
+        )
+        perimetro = acumulado[-1]
+        n_amostras = max(int(np.ceil(perimetro / passo)), 1)
+        # Num contorno fechado o último ponto coincidiria com o primeiro
+        posicoes = np.linspace(0, perimetro, n_amostras, endpoint=not self.fechada)
+        amostras = np.stack(
+            [
+                np.interp(posicoes, acumulado, vertices[:, 0]),
+                np.interp(posicoes, acumulado, vertices[:, 1]),
+            ],
+            1,
+        )
+        return amostras, perimetro / n_amostras
+
+    def desenhar(self, img):
+        """
+        Desenha o contorno da forma no centro de ``img``. Retorna os limites
+        [x1, y1, x2, y2] do contorno.
+        """
+        altura, largura = img.shape[:2]
+        if largura < TAMANHO_FORMA or altura < TAMANHO_FORMA:
+            return [0, 0, 0, 0]
+        contorno, limites, _ = self.preparar(largura, altura)
+        cv2.polylines(img, [contorno], self.fechada, COR_CONTORNO, ESPESSURA_CONTORNO)
+        return limites
+
+    def distancias(self, pontos, largura, altura):
+        """Distância de cada ponto (array (n, 2)) até o contorno"""
+        _, _, mapa_distancia = self.preparar(largura, altura)
+        pontos = np.asarray(pontos)
+        xs = np.clip(np.rint(pontos[:, 0]).astype(np.intp), 0, largura - 1)
+        ys = np.clip(np.rint(pontos[:, 1]).astype(np.intp), 0, altura - 1)
+        return mapa_distancia[ys, xs]
+
+
+def poligono_regular(n_lados, rotacao=-math.pi / 2):
+    """Vértices de um polígono regular inscrito no quadrado unitário"""
+    angulos = rotacao + np.arange(n_lados) * 2 * math.pi / n_lados
+    return np.stack([0.5 + 0.5 * np.cos(angulos), 0.5 + 0.5 * np.sin(angulos)], 1)
+
+
+def estrela(n_pontas=5, razao_interna=0.4):
+    angulos = -math.pi / 2 + np.arange(2 * n_pontas) * math.pi / n_pontas
+    raios = np.where(np.arange(2 * n_pontas) % 2 == 0, 0.5, 0.5 * razao_interna)
+    return np.stack([0.5 + raios * np.cos(angulos), 0.5 + raios * np.sin(angulos)], 1)
+
+
+def formas_padrao():
+    """Quadrado (a forma original do jogo), círculo, triângulo e estrela"""
+    return [
+        FormaAlvo("quadrado", [(0, 0), (1, 0), (1, 1), (0, 1)]),
+        FormaAlvo("circulo", poligono_regular(96)),
+        FormaAlvo("triangulo", poligono_regular(3)),
+        FormaAlvo("estrela", estrela()),
+    ]
+
+
+def carregar_formas(caminho):
+    """Lê polígonos de um arquivo JSON {nome: [[x, y], ...]} (ver topo do módulo)"""
+    with open(caminho, "r") as f:
+        poligonos = json.load(f)
+
+    formas = []
+    for nome, pontos in poligonos.items():
+        pontos = np.asarray(pontos, np.float64).reshape(-1, 2)
+        if len(pontos) < 2:
+            raise ValueError(f"{caminho}: a forma '{nome}' precisa de 2 ou mais pontos")
+        # Encaixa no quadrado unitário mantendo a proporção, centralizado
+        minimo = pontos.min(axis=0)
+        extensao = (pontos.max(axis=0) - minimo).max()
+        if extensao == 0:
+            raise ValueError(f"{caminho}: a forma '{nome}' não tem tamanho")
+        pontos = (pontos - minimo) / extensao
+        pontos += (1 - pontos.max(axis=0)) / 2
+        formas.append(FormaAlvo(nome, pontos))
+    return formas
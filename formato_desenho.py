@@ -0,0 +1,163 @@
+"""
+Formato binário dos desenhos salvos (.lsd).
+
+    cabeçalho   "LSDG", versão (uint16), reservado (uint16),
+                número de pontos (uint32), número de traços (uint32)
+    pontos      n_pontos x (x, y) int16, little-endian
+    traços      n_tracos registros de 12 bytes: início (uint32), fim (uint32),
+                cor BGR (3 x uint8), espessura (uint8)
+
+O arquivo é gravado em blocos, direto do buffer do ArmazemTracos, e lido com
+``np.memmap``, sem criar objetos Python por ponto. Para converter os desenhos
+antigos em JSON:
+
+    python formato_desenho.py desenho_20240101_120000.json [...]
+"""
+
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+from tracos import ArmazemTracos
+
+MAGICO = b"LSDG"
+VERSAO = 1
+EXTENSAO = ".lsd"
+CABECALHO = struct.Struct("<4sHHII")
+TIPO_PONTO = np.dtype("<i2")
+TIPO_TRACO = np.dtype(
+    [("inicio", "<u4"), ("fim", "<u4"), ("cor", "u1", (3,)), ("espessura", "u1")]
+)
+# Pontos gravados por bloco
+TAMANHO_BLOCO = 65536
+
+
+def salvar(desenho, caminho):
+    """
+    Grava o ArmazemTracos ``desenho`` no formato binário. O arquivo é escrito
+    num temporário e renomeado no fim, então ``caminho`` nunca fica pela metade.
+    """
+    n_pontos = len(desenho)
+    inicios, fins, cores, espessuras = desenho.tabela()
+    pontos = desenho.pontos[:n_pontos]
+    limite = np.iinfo(TIPO_PONTO)
+    if n_pontos and (pontos.min() < limite.min or pontos.max() > limite.max):
+        raise ValueError("Coordenadas fora do intervalo suportado pelo formato")
+
+    tracos = np.empty(len(inicios), TIPO_TRACO)
+    tracos["inicio"] = inicios
+    tracos["fim"] = fins
+    tracos["cor"] = cores
+    tracos["espessura"] = espessuras
+
+    temporario = f"{caminho}.tmp"
+    try:
+        with open(temporario, "wb") as f:
+            f.write(CABECALHO.pack(MAGICO, VERSAO, 0, n_pontos, len(tracos)))
+            for inicio in range(0, n_pontos, TAMANHO_BLOCO):
+                bloco = pontos[inicio : inicio + TAMANHO_BLOCO]
+                f.write(bloco.astype(TIPO_PONTO).tobytes())
+            f.write(tracos.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def carregar(caminho):
+    """Lê um arquivo .lsd e retorna o ArmazemTracos"""
+    with open(caminho, "rb") as f:
+        cabecalho = f.read(CABECALHO.size)
+    if len(cabecalho) < CABECALHO.size:
+        raise ValueError(f"{caminho}: arquivo truncado")
+    magico, versao, _, n_pontos, n_tracos = CABECALHO.unpack(cabecalho)
+    if magico != MAGICO:
+        raise ValueError(f"{caminho}: não é um desenho da lousa")
+    if versao != VERSAO:
+        raise ValueError(f"{caminho}: versão {versao} não suportada")
+
+    if n_pontos == 0:
+        return ArmazemTracos()
+
+    pontos = np.memmap(
+        caminho, TIPO_PONTO, "r", offset=CABECALHO.size, shape=(n_pontos, 2)
+    )
+    tracos = np.memmap(
+        caminho,
+        TIPO_TRACO,
+        "r",
+        offset=CABECALHO.size + n_pontos * 2 * TIPO_PONTO.itemsize,
+        shape=(n_tracos,),
+    )
+    desenho = ArmazemTracos.de_arrays(
+        pontos,
+        tracos["inicio"],
+        tracos["fim"],
+        tracos["cor"],
+        tracos["espessura"],
+    )
+    # Libera o mapeamento (no Windows o arquivo fica travado enquanto existir)
+    del pontos, tracos
+    return desenho
+
+
+def carregar_json(caminho):
+    """Lê um desenho no formato antigo (um dict JSON por ponto)"""
+    with open(caminho, "r") as f:
+        desenho_carregado = json.load(f)
+    return ArmazemTracos.de_legado(
+        [
+            (ponto["x"], ponto["y"], tuple(ponto["cor"]), ponto["espessura"])
+            for ponto in desenho_carregado
+        ]
+    )
+
+
+def carregar_arquivo(caminho):
+    """Lê um desenho .lsd ou no JSON antigo, pela extensão"""
+    if caminho.endswith(".json"):
+        return carregar_json(caminho)
+    return carregar(caminho)
+
+
+def arquivos_desenho(pasta="."):
+    """Nomes dos desenho_* de ``pasta`` (.lsd e o JSON antigo)"""
+    return [
+        f
+        for f in os.listdir(pasta)
+        if f.startswith("desenho_") and f.endswith((EXTENSAO, ".json"))
+    ]
+
+
+def carregar_recente(pasta="."):
+    """
+    Lê o desenho_* mais recente de ``pasta`` (.lsd ou o JSON antigo).
+    Retorna (nome do arquivo, ArmazemTracos), ou None se não houver desenho.
+    """
+    arquivos = arquivos_desenho(pasta)
+    if not arquivos:
+        return None
+
+    arquivo_recente = max(arquivos, key=lambda f: (os.path.splitext(f)[0], f))
+    return arquivo_recente, carregar_arquivo(os.path.join(pasta, arquivo_recente))
+
+
+def converter_json(caminho):
+    """Converte um desenho_*.json antigo para .lsd; retorna o caminho novo"""
+    destino = caminho[: -len(".json")] + EXTENSAO
+    salvar(carregar_json(caminho), destino)
+    return destino
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(f"Uso: python {sys.argv[0]} desenho_*.json [...]")
+        sys.exit(1)
+    for arquivo in sys.argv[1:]:
+        print(f"{arquivo} -> {converter_json(arquivo)}")
@@ -0,0 +1,314 @@
+"""
+Medição de desempenho embutida na lousa.
+
+Cada etapa do loop (captura, detecção, gestos, jogo, renderização,
+interface, exibição) é medida com
+
+    with instrumentacao.etapa("renderizar"):
+        ...
+
+e as durações vão para uma janela deslizante por etapa, de onde saem
+FPS e percentis para o HUD e para a exportação (CSV, JSON ou o formato
+texto do Prometheus em http://127.0.0.1:<porta>/metrics).
+
+Com a instrumentação desligada ``etapa()`` devolve um contexto vazio
+compartilhado e ``fim_quadro()`` retorna na primeira linha: o custo é de
+algumas chamadas de método por quadro, e ela pode ficar ligada ao código
+em produção.
+"""
+
+import csv
+import io
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+# Etapas na ordem em que aparecem no HUD e na exportação
+ETAPAS = (
+    "captura",
+    "deteccao",
+    "gestos",
+    "jogo",
+    "renderizar",
+    "interface",
+    "exibicao",
+    "quadro",
+)
+PERCENTIS = (50, 90, 99)
+
+
+class _EtapaNula:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        return False
+
+
+_ETAPA_NULA = _EtapaNula()
+
+
+class _Etapa:
+    def __init__(self, janela):
+        self.janela = janela
+        self.inicio = 0.0
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excecao):
+        self.janela.adicionar((time.perf_counter() - self.inicio) * 1000)
+        return False
+
+
+class JanelaDeslizante:
+    """As últimas ``tamanho`` amostras (ms), num buffer circular NumPy"""
+
+    def __init__(self, tamanho):
+        self.amostras = np.zeros(tamanho, np.float64)
+        self.n = 0
+        self.total = 0
+        self.soma = 0.0
+
+    def adicionar(self, valor):
+        self.amostras[self.n % len(self.amostras)] = valor
+        self.n += 1
+        self.total += 1
+        self.soma += valor
+
+    def valores(self):
+        return self.amostras[: min(self.n, len(self.amostras))]
+
+    def percentis(self):
+        valores = self.valores()
+        if len(valores) == 0:
+            return [0.0] * len(PERCENTIS)
+        return np.percentile(valores, PERCENTIS).tolist()
+
+
+class Instrumentacao:
+    """
+    Janelas de duração por etapa, contadores e exportação periódica.
+
+    :param janela: Quadros guardados por etapa para os percentis.
+    :param arquivo: CSV ou JSON (pela extensão) reescrito a cada
+        ``intervalo_exportacao`` segundos; None não grava.
+    :param porta: Porta do endpoint Prometheus em 127.0.0.1; None não abre.
+    :param executor_io: ExecutorIO usado para gravar o arquivo fora do
+        loop; sem ele a gravação é feita direto.
+    """
+
+    def __init__(
+        self,
+        janela=300,
+        arquivo=None,
+        porta=None,
+        intervalo_exportacao=5.0,
+        executor_io=None,
+    ):
+        self.tamanho_janela = janela
+        self.arquivo = arquivo
+        self.intervalo_exportacao = intervalo_exportacao
+        self.executor_io = executor_io
+        self.mostrar_hud = False
+        self.exportando = arquivo is not None or porta is not None
+        self.janelas = {nome: JanelaDeslizante(janela) for nome in ETAPAS}
+        self._etapas = {nome: _Etapa(self.janelas[nome]) for nome in ETAPAS}
+        self.momentos_quadros = JanelaDeslizante(janela)
+        self.quadros = 0
+        self.descartados = 0
+        self._ultima_exportacao = time.perf_counter()
+        # Texto Prometheus publicado pelo loop e lido pelo servidor HTTP
+        self.texto_prometheus = ""
+        self.servidor = None
+        if porta is not None:
+            self.servidor = _iniciar_servidor(self, porta)
+
+    @property
+    def ativa(self):
+        return self.mostrar_hud or self.exportando
+
+    def alternar_hud(self):
+        self.mostrar_hud = not self.mostrar_hud
+        if not self.ativa:
+            # Ao religar, o primeiro intervalo não deve incluir a pausa
+            self.momentos_quadros = JanelaDeslizante(self.tamanho_janela)
+
+    def etapa(self, nome):
+        """Contexto que mede a duração da etapa ``nome`` (ver ETAPAS)"""
+        if not self.ativa:
+            return _ETAPA_NULA
+        return self._etapas[nome]
+
+    def fim_quadro(self, descartados=0):
+        """Conta o quadro exibido; ``descartados`` é o total do pipeline"""
+        if not self.ativa:
+            return
+        self.quadros += 1
+        self.descartados = descartados
+        agora = time.perf_counter()
+        # "quadro" é o intervalo entre dois quadros exibidos seguidos
+        if self.momentos_quadros.n:
+            anterior = self.momentos_quadros.amostras[
+                (self.momentos_quadros.n - 1) % self.tamanho_janela
+            ]
+            self.janelas["quadro"].adicionar((agora - anterior) * 1000)
+        self.momentos_quadros.adicionar(agora)
+        if self.exportando and agora - self._ultima_exportacao >= (
+            self.intervalo_exportacao
+        ):
+            self._ultima_exportacao = agora
+            self.exportar()
+
+    def fps(self):
+        momentos = self.momentos_quadros.valores()
+        if len(momentos) < 2:
+            return 0.0
+        intervalo = momentos.max() - momentos.min()
+        return (len(momentos) - 1) / intervalo if intervalo > 0 else 0.0
+
+    def resumo(self):
+        """Dict com FPS, contadores e percentis (ms) de cada etapa"""
+        etapas = {}
+        for nome, janela in self.janelas.items():
+            if janela.total == 0:
+                continue
+            p50, p90, p99 = janela.percentis()
+            etapas[nome] = {
+                "p50_ms": p50,
+                "p90_ms": p90,
+                "p99_ms": p99,
+                "media_ms": float(janela.valores().mean()),
+                "total": janela.total,
+                "soma_ms": janela.soma,
+            }
+        return {
+            "momento": time.time(),
+            "fps": self.fps(),
+            "quadros": self.quadros,
+            "descartados": self.descartados,
+            "etapas": etapas,
+        }
+
+    def linhas_hud(self):
+        resumo = self.resumo()
+        linhas = [
+            f"FPS {resumo['fps']:.1f}  quadros {resumo['quadros']}"
+            f"  descartados {resumo['descartados']}"
+        ]
+        for nome, etapa in resumo["etapas"].items():
+            linhas.append(
+                f"{nome:<10} p50 {etapa['p50_ms']:6.2f}  p99 {etapa['p99_ms']:6.2f} ms"
+            )
+        return linhas
+
+    def exportar(self):
+        """Grava o arquivo (se houver) e atualiza o texto do Prometheus"""
+        resumo = self.resumo()
+        if self.servidor is not None:
+            self.texto_prometheus = formatar_prometheus(resumo)
+        if self.arquivo is None:
+            return
+        if self.arquivo.endswith(".json"):
+            conteudo = json.dumps(resumo, indent=2)
+        else:
+            conteudo = formatar_csv(resumo)
+        if self.executor_io is not None:
+            self.executor_io.enviar(
+                _gravar_texto, self.arquivo, conteudo, chave="metricas"
+            )
+        else:
+            _gravar_texto(self.arquivo, conteudo)
+
+    def fechar(self):
+        if self.exportando:
+            self.exportar()
+        if self.servidor is not None:
+            self.servidor.shutdown()
+            self.servidor.server_close()
+            self.servidor = None
+
+
+def formatar_csv(resumo):
+    saida = io.StringIO()
+    escritor = csv.writer(saida)
+    escritor.writerow(
+        ["etapa", "p50_ms", "p90_ms", "p99_ms", "media_ms", "total", "soma_ms"]
+    )
+    for nome, etapa in resumo["etapas"].items():
+        escritor.writerow(
+            [nome]
+            + [
+                round(etapa[campo], 4)
+                for campo in ("p50_ms", "p90_ms", "p99_ms", "media_ms")
+            ]
+            + [etapa["total"], round(etapa["soma_ms"], 3)]
+        )
+    escritor.writerow(
+        ["fps", round(resumo["fps"], 2), "", "", "", resumo["quadros"], ""]
+    )
+    escritor.writerow(["descartados", "", "", "", "", resumo["descartados"], ""])
+    return saida.getvalue()
+
+
+def formatar_prometheus(resumo):
+    """Resumo no formato texto do Prometheus (summary por etapa)"""
+    linhas = [
+        "# HELP lousa_fps Quadros por segundo na janela recente",
+        "# TYPE lousa_fps gauge",
+        f"lousa_fps {resumo['fps']:.3f}",
+        "# HELP lousa_quadros_total Quadros exibidos",
+        "# TYPE lousa_quadros_total counter",
+        f"lousa_quadros_total {resumo['quadros']}",
+        "# HELP lousa_descartados_total Quadros descartados pelo pipeline",
+        "# TYPE lousa_descartados_total counter",
+        f"lousa_descartados_total {resumo['descartados']}",
+        "# HELP lousa_etapa_ms Duracao de cada etapa do loop (ms)",
+        "# TYPE lousa_etapa_ms summary",
+    ]
+    for nome, etapa in resumo["etapas"].items():
+        for percentil in PERCENTIS:
+            valor = etapa[f"p{percentil}_ms"]
+            linhas.append(
+                f'lousa_etapa_ms{{etapa="{nome}",quantile="{percentil / 100}"}}'
+                f" {valor:.4f}"
+            )
+        linhas.append(f'lousa_etapa_ms_sum{{etapa="{nome}"}} {etapa["soma_ms"]:.3f}')
+        linhas.append(f'lousa_etapa_ms_count{{etapa="{nome}"}} {etapa["total"]}')
+    return "\n".join(linhas) + "\n"
+
+
+def _gravar_texto(caminho, conteudo):
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", newline="") as f:
+        f.write(conteudo)
+    # Leitores do arquivo nunca veem uma exportação pela metade
+    os.replace(temporario, caminho)
+
+
+def _iniciar_servidor(instrumentacao, porta):
+    # Só importado quando o endpoint é pedido
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Manipulador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            corpo = instrumentacao.texto_prometheus.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), Manipulador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
@@ -1,128 +1,141 @@
-import cv2
 import numpy as np
-import tkinter as tk
-from collections import OrderedDict
-import numpy as np
-
-
-def desenhar_quadrado_contorno(img):
-    """
-    Desenha um CONTORNO de quadrado de 300x300 pixels no centro da imagem.
-    Retorna os limites da Bounding Box [x1, y1, x2, y2].
-    """
-    altura, largura, _ = img.shape
-    TAMANHO_QUADRADO = 300
-    ESPESSURA_CONTORNO = 8
-    COR_CONTORNO = (255, 255, 255)  # Branco
-
-    if largura < TAMANHO_QUADRADO or altura < TAMANHO_QUADRADO:
-        return [0, 0, 0, 0]
 
-    centro_x = largura // 2
-    centro_y = altura // 2
+from ranking import ArmazemRanking
 
-    x1 = centro_x - (TAMANHO_QUADRADO // 2)
-    y1 = centro_y - (TAMANHO_QUADRADO // 2)
-    x2 = centro_x + (TAMANHO_QUADRADO // 2)
-    y2 = centro_y + (TAMANHO_QUADRADO // 2)
+_ranking = None
 
-    cv2.rectangle(img, (x1, y1), (x2, y2), COR_CONTORNO, ESPESSURA_CONTORNO)
+# Versão da pontuação gravada no ranking: 1 = razão de interseção (máscara
+# do quadrado), 2 = combinação das métricas do AvaliadorForma. Pontuações de
+# outras versões ficam no arquivo, mas fora do ranking exibido
+VERSAO_METRICA = 2
+# Peso de cada métrica na pontuação combinada
+PESOS_METRICAS = {"precisao": 0.35, "cobertura": 0.35, "iou": 0.1, "hausdorff": 0.2}
 
-    return [x1, y1, x2, y2]
 
-
-def calcular_similaridade(mascara_alvo, mascara_desenho, limite_minimo=0.75):
+class AvaliadorForma:
     """
-    Calcula a similaridade usando a Máscara de Interseção (AND Bitwise).
-    Mede o quão bem o desenho do jogador coincide com o contorno da forma.
-
-    :param mascara_alvo: Máscara binária (255) do quadrado alvo.
-    :param mascara_desenho: Máscara binária (255) da linha desenhada pelo jogador.
-    :param limite_minimo: Hiperparâmetro que define o limite mínimo para se ganhar o jogo.
+    Métricas do desenho contra uma forma alvo, atualizadas só com os pontos
+    novos do desenho a cada quadro (barato o suficiente para exibir ao vivo):
+
+    - precisao: fração do desenho a até ``tolerancia`` do contorno;
+    - cobertura: fração do contorno a até ``tolerancia`` do desenho;
+    - iou: comprimento do contorno coberto sobre o comprimento da união
+      (contorno mais o desenho que ficou fora da faixa);
+    - hausdorff: distância de Hausdorff entre desenho e contorno, limitada a
+      ``limite_hausdorff``, como nota 1 - distância / limite.
+
+    O desenho é amostrado a cada ``passo`` pixels (ArmazemTracos.amostrar) e
+    o contorno a cada ~4 pixels; a distância desenho -> contorno vem do mapa
+    de distância da forma.
     """
 
-    if np.sum(mascara_desenho) == 0:
-        return 0.0, False
-
-    # Área de acerto = máscara de intersecção entre o desenho e a forma plotada
-    mascara_intersecao = cv2.bitwise_and(mascara_desenho, mascara_alvo)
-
-    pixels_intersecao = np.sum(mascara_intersecao) / 255
-
-    pixels_desenho_total = np.sum(mascara_desenho) / 255
-
-    if pixels_desenho_total == 0:
-        return 0.0, False
-
-    # Similaridade = razão entre os pixels da área de acerto e os pixels do desenho do jogador
-    similaridade = pixels_intersecao / pixels_desenho_total
-
-    atingiu_limite = similaridade >= limite_minimo
-
-    return similaridade, atingiu_limite
-
-
-def salvar_nome_jogador():
-    def submit():
-        nonlocal entered_text
-        entered_text = entry.get()
-        root.destroy()
-
-    entered_text = None
-    root = tk.Tk()
-    root.title("Salvar pontuação")
-
-    tk.Label(root, text="Insira o nome do jogador:").pack()
-    entry = tk.Entry(root, width=40)
-    entry.pack()
-    tk.Button(root, text="Salvar", command=submit).pack()
-
-    root.mainloop()
-    return entered_text
-
-
-def salvar_pontuacao(nome_jogador, pontuacao):
-    filename = "ranking.txt"
-    ranking = carrega_ranking()
-    if nome_jogador in ranking:
-        if pontuacao > ranking[nome_jogador]:
-            ranking[nome_jogador] = pontuacao
-    else:
-        ranking[nome_jogador] = pontuacao
-    ranking_ordenado = dict(
-        sorted(ranking.items(), key=lambda item: item[1], reverse=True)
-    )
-
-    try:
-        with open(filename, "w") as f:
-            for jogador, score in ranking_ordenado.items():
-                f.write(f"{jogador}:={score:.4f}\n")
-    except Exception as e:
-        print(f"Erro ao salvar a pontuação: {e}")
+    def __init__(
+        self,
+        forma,
+        largura,
+        altura,
+        tolerancia,
+        pesos=None,
+        limite_hausdorff=60.0,
+        passo=2.0,
+    ):
+        self.forma = forma
+        self.largura = largura
+        self.altura = altura
+        self.tolerancia = tolerancia
+        self.pesos = pesos if pesos is not None else PESOS_METRICAS
+        self.limite_hausdorff = limite_hausdorff
+        self.passo = passo
+        self.amostras_contorno, self.passo_contorno = forma.amostras_contorno(
+            largura, altura
+        )
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.n_processados = 0
+        self.n_amostras = 0
+        self.n_acertos = 0
+        # Maior distância desenho -> contorno (limitada)
+        self.distancia_desenho = 0.0
+        # Menor distância de cada amostra do contorno até o desenho (limitada)
+        self.distancias_contorno = np.full(
+            len(self.amostras_contorno), self.limite_hausdorff
+        )
+
+    def atualizar(self, desenho):
+        """Processa os pontos do ``desenho`` adicionados desde a última chamada"""
+        if len(desenho) < self.n_processados:
+            # Desenho desfeito ou limpo: recomeça do zero
+            self.reiniciar()
+        amostras = desenho.amostrar(self.passo, self.n_processados)
+        self.n_processados = len(desenho)
+        if len(amostras) == 0:
+            return
+
+        distancias = self.forma.distancias(amostras, self.largura, self.altura)
+        self.n_amostras += len(amostras)
+        self.n_acertos += int(np.count_nonzero(distancias <= self.tolerancia))
+        self.distancia_desenho = max(
+            self.distancia_desenho, min(float(distancias.max()), self.limite_hausdorff)
+        )
+
+        # Só amostras a menos do limite do contorno podem reduzir alguma
+        # distância contorno -> desenho abaixo do limite
+        proximas = amostras[distancias < self.limite_hausdorff]
+        for inicio in range(0, len(proximas), 1024):
+            bloco = proximas[inicio : inicio + 1024]
+            diferencas = self.amostras_contorno[:, None, :] - bloco[None, :, :]
+            menores = np.sqrt((diferencas**2).sum(axis=2).min(axis=1))
+            np.minimum(self.distancias_contorno, menores, out=self.distancias_contorno)
+
+    def metricas(self):
+        """Dict com precisao, cobertura, iou (0 a 1) e hausdorff (pixels)"""
+        if self.n_amostras == 0:
+            return {
+                "precisao": 0.0,
+                "cobertura": 0.0,
+                "iou": 0.0,
+                "hausdorff": self.limite_hausdorff,
+            }
+
+        cobertos = int(np.count_nonzero(self.distancias_contorno <= self.tolerancia))
+        comprimento_coberto = cobertos * self.passo_contorno
+        comprimento_contorno = len(self.amostras_contorno) * self.passo_contorno
+        comprimento_fora = (self.n_amostras - self.n_acertos) * self.passo
+        return {
+            "precisao": self.n_acertos / self.n_amostras,
+            "cobertura": cobertos / len(self.amostras_contorno),
+            "iou": float(
+                comprimento_coberto / (comprimento_contorno + comprimento_fora)
+            ),
+            "hausdorff": max(
+                self.distancia_desenho, float(self.distancias_contorno.max())
+            ),
+        }
+
+    def pontuacao(self, metricas=None):
+        """Pontuação combinada (0 a 1), com os pesos de ``self.pesos``"""
+        if metricas is None:
+            metricas = self.metricas()
+        notas = dict(metricas)
+        notas["hausdorff"] = 1 - metricas["hausdorff"] / self.limite_hausdorff
+        total = sum(self.pesos.values())
+        if total == 0:
+            return 0.0
+        return sum(peso * notas[nome] for nome, peso in self.pesos.items()) / total
+
+
+def ranking_padrao():
+    """Armazém do ranking.txt compartilhado pelo jogo (criado no primeiro uso)"""
+    global _ranking
+    if _ranking is None:
+        _ranking = ArmazemRanking("ranking.txt", metrica=VERSAO_METRICA)
+    return _ranking
+
+
+def salvar_pontuacao(nome_jogador, pontuacao, metrica=VERSAO_METRICA):
+    ranking_padrao().registrar(nome_jogador, pontuacao, metrica)
 
 
 def carrega_ranking():
-    filename = "ranking.txt"
-    ranking = {}
-    try:
-        with open(filename, "r") as f:
-            for line in f:
-                if ":=" in line:
-                    nome_jogador = line[: line.find(":=")].strip()
-                    pontuacao_str = line[line.find(":=") + 2 :].strip()
-
-                    try:
-                        pontuacao_float = float(pontuacao_str)
-                        ranking[nome_jogador] = pontuacao_float
-                    except ValueError:
-                        continue
-    except FileNotFoundError:
-        pass
-    except Exception as e:
-        print(f"Erro ao carregar o ranking: {e}")
-
-    ranking_ordenado = dict(
-        sorted(ranking.items(), key=lambda item: item[1], reverse=True)
-    )
-
-    return ranking_ordenado
+    return ranking_padrao().como_dict()
@@ -1,46 +1,177 @@
+import math
+
 import cv2
-from cvzone.HandTrackingModule import HandDetector
-import mediapipe as mp
 import numpy as np
-import json
-import os
-import time
+import formato_desenho
+from camada_desenho import CamadaLadrilhos, Vista, desenhar_traco
+from deteccao import CarregadorDetector, criar_detector_maos
+from diario_tracos import DiarioNulo, DiarioTracos, recuperar
+from deteccao_processo import DetectorProcesso
+from entrada_nome import EntradaNome
+from executor_io import ExecutorIO
+from formas import formas_padrao
+from fontes import FonteCamera, GravadorLandmarks, SaidaJanela
+from instrumentacao import Instrumentacao
+from sprite_interface import SpriteInterface, TextoCache
+from pipeline import PipelineCaptura, detectar_maos
+from pool_buffers import PoolBuffers
+from rastreamento import RastreadorMaos
+from servico_visao import AnalisadorMaos, AnalisadorPose, ServicoVisao, desenhar_pose
+from tracos import ArmazemTracos
 from jogo_similaridade import (
-    desenhar_quadrado_contorno,
-    calcular_similaridade,
-    salvar_nome_jogador,
+    AvaliadorForma,
     salvar_pontuacao,
-    carrega_ranking,
+    ranking_padrao,
 )
 from datetime import datetime
 
+# Teclas que arrastam a vista do quadro (pixels da tela, antes do espelhamento)
+TECLAS_VISTA = {
+    ord("4"): (-100, 0),
+    ord("6"): (100, 0),
+    ord("8"): (0, 100),
+    ord("2"): (0, -100),
+}
+ZOOM_TECLA = 1.25
+# Variação relativa da abertura da pinça antes de o zoom começar: parada, a
+# mão na pose de caneta levantada não mexe na vista
+ZONA_MORTA_PINCA = 0.2
+
 
 class LousaDigital:
-    def __init__(self):
-        # Configurações da câmera
-        self.video = cv2.VideoCapture(0)
-        self.video.set(3, 1280)
-        self.video.set(4, 720)
+    def __init__(
+        self,
+        escala_deteccao=0.5,
+        margem_roi=0.5,
+        fonte=None,
+        saida=None,
+        tolerancia_tracos=1.0,
+        formas=None,
+        tolerancia_jogo=None,
+        pesos_metricas=None,
+        intervalo_deteccao=1,
+        processo_deteccao=False,
+        metricas_arquivo=None,
+        metricas_porta=None,
+        servico_visao=False,
+        pose=False,
+        diario=None,
+    ):
+        """
+        :param fonte: Fonte de quadros (ver fontes.py); por padrão a webcam.
+        :param saida: Saída dos quadros; por padrão uma janela do OpenCV.
+        :param tolerancia_tracos: Desvio máximo (pixels) aceito ao simplificar
+            os traços enquanto são desenhados; 0 guarda todos os pontos.
+        :param formas: Formas alvo do jogo (FormaAlvo); por padrão as de
+            formas.formas_padrao(). Cada jogo novo usa a próxima da lista.
+        :param tolerancia_jogo: Distância (pixels) até o contorno aceita como
+            acerto; por padrão metade de (espessura + 5).
+        :param pesos_metricas: Peso de cada métrica (precisao, cobertura, iou,
+            hausdorff) na pontuação; por padrão PESOS_METRICAS.
+        :param intervalo_deteccao: Roda o detector a cada tantos quadros e
+            prevê a mão nos demais (ver rastreamento.RastreadorMaos).
+        :param processo_deteccao: Roda o detector num processo separado, com
+            os quadros em memória compartilhada (ver deteccao_processo.py).
+        :param metricas_arquivo: CSV ou JSON onde exportar as métricas de
+            desempenho periodicamente (ver instrumentacao.py).
+        :param metricas_porta: Porta do endpoint Prometheus em 127.0.0.1.
+        :param servico_visao: Captura e detecção de mãos no ServicoVisao
+            (ver servico_visao.py), que pode alimentar outros analisadores
+            com a mesma câmera.
+        :param pose: Mostra o esqueleto da pose do corpo, analisada no
+            ServicoVisao (implica ``servico_visao``).
+        :param diario: Pasta do diário de traços (ver diario_tracos.py). O
+            desenho gravado nela é recuperado ao abrir, e cada mudança no
+            desenho é gravada enquanto se desenha.
+        """
         self.largura = 1280
         self.altura = 720
 
-        # Hand tracking
-        self.detector = HandDetector(detectionCon=0.8)
-        self.desenho = []
-
-        # Máscara separada para o desenho do jogador (para o cálculo de similaridade)
-        self.imgCanvas = np.zeros((self.altura, self.largura, 3), np.uint8)
+        # Hand tracking (em resolução reduzida e, com a mão encontrada, só na
+        # região em volta dela), com a ponta do indicador filtrada e prevista
+        # entre detecções. Registros de landmarks já trazem as mãos.
+        self.detector = None
+        self.detector_processo = None
+        self.carregador_detector = None
+        if fonte is None or not fonte.fornece_maos:
+            if processo_deteccao:
+                self.detector_processo = DetectorProcesso(
+                    escala=escala_deteccao, margem_roi=margem_roi
+                )
+                detector = self.detector_processo
+            else:
+                # O modelo carrega em segundo plano; a câmera e a interface
+                # aparecem antes
+                detector = self.carregador_detector = CarregadorDetector(
+                    criar_detector_maos, escala_deteccao, margem_roi
+                )
+            self.detector = RastreadorMaos(detector, intervalo=intervalo_deteccao)
+
+        # Configurações da câmera. A webcam abre enquanto o detector carrega
+        self.fonte = fonte if fonte is not None else FonteCamera(0, 1280, 720)
+
+        # Serviço de visão: a câmera alimenta a detecção de mãos e a pose em
+        # threads próprias, e a lousa lê os quadros e as mãos dele
+        self.servico_visao = None
+        if (servico_visao or pose) and not self.fonte.fornece_maos:
+            analisadores = [AnalisadorMaos(self.detector)]
+            if pose:
+                analisadores.append(AnalisadorPose())
+            self.servico_visao = ServicoVisao(self.fonte, analisadores)
+            self.servico_visao.iniciar()
+            self.fonte = self.servico_visao.fonte_lousa()
+        self.saida = saida if saida is not None else SaidaJanela("Lousa Digital")
+
+        # Traços em buffers NumPy, com desfazer e limpar em tempo constante,
+        # simplificados enquanto são desenhados
+        self.tolerancia_tracos = tolerancia_tracos
+        self.desenho = ArmazemTracos(tolerancia=tolerancia_tracos)
+
+        # Quadro infinito: os traços ficam em coordenadas do mundo, numa
+        # camada em ladrilhos, e a vista define a parte mostrada na tela
+        self.camada_desenho = CamadaLadrilhos()
+        self.vista = Vista()
+        self.arrasto_vista = None
+        self.pinca_vista = None
+        # Imagens do loop reaproveitadas de um quadro para o outro
+        self.pool = PoolBuffers()
 
         # Configurações iniciais
         self.cor = (0, 0, 255)
         self.espessura = 20
+
+        # Diário dos traços: a sessão interrompida por uma queda continua de
+        # onde parou
+        self.diario = DiarioNulo()
+        if diario is not None:
+            recuperado = recuperar(diario)
+            if recuperado is not None:
+                self.desenho, cor, espessura = recuperado
+                self.desenho.tolerancia = tolerancia_tracos
+                self.cor = cor or self.cor
+                self.espessura = espessura or self.espessura
+                self.camada_desenho.redesenhar(self.desenho)
+                print(f"Desenho recuperado do diário: {len(self.desenho)} pontos")
+            self.diario = DiarioTracos(diario, self.desenho, tolerancia_tracos)
         self.modo_atual = "desenho"  # desenho, apresentacao
         self.button_cooldown = 0
-        self.last_position = None
         self.jogo_ativo = False
         self.salvar_pontuacao_ativo = False
         self.similaridade = 0
+        self.formas = formas if formas is not None else formas_padrao()
+        self.indice_forma = -1
+        self.tolerancia_jogo = tolerancia_jogo
+        self.pesos_metricas = pesos_metricas
+        self.avaliador = None
+        self.metricas_jogo = None
         self.mostrar_ranking = False
+        self.similaridade_texto_display = None
+        self.x_jogo_inicio = None
+        self.y_jogo_inicio = None
+        self.momento_jogo_inicio = None
+        self.x_dedo = None
+        self.y_dedo = None
+        self.latencia_ms = 0
 
         # Cores disponíveis
         self.cores = {
@@ -57,6 +188,34 @@ class LousaDigital:
         # Botões organizados em abas
         self.setup_buttons()
 
+        # Interface pré-desenhada; só o número de pontos muda a cada quadro
+        self.sprite_interface = SpriteInterface(self.desenhar_elementos_fixos)
+        self.texto_pontos = TextoCache((50, 100), 0.7, (0, 0, 255), 2)
+        self.texto_metricas = TextoCache((200, 140), 0.6, (255, 255, 255), 2)
+        self.texto_zoom = TextoCache((50, 690), 0.6, (255, 255, 255), 2)
+        # Painel do ranking: fundo mesclado na região e textos em sprite
+        self.ranking_exibido = ()
+        self.fundo_ranking = None
+        self.sprite_ranking = SpriteInterface(self.desenhar_textos_ranking)
+        # Nome do jogador digitado dentro do loop
+        self.entrada_nome = EntradaNome()
+        # Arquivos (desenhos e pontuações) lidos e gravados numa thread à
+        # parte; o estado da operação aparece no HUD por alguns quadros
+        self.executor_io = ExecutorIO()
+        self.mensagem_io = ""
+        self.quadros_mensagem_io = 0
+        self.texto_io = TextoCache((50, 175), 0.6, (0, 255, 255), 2)
+        self.texto_carregando = TextoCache((500, 690), 0.7, (0, 255, 255), 2)
+
+        # Tempo de cada etapa do loop; o HUD é ligado com a tecla 'm'
+        self.instrumentacao = Instrumentacao(
+            arquivo=metricas_arquivo,
+            porta=metricas_porta,
+            executor_io=self.executor_io,
+        )
+        self.textos_hud = []
+        self.linhas_hud = []
+
     def setup_buttons(self):
         # Botões de cores (primeira linha)
         self.botoes_cores = []
@@ -88,84 +247,122 @@ class LousaDigital:
             self.botoes_cores + self.botoes_ferramentas + self.botao_salvar_pontuacao
         )
 
-    def smooth_drawing(self, current_pos):
-        if self.last_position is None:
-            self.last_position = current_pos
-            return [current_pos]
-
-        points = []
-        x1, y1 = self.last_position
-        x2, y2 = current_pos
-
-        distance = ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
-        if distance > 5:
-            steps = int(distance / 3)
-            for i in range(steps + 1):
-                t = i / max(steps, 1)
-                x = int(x1 + (x2 - x1) * t)
-                y = int(y1 + (y2 - y1) * t)
-                points.append((x, y))
+    def navegar_vista(self, lmlist, dedos):
+        """
+        Pan e zoom do quadro com a mão: quatro dedos levantados arrastam a
+        vista, e a pinça polegar-indicador ([1, 1, 0, 0, 0]) amplia ou reduz em
+        torno do ponto entre os dois dedos, na proporção da abertura. A pinça
+        só passa a dar zoom depois que a abertura muda mais que
+        ``ZONA_MORTA_PINCA``, pois a mesma pose também levanta a caneta.
+        """
+        x, y = lmlist[8][:2]
+        if dedos.count(1) == 4:
+            if self.arrasto_vista is not None:
+                self.vista.mover(x - self.arrasto_vista[0], y - self.arrasto_vista[1])
+            self.arrasto_vista = (x, y)
         else:
-            points.append(current_pos)
-
-        self.last_position = current_pos
-        return points
+            self.arrasto_vista = None
+
+        if dedos == [1, 1, 0, 0, 0]:
+            px, py = lmlist[4][:2]
+            abertura = max(math.hypot(x - px, y - py), 1.0)
+            if self.pinca_vista is None:
+                self.pinca_vista = (abertura, self.vista.zoom, False)
+                return
+            abertura_inicial, zoom_inicial, ativa = self.pinca_vista
+            if not ativa:
+                if abs(abertura / abertura_inicial - 1) <= ZONA_MORTA_PINCA:
+                    return
+                # O zoom parte da abertura atual, sem saltar a vista
+                self.pinca_vista = (abertura, zoom_inicial, True)
+            else:
+                self.vista.definir_zoom(
+                    zoom_inicial * abertura / abertura_inicial,
+                    (x + px) / 2,
+                    (y + py) / 2,
+                )
+        else:
+            self.pinca_vista = None
+
+    def tecla_vista(self, key):
+        """Zoom ('+', '-'), pan (4, 6, 8, 2) e volta à vista inicial ('0')"""
+        if key in (ord("+"), ord("=")):
+            self.vista.ampliar(ZOOM_TECLA, self.largura / 2, self.altura / 2)
+        elif key == ord("-"):
+            self.vista.ampliar(1 / ZOOM_TECLA, self.largura / 2, self.altura / 2)
+        elif key == ord("0"):
+            self.vista.reiniciar()
+        elif key in TECLAS_VISTA:
+            self.vista.mover(*TECLAS_VISTA[key])
 
     def salvar_desenho(self):
         if not self.desenho:
             return
 
+        # O trecho pendente da simplificação também vai para o arquivo, e a
+        # thread de E/S grava uma cópia: o desenho segue mudando enquanto isso
+        self.desenho.fixar_cauda()
+        self.diario.fixar()
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"desenho_{timestamp}.json"
-
-        desenho_serializado = []
-        for ponto in self.desenho:
-            x, y, cor, espessura = ponto
-            desenho_serializado.append(
-                {"x": x, "y": y, "cor": cor, "espessura": espessura}
-            )
-
-        try:
-            with open(filename, "w") as f:
-                json.dump(desenho_serializado, f)
-            print(f"Desenho salvo como {filename}")
-        except Exception as e:
-            print(f"Erro ao salvar: {e}")
+        filename = f"desenho_{timestamp}{formato_desenho.EXTENSAO}"
+
+        enviado = self.executor_io.enviar(
+            formato_desenho.salvar,
+            self.desenho.copia(),
+            filename,
+            chave="salvar_desenho",
+            ao_concluir=lambda _: self.informar_io(f"Desenho salvo como {filename}"),
+            ao_erro=lambda e: self.informar_io(f"Erro ao salvar: {e}"),
+        )
+        self.informar_io("Salvando desenho..." if enviado else "Fila de E/S cheia")
 
     def carregar_desenho(self):
-        arquivos = [
-            f
-            for f in os.listdir(".")
-            if f.startswith("desenho_") and f.endswith(".json")
-        ]
-        if not arquivos:
-            print("Nenhum desenho salvo encontrado")
-            return
+        # Desenhos no formato binário e os antigos em JSON
+        enviado = self.executor_io.enviar(
+            formato_desenho.carregar_recente,
+            chave="carregar_desenho",
+            ao_concluir=self.aplicar_desenho_carregado,
+            ao_erro=lambda e: self.informar_io(f"Erro ao carregar: {e}"),
+        )
+        self.informar_io("Carregando desenho..." if enviado else "Fila de E/S cheia")
 
-        arquivo_recente = max(arquivos)
-        try:
-            with open(arquivo_recente, "r") as f:
-                desenho_carregado = json.load(f)
+    def aplicar_desenho_carregado(self, carregado):
+        """Troca o desenho pelo que foi lido (no loop principal)"""
+        if carregado is None:
+            self.informar_io("Nenhum desenho salvo encontrado")
+            return
 
-            self.desenho = []
-            for ponto in desenho_carregado:
-                self.desenho.append(
-                    (ponto["x"], ponto["y"], tuple(ponto["cor"]), ponto["espessura"])
-                )
+        arquivo_recente, self.desenho = carregado
+        self.desenho.tolerancia = self.tolerancia_tracos
+        self.diario.substituir(self.desenho)
+        self.camada_desenho.redesenhar(self.desenho)
+        if self.avaliador is not None:
+            self.avaliador.reiniciar()
+        self.informar_io(f"Desenho carregado: {arquivo_recente}")
 
-            print(f"Desenho carregado: {arquivo_recente}")
-        except Exception as e:
-            print(f"Erro ao carregar: {e}")
+    def informar_io(self, mensagem):
+        """Mostra ``mensagem`` no HUD por alguns quadros (e no terminal)"""
+        print(mensagem)
+        self.mensagem_io = mensagem
+        self.quadros_mensagem_io = 90
 
     def desfazer_ultimo(self):
-        if not self.desenho:
+        removido = self.desenho.desfazer()
+        if removido is None:
             return
+        self.diario.desfazer()
 
-        while self.desenho and self.desenho[-1][0] != 0:
-            self.desenho.pop()
+        # Só a área do traço desfeito precisa ser redesenhada
+        self.camada_desenho.remover(removido, self.desenho)
+        if self.avaliador is not None:
+            self.avaliador.reiniciar()
 
-        if self.desenho and self.desenho[-1][0] == 0:
-            self.desenho.pop()
+    def limpar_desenho(self):
+        self.desenho.limpar()
+        self.diario.limpar()
+        self.camada_desenho.limpar()
+        if self.avaliador is not None:
+            self.avaliador.reiniciar()
 
     def processar_botoes(self, x_flip, y):
         """Processa cliques nos botões com cooldown"""
@@ -174,6 +371,9 @@ class LousaDigital:
 
         for bx1, by1, bx2, by2, bcor, texto in self.botoes:
             if bx1 < x_flip < bx2 and by1 < y < by2:
+                if texto == "Salvar Pontuacao?" and not self.salvar_pontuacao_ativo:
+                    # Botão escondido: não pode ser clicado
+                    continue
                 self.button_cooldown = 15
 
                 if texto in self.cores:
@@ -184,8 +384,7 @@ class LousaDigital:
                 elif texto == "-":
                     self.espessura = max(self.espessura - 5, 5)
                 elif texto == "Limpar":
-                    self.desenho = []
-                    self.imgCanvas = np.zeros((self.altura, self.largura, 3), np.uint8)
+                    self.limpar_desenho()
                 elif texto == "Salvar":
                     self.salvar_desenho()
                 elif texto == "Carregar":
@@ -193,29 +392,67 @@ class LousaDigital:
                 elif texto == "Desfazer":
                     self.desfazer_ultimo()
                     if self.jogo_ativo:
-                        self.desenho = []
-                        self.imgCanvas = np.zeros(
-                            (self.altura, self.largura, 3), np.uint8
-                        )
+                        self.limpar_desenho()
                 elif texto == "Iniciar Jogo":
                     self.jogo_ativo = not self.jogo_ativo
-                    self.desenho = []
-                    self.imgCanvas = np.zeros((self.altura, self.largura, 3), np.uint8)
-                    print(f"Jogo: {'ATIVO' if self.jogo_ativo else 'INATIVO'}")
-                elif texto == "Salvar Pontuacao?":
-                    nome_jogador = salvar_nome_jogador()
-                    salvar_pontuacao(nome_jogador, self.similaridade)
-                    print("Pontuacao salva!")
-                    self.salvar_pontuacao_ativo = not self.salvar_pontuacao_ativo
-                    self.desenho = []
-                    self.imgCanvas = np.zeros((self.altura, self.largura, 3), np.uint8)
+                    self.limpar_desenho()
+                    # A forma do jogo é desenhada na tela: mundo e tela coincidem
+                    self.vista.reiniciar()
                     if self.jogo_ativo:
-                        self.jogo_ativo = not self.jogo_ativo
+                        # Cada jogo novo usa a próxima forma da biblioteca
+                        self.indice_forma = (self.indice_forma + 1) % len(self.formas)
+                        print(f"Jogo: ATIVO ({self.formas[self.indice_forma].nome})")
+                    else:
+                        print("Jogo: INATIVO")
+                elif texto == "Salvar Pontuacao?":
+                    self.entrada_nome.iniciar(
+                        self.confirmar_pontuacao, self.largura, self.altura
+                    )
                 elif texto == "Ver ranking":
                     self.mostrar_ranking = not self.mostrar_ranking
                 break
 
+    def confirmar_pontuacao(self, nome_jogador):
+        """Grava a pontuação em segundo plano e encerra o jogo"""
+        enviado = self.executor_io.enviar(
+            salvar_pontuacao,
+            nome_jogador,
+            self.similaridade,
+            ao_concluir=lambda _: self.informar_io("Pontuacao salva!"),
+            ao_erro=lambda e: self.informar_io(f"Erro ao salvar pontuacao: {e}"),
+        )
+        if not enviado:
+            self.informar_io("Fila de E/S cheia")
+        self.salvar_pontuacao_ativo = False
+        self.limpar_desenho()
+        self.jogo_ativo = False
+
     def desenhar_interface(self, img):
+        """
+        Compõe a interface sobre ``img``. Os elementos fixos vêm de um sprite
+        que só é redesenhado quando a cor, a espessura ou o estado do jogo
+        mudam; a contagem de pontos é um recorte à parte.
+        """
+        chave = (
+            self.cor,
+            self.espessura,
+            self.jogo_ativo,
+            self.salvar_pontuacao_ativo,
+        )
+        self.sprite_interface.compor(img, chave)
+        self.texto_pontos.compor(img, f"Pontos: {len(self.desenho)}")
+        if not self.vista.identidade:
+            self.texto_zoom.compor(img, f"Zoom {self.vista.zoom:.0%}  (0: voltar)")
+
+        # Estado da E/S em segundo plano
+        pendentes = self.executor_io.pendentes()
+        if pendentes:
+            self.texto_io.compor(img, f"E/S: {pendentes} pendente(s)")
+        elif self.quadros_mensagem_io > 0:
+            self.texto_io.compor(img, self.mensagem_io)
+
+    def desenhar_elementos_fixos(self, img):
+        """Desenha botões, espessura e instruções (conteúdo do sprite)"""
         # Botões de cores
         for bx1, by1, bx2, by2, bcor, texto in self.botoes_cores:
             if texto in self.cores and self.cores[texto] == self.cor:
@@ -266,18 +503,18 @@ class LousaDigital:
             for bx1, by1, bx2, by2, bcor, texto in self.botao_salvar_pontuacao:
                 cv2.rectangle(img, (bx1, by1), (bx2, by2), bcor, cv2.FILLED)
                 cv2.rectangle(img, (bx1, by1), (bx2, by2), (50, 50, 50), 2)
-            text_size = cv2.getTextSize(texto, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-            text_x = bx1 + (bx2 - bx1 - text_size[0]) // 2
-            text_y = by1 + (by2 - by1 + text_size[1]) // 2
-            cv2.putText(
-                img,
-                texto,
-                (text_x, text_y),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.6,
-                (255, 255, 255),
-                2,
-            )
+                text_size = cv2.getTextSize(texto, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
+                text_x = bx1 + (bx2 - bx1 - text_size[0]) // 2
+                text_y = by1 + (by2 - by1 + text_size[1]) // 2
+                cv2.putText(
+                    img,
+                    texto,
+                    (text_x, text_y),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    0.6,
+                    (255, 255, 255),
+                    2,
+                )
 
         # Informações na tela
         info_y = 150
@@ -290,278 +527,453 @@ class LousaDigital:
             (0, 0, 255),
             2,
         )
-        cv2.putText(
-            img,
-            f"Pontos: {len(self.desenho)}",
-            (50, info_y - 50),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.7,
-            (0, 0, 255),
-            2,
-        )
 
         # Instruções
-        instrucoes = ["1 dedo: Desenhar", "3 dedos: Limpar tudo", "ESC: Sair"]
+        instrucoes = [
+            "1 dedo: Desenhar",
+            "3 dedos: Limpar tudo",
+            "4 dedos: Mover o quadro",
+            "Polegar e indicador: abrir/fechar para zoom",
+            "+ / - / 0: Zoom pelo teclado",
+            "ESC: Sair",
+        ]
         for i, instrucao in enumerate(instrucoes):
             cv2.putText(
                 img,
                 instrucao,
-                (50, img.shape[0] - 80 + i * 25),
+                (50, img.shape[0] - 30 - (len(instrucoes) - 1 - i) * 25),
                 cv2.FONT_HERSHEY_SIMPLEX,
                 0.5,
                 (200, 200, 200),
                 1,
             )
 
-    def renderizar_desenho(self, img, draw_on_canvas=False):
-        """Renderiza o desenho e, opcionalmente, o armazena no imgCanvas para cálculo"""
-
-        # Cria uma cópia temporária do canvas para não modificar o original
-        if draw_on_canvas:
-            self.imgCanvas = np.zeros((self.altura, self.largura, 3), np.uint8)
-            cor_canvas = (255, 255, 255)
+    def desenhar_ranking(self, img):
+        """
+        Desenha o painel do ranking sobre ``img`` (já espelhada), no próprio
+        ``img``. Só a região do painel é mesclada; os textos vêm de um sprite
+        que é redesenhado apenas quando o ranking muda.
+        """
+        # 1. Os 10 melhores do ranking (em memória; só relê o arquivo se mudou)
+        self.ranking_exibido = tuple(ranking_padrao().melhores(10))
+
+        # 2. Retângulo semi-transparente no centro (80% da tela), mesclado só
+        # na sua própria região
+        x1, y1, x2, y2 = self.regiao_painel_ranking()
+        regiao = img[y1:y2, x1:x2]
+        if self.fundo_ranking is None or self.fundo_ranking.shape != regiao.shape:
+            self.fundo_ranking = np.full(regiao.shape, (0, 150, 0), np.uint8)
+        cv2.addWeighted(self.fundo_ranking, 0.8, regiao, 0.3, 0, dst=regiao)
+
+        # 3. Título, instruções e pontuações
+        self.sprite_ranking.compor(img, self.ranking_exibido)
+        return img
+
+    def regiao_painel_ranking(self):
+        """[x1, y1, x2, y2] do painel do ranking (80% da tela, centralizado)"""
+        w_o = int(self.largura * 0.8)
+        h_o = int(self.altura * 0.8)
+        x_o = int((self.largura - w_o) / 2)
+        y_o = int((self.altura - h_o) / 2)
+        # O retângulo preenchido do OpenCV inclui a borda final
+        return [
+            max(x_o, 0),
+            max(y_o, 0),
+            min(x_o + w_o + 1, self.largura),
+            min(y_o + h_o + 1, self.altura),
+        ]
 
-        for id, ponto in enumerate(self.desenho):
-            x, y, cor_p, esp_p = ponto
+    def desenhar_textos_ranking(self, img):
+        """Desenha os textos do painel do ranking (conteúdo do sprite)"""
+        ranking = self.ranking_exibido
+        y_o = self.regiao_painel_ranking()[1]
 
-            if draw_on_canvas:
-                target_img = self.imgCanvas
-                p_cor = cor_canvas
-            else:
-                target_img = img
-                p_cor = cor_p
+        # Título e instruções
+        center_x = self.largura // 2
 
-            if x != 0:
-                cv2.circle(target_img, (x, y), esp_p // 2, p_cor, cv2.FILLED)
+        # Título
+        title_text = "RANKING DE PONTUACAO"
+        tw, th = cv2.getTextSize(title_text, cv2.FONT_HERSHEY_SIMPLEX, 1, 3)[0]
+        cv2.putText(
+            img,
+            title_text,
+            (center_x - tw // 2, y_o + 60),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            1,
+            (255, 255, 255),
+            3,
+        )
+        # Instrução de saída
+        inst_text = "Use '3 dedos' ou pressione 'r' para voltar."
+        iw, ih = cv2.getTextSize(inst_text, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)[0]
+        cv2.putText(
+            img,
+            inst_text,
+            (center_x - iw // 2, self.altura - 50),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.6,
+            (200, 200, 200),
+            1,
+        )
 
-            if id >= 1:
-                ax, ay, _, _ = self.desenho[id - 1]
-                if x != 0 and ax != 0:
-                    cv2.line(target_img, (x, y), (ax, ay), p_cor, esp_p)
+        # Pontuações
+        y_pos = y_o + 120
+        if ranking:
+            for jogador, pontuacao in ranking:
+                texto_ranking = f"Jogador: {jogador}: {pontuacao*100:.2f}%"
+                cor_ranking = (255, 255, 255)
+
+                # Centraliza o texto do ranking na largura do retângulo
+                rw, rh = cv2.getTextSize(
+                    texto_ranking, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2
+                )[0]
+                cv2.putText(
+                    img,
+                    texto_ranking,
+                    (center_x - rw // 2, y_pos),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    0.7,
+                    cor_ranking,
+                    2,
+                )
+                y_pos += 40
+        else:
+            cv2.putText(
+                img,
+                "Nenhuma pontuação encontrada.",
+                (center_x - 150, y_pos),  # Posição centralizada aproximada
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.7,
+                (0, 0, 255),
+                2,
+            )
 
-    def executar(self):
-        """Loop principal da aplicação"""
+    def renderizar_desenho(self, img, draw_on_canvas=False):
+        """
+        Atualiza a camada de traços e, se ``draw_on_canvas`` for falso, compõe
+        sobre ``img`` a parte dela que está na vista. Com ``draw_on_canvas`` a
+        camada só é atualizada.
+        """
+        # Só os pontos novos são rasterizados, nos ladrilhos que eles tocam
+        self.camada_desenho.atualizar(self.desenho)
+
+        if not draw_on_canvas:
+            self.camada_desenho.compor(img, self.vista)
+            # Trecho do traço atual que a simplificação ainda não guardou
+            cauda = self.desenho.cauda()
+            if cauda is not None:
+                pontos, cor, espessura = cauda
+                desenhar_traco(
+                    img,
+                    self.vista.para_tela(pontos),
+                    cor,
+                    max(int(round(espessura * self.vista.zoom)), 1),
+                )
 
-        similaridade_texto_display = None
-        x_jogo_inicio = None
-        y_jogo_inicio = None
+    def avaliador_jogo(self):
+        """
+        AvaliadorForma da forma atual; recriado quando a forma, o tamanho do
+        quadro ou a tolerância (que por padrão segue a espessura) mudam.
+        """
+        forma = self.formas[self.indice_forma]
+        tolerancia = self.tolerancia_jogo
+        if tolerancia is None:
+            # Mesma faixa de acerto da máscara antiga (espessura + 5)
+            tolerancia = (self.espessura + 5) / 2
+        avaliador = self.avaliador
+        if (
+            avaliador is None
+            or avaliador.forma is not forma
+            or (avaliador.largura, avaliador.altura) != (self.largura, self.altura)
+            or avaliador.tolerancia != tolerancia
+        ):
+            self.avaliador = AvaliadorForma(
+                forma, self.largura, self.altura, tolerancia, self.pesos_metricas
+            )
+        return self.avaliador
 
-        while True:
-            check, img = self.video.read()
-            if not check:
-                break
+    def processar_quadro(self, img, hands, dedos, momento):
+        """
+        Processa um quadro já com as mãos detectadas: gestos, botões, desenho,
+        jogo e interface. Retorna a imagem (espelhada) pronta para exibição,
+        num buffer que é reaproveitado pela próxima chamada.
 
-            self.altura, self.largura, _ = img.shape
+        :param hands: Mãos encontradas pelo detector no quadro.
+        :param dedos: Dedos levantados de cada mão (HandDetector.fingersUp).
+        :param momento: Momento do quadro em segundos (ver Quadro.momento).
+        """
+        self.altura, self.largura, _ = img.shape
 
-            # Reduz cooldown
-            if self.button_cooldown > 0:
-                self.button_cooldown -= 1
+        # Reduz cooldown
+        if self.button_cooldown > 0:
+            self.button_cooldown -= 1
+        if self.quadros_mensagem_io > 0:
+            self.quadros_mensagem_io -= 1
 
-            # Hand tracking (Feito no frame original)
-            resultado = self.detector.findHands(img, draw=True)
-            hands = resultado[0]
+        # Leituras e gravações terminadas desde o último quadro
+        self.executor_io.aplicar_concluidos()
+        self.diario.atualizar()
 
+        with self.instrumentacao.etapa("gestos"):
             dedosLev = 0
+            gesto_vista = False
 
             if hands:
                 hand = hands[0]
                 lmlist = hand["lmList"]
-                dedos = self.detector.fingersUp(hand)
-                dedosLev = dedos.count(1)
+                dedosLev = dedos[0].count(1)
 
                 x, y = lmlist[8][0], lmlist[8][1]
+                self.x_dedo, self.y_dedo = x, y
                 x_flip = img.shape[1] - x
 
-                self.processar_botoes(x_flip, y)
+                if self.entrada_nome.ativa:
+                    # Enquanto o nome é digitado o dedo só opera o teclado (e o
+                    # traço em andamento é finalizado logo abaixo)
+                    self.entrada_nome.processar_dedo(x_flip, y, dedosLev)
+                    dedosLev = 0
+                else:
+                    self.processar_botoes(x_flip, y)
 
                 # Desenho. A cor original é usada para armazenar o ponto, mas o render será corrigido.
                 if dedosLev == 1:
-                    pontos_suavizados = self.smooth_drawing((x, y))
-                    for px, py in pontos_suavizados:
-                        self.desenho.append((px, py, self.cor, self.espessura))
-                    cv2.circle(img, (x, y), self.espessura // 2, self.cor, 2)
+                    # O dedo aponta para a tela; o traço é guardado no mundo
+                    px, py = self.vista.para_mundo(x, y)
+                    self.desenho.adicionar_ponto(px, py, self.cor, self.espessura)
+                    self.diario.ponto(px, py, self.cor, self.espessura)
+                    raio = max(int(self.espessura * self.vista.zoom) // 2, 1)
+                    cv2.circle(img, (x, y), raio, self.cor, 2)
                     if (
                         self.jogo_ativo
-                        and x_jogo_inicio is None
-                        and y_jogo_inicio is None
+                        and self.x_jogo_inicio is None
+                        and self.y_jogo_inicio is None
                     ):
-                        x_jogo_inicio, y_jogo_inicio = self.last_position
-                        momento_jogo_inicio = time.time()
-                        print(x_jogo_inicio)
-                        print(y_jogo_inicio)
+                        self.x_jogo_inicio, self.y_jogo_inicio = px, py
+                        self.momento_jogo_inicio = momento
 
                 elif dedosLev != 1 and dedosLev != 3:
-                    if self.desenho and self.desenho[-1][0] != 0:
-                        self.desenho.append((0, 0, self.cor, self.espessura))
-                    self.last_position = None
+                    self.desenho.finalizar_traco()
+                    self.diario.levantar()
+                    # A vista não se move no jogo nem com o teclado do nome
+                    if not self.jogo_ativo and not self.entrada_nome.ativa:
+                        gesto_vista = True
+                        self.navegar_vista(lmlist, dedos[0])
 
                 elif dedosLev == 3:
-                    self.desenho = []
-                    self.imgCanvas = np.zeros((self.altura, self.largura, 3), np.uint8)
-                    self.last_position = None
+                    self.limpar_desenho()
 
-            limites_forma = [0, 0, 0, 0]
+            if not gesto_vista:
+                self.arrasto_vista = None
+                self.pinca_vista = None
 
+        with self.instrumentacao.etapa("jogo"):
             # 1. Desenha o Contorno ALVO (na imagem real, para visualização)
             if self.jogo_ativo:
-                limites_forma = desenhar_quadrado_contorno(img)
-
-                # 2. Cria a MÁSCARA ALVO para o cálculo
-                mascara_alvo_bgr = np.zeros((self.altura, self.largura, 3), np.uint8)
-                x1, y1, x2, y2 = limites_forma
-                margem_erro = self.espessura + 5
-                cv2.rectangle(
-                    mascara_alvo_bgr, (x1, y1), (x2, y2), (255, 255, 255), margem_erro
-                )
-
-                mascara_alvo = cv2.cvtColor(mascara_alvo_bgr, cv2.COLOR_BGR2GRAY)
+                forma = self.formas[self.indice_forma]
+                forma.desenhar(img)
 
-                # 3. Desenha a linha do jogador na imgCanvas (Máscara Desenho)
-                self.renderizar_desenho(img, draw_on_canvas=True)
+                # 2. Métricas ao vivo: só os pontos novos do desenho são avaliados,
+                # contra estruturas da forma calculadas uma vez por resolução
+                avaliador = self.avaliador_jogo()
+                avaliador.atualizar(self.desenho)
+                self.metricas_jogo = avaliador.metricas()
 
-                mascara_desenho = cv2.cvtColor(self.imgCanvas, cv2.COLOR_BGR2GRAY)
-
-                # 4. Calcula e ARMAZENA O TEXTO apenas quando o desenho estiver finalizado
+                # 3. Calcula e ARMAZENA O TEXTO apenas quando o desenho estiver finalizado
                 if (
-                    x_jogo_inicio is not None
-                    and y_jogo_inicio is not None
-                    and x_jogo_inicio - 20 <= x <= x_jogo_inicio + 20
-                    and y_jogo_inicio - 20 <= y <= y_jogo_inicio + 20
-                    and time.time() > momento_jogo_inicio + 3
+                    self.x_jogo_inicio is not None
+                    and self.y_jogo_inicio is not None
+                    and self.x_jogo_inicio - 20
+                    <= self.x_dedo
+                    <= self.x_jogo_inicio + 20
+                    and self.y_jogo_inicio - 20
+                    <= self.y_dedo
+                    <= self.y_jogo_inicio + 20
+                    and momento > self.momento_jogo_inicio + 3
                     and len(self.desenho) > 0
                 ):
-                    self.similaridade, similar = calcular_similaridade(
-                        mascara_alvo, mascara_desenho, limite_minimo=0.75
-                    )
+                    # O trecho pendente também conta para a similaridade
+                    self.desenho.fixar_cauda()
+                    self.diario.fixar()
+                    avaliador.atualizar(self.desenho)
+                    self.metricas_jogo = avaliador.metricas()
+                    self.similaridade = avaliador.pontuacao(self.metricas_jogo)
+                    similar = self.similaridade >= 0.75
                     cor_texto = (0, 255, 0) if similar else (0, 0, 255)
 
-                    similaridade_texto_display = {
+                    self.similaridade_texto_display = {
                         "texto": f"Similaridade: {self.similaridade*100:.2f}% ({'OK' if similar else 'TENTE NOVAMENTE'})",
                         "cor": cor_texto,
                     }
                     self.salvar_pontuacao_ativo = True
+            else:
+                self.metricas_jogo = None
 
-            # Renderiza desenho
+        # Renderiza desenho
+        with self.instrumentacao.etapa("renderizar"):
+            if self.servico_visao is not None:
+                # Pose mais recente (vazia sem o analisador de pose)
+                desenhar_pose(img, self.servico_visao.ultimo("pose")[1])
             self.renderizar_desenho(img, draw_on_canvas=False)
 
-            img = cv2.flip(img, 1)
+            img = cv2.flip(img, 1, dst=self.pool.obter("espelhado", img.shape))
 
+        with self.instrumentacao.etapa("interface"):
             # Desenha interface (Botões e texto de informações)
             self.desenhar_interface(img)
 
-            if self.mostrar_ranking:
-                # 1. Carrega o ranking
-                ranking = carrega_ranking()
-
-                # 2. Cria a sobreposição (mesmo tamanho da imagem, totalmente preta)
-                overlay = img.copy()
-
-                # 3. Desenha um retângulo semi-transparente no centro (por exemplo, 80% da tela)
-                w_o = int(self.largura * 0.8)
-                h_o = int(self.altura * 0.8)
-                x_o = int((self.largura - w_o) / 2)
-                y_o = int((self.altura - h_o) / 2)
+            if (
+                self.carregador_detector is not None
+                and not self.carregador_detector.pronto.is_set()
+            ):
+                self.texto_carregando.compor(img, "Carregando detector de maos...")
 
-                cv2.rectangle(
-                    overlay, (x_o, y_o), (x_o + w_o, y_o + h_o), (0, 150, 0), cv2.FILLED
-                )
-                # Mescla a sobreposição preta com a imagem original (alfa=0.7 para transparência)
-                img = cv2.addWeighted(overlay, 0.8, img, 0.3, 0)
-
-                # 4. Desenha o título e instruções
-                center_x = self.largura // 2
+            if self.mostrar_ranking:
+                self.desenhar_ranking(img)
 
-                # Título
-                title_text = "RANKING DE PONTUACAO"
-                (tw, th) = cv2.getTextSize(title_text, cv2.FONT_HERSHEY_SIMPLEX, 1, 3)[
-                    0
-                ]
-                cv2.putText(
+            # Métricas do jogo ao vivo
+            if self.metricas_jogo is not None:
+                metricas = self.metricas_jogo
+                self.texto_metricas.compor(
                     img,
-                    title_text,
-                    (center_x - tw // 2, y_o + 60),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    1,
-                    (255, 255, 255),
-                    3,
+                    f"Precisao {metricas['precisao']:.0%}  "
+                    f"Cobertura {metricas['cobertura']:.0%}  "
+                    f"IoU {metricas['iou']:.0%}  "
+                    f"Hausdorff {metricas['hausdorff']:.0f}px",
                 )
-                # Instrução de saída
-                inst_text = "Use '3 dedos' ou pressione 'r' para voltar."
-                (iw, ih) = cv2.getTextSize(inst_text, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)[
-                    0
-                ]
+
+            # Desenha o texto do jogo de simlaridade (se tivesse sido plotado antes, ia ficar espelhado)
+            if self.similaridade_texto_display:
                 cv2.putText(
                     img,
-                    inst_text,
-                    (center_x - iw // 2, self.altura - 50),
+                    self.similaridade_texto_display["texto"],
+                    (200, 100),
                     cv2.FONT_HERSHEY_SIMPLEX,
-                    0.6,
-                    (200, 200, 200),
-                    1,
+                    0.8,
+                    self.similaridade_texto_display["cor"],
+                    2,
                 )
 
-                # 5. Exibir as pontuações
-                y_pos = y_o + 120
-                if ranking:
-                    # Exibe apenas os 10 melhores
-                    top_ranking = {k: ranking[k] for k in list(ranking)[:10]}
-                    for jogador, pontuacao in top_ranking.items():
-                        texto_ranking = f"Jogador: {jogador}: {pontuacao*100:.2f}%"
-                        cor_ranking = (255, 255, 255)
-
-                        # Centraliza o texto do ranking na largura do retângulo
-                        (rw, rh) = cv2.getTextSize(
-                            texto_ranking, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2
-                        )[0]
-                        cv2.putText(
-                            img,
-                            texto_ranking,
-                            (center_x - rw // 2, y_pos),
-                            cv2.FONT_HERSHEY_SIMPLEX,
-                            0.7,
-                            cor_ranking,
-                            2,
+            # Teclado do nome do jogador, por cima de tudo
+            self.entrada_nome.desenhar(img)
+
+        return img
+
+    def desenhar_hud_metricas(self, img):
+        """Painel de desempenho no canto direito (tecla 'm')"""
+        # Os números mudam a cada quadro; atualizar duas vezes por segundo
+        # deixa o painel legível e evita redesenhar o texto sempre
+        if self.instrumentacao.quadros % 15 == 0 or not self.textos_hud:
+            self.linhas_hud = self.instrumentacao.linhas_hud()
+        x = self.largura - 400
+        while len(self.textos_hud) < len(self.linhas_hud):
+            y = 110 + 22 * len(self.textos_hud)
+            self.textos_hud.append(TextoCache((x, y), 0.5, (0, 255, 255), 1))
+        for texto, linha in zip(self.textos_hud, self.linhas_hud):
+            texto.compor(img, linha)
+
+    def executar(self, pipeline=False, gravar_landmarks=None):
+        """
+        Loop principal da aplicação.
+
+        Com ``pipeline`` a captura e a detecção de mãos rodam em threads
+        separadas (PipelineCaptura) e o loop principal só renderiza e exibe o
+        quadro mais recente; quadros atrasados são descartados.
+
+        :param gravar_landmarks: Caminho de um registro JSONL onde gravar as
+            mãos de cada quadro, para reproduzir depois com FonteRegistroLandmarks.
+        """
+        captura = None
+        if pipeline:
+            captura = PipelineCaptura(self.fonte, self.detector)
+            captura.iniciar()
+
+        gravador = None
+        if gravar_landmarks:
+            gravador = GravadorLandmarks(gravar_landmarks)
+
+        instrumentacao = self.instrumentacao
+        while True:
+            if captura is not None:
+                # Espera pelo próximo quadro já detectado
+                with instrumentacao.etapa("captura"):
+                    quadro = captura.proximo()
+                if quadro is None:
+                    break
+            else:
+                with instrumentacao.etapa("captura"):
+                    quadro = self.fonte.ler()
+                if quadro is None:
+                    break
+                if not self.fonte.fornece_maos:
+                    # Hand tracking (Feito no frame original)
+                    with instrumentacao.etapa("deteccao"):
+                        quadro.maos, quadro.dedos = detectar_maos(
+                            self.detector, quadro.img
                         )
-                        y_pos += 40
-                else:
-                    cv2.putText(
-                        img,
-                        "Nenhuma pontuação encontrada.",
-                        (center_x - 150, y_pos),  # Posição centralizada aproximada
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.7,
-                        (0, 0, 255),
-                        2,
-                    )
 
-            # Desenha o texto do jogo de simlaridade (se tivesse sido plotado antes, ia ficar espelhado)
-            if similaridade_texto_display:
+            if gravador is not None:
+                gravador.gravar(quadro)
+
+            img = self.processar_quadro(
+                quadro.img, quadro.maos, quadro.dedos, quadro.momento
+            )
+
+            if captura is not None:
+                # Latência de ponta a ponta: da captura até a exibição
+                self.latencia_ms = quadro.latencia() * 1000
+                texto_latencia = (
+                    f"Latencia: {self.latencia_ms:.0f} ms"
+                    f"  Descartados: {captura.descartados()}"
+                )
                 cv2.putText(
                     img,
-                    similaridade_texto_display["texto"],
-                    (200, 100),
+                    texto_latencia,
+                    (self.largura - 420, self.altura - 20),
                     cv2.FONT_HERSHEY_SIMPLEX,
-                    0.8,
-                    similaridade_texto_display["cor"],
-                    2,
+                    0.5,
+                    (200, 200, 200),
+                    1,
                 )
-            # ----------------------------------------------------------
 
-            cv2.imshow("Lousa Digital", img)
+            if instrumentacao.mostrar_hud:
+                self.desenhar_hud_metricas(img)
+
+            with instrumentacao.etapa("exibicao"):
+                self.saida.mostrar(img)
 
-            # Teclas de atalho
-            key = cv2.waitKey(1) & 0xFF
-            if key == 27:
+                # Teclas de atalho
+                key = self.saida.tecla()
+            instrumentacao.fim_quadro(
+                captura.descartados() if captura is not None else 0
+            )
+            if self.entrada_nome.ativa:
+                # O teclado físico também digita o nome (e Esc só cancela)
+                if key != 0xFF:
+                    self.entrada_nome.tecla(key)
+            elif key == 27:
                 break
             elif key == ord("s"):
                 self.salvar_desenho()
             elif key == ord("l"):
                 self.carregar_desenho()
             elif key == ord("c"):
-                self.desenho = []
-                self.imgCanvas = np.zeros((self.altura, self.largura, 3), np.uint8)
+                self.limpar_desenho()
             elif key == ord("z"):
                 self.desfazer_ultimo()
-
-        self.video.release()
-        cv2.destroyAllWindows()
+            elif key == ord("m"):
+                instrumentacao.alternar_hud()
+            elif not self.jogo_ativo:
+                self.tecla_vista(key)
+
+        if captura is not None:
+            captura.parar()
+        if gravador is not None:
+            gravador.fechar()
+        if self.detector_processo is not None:
+            self.detector_processo.fechar()
+        instrumentacao.fechar()
+        self.diario.fechar()
+        self.camada_desenho.fechar()
+        self.executor_io.fechar()
+        self.fonte.liberar()
+        self.saida.fechar()
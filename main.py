@@ -1,6 +1,142 @@
+import argparse
+
+from formas import carregar_formas, formas_padrao
+from fontes import FonteRegistroLandmarks, FonteVideo, SaidaHeadless
+from jogo_similaridade import PESOS_METRICAS
 from lousa import LousaDigital
 
 # Executa o programa
 if __name__ == "__main__":
-    lousa_app = LousaDigital()
-    lousa_app.executar()
+    parser = argparse.ArgumentParser(description="Lousa Digital")
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="captura e detecção de mãos em threads separadas",
+    )
+    parser.add_argument(
+        "--processo-deteccao",
+        action="store_true",
+        help="detecção de mãos num processo separado (quadros em memória compartilhada)",
+    )
+    parser.add_argument(
+        "--servico-visao",
+        action="store_true",
+        help="câmera e detecção de mãos no serviço de visão compartilhado",
+    )
+    parser.add_argument(
+        "--pose",
+        action="store_true",
+        help="mostra o esqueleto da pose do corpo (usa o serviço de visão)",
+    )
+    parser.add_argument(
+        "--escala-deteccao",
+        type=float,
+        default=0.5,
+        help="fator de redução do quadro antes da detecção de mãos",
+    )
+    parser.add_argument(
+        "--margem-roi",
+        type=float,
+        default=0.5,
+        help="margem da região de busca em volta da mão (fração da bbox)",
+    )
+    parser.add_argument(
+        "--intervalo-deteccao",
+        type=int,
+        default=1,
+        help="detecta a mão a cada N quadros e prevê a posição nos demais "
+        "(padrão: todo quadro)",
+    )
+    parser.add_argument(
+        "--tolerancia-tracos",
+        type=float,
+        default=1.0,
+        help="desvio máximo (pixels) ao simplificar os traços (0 desliga)",
+    )
+    parser.add_argument(
+        "--formas",
+        help="JSON com formas extras para o jogo ({nome: [[x, y], ...]})",
+    )
+    parser.add_argument(
+        "--tolerancia-jogo",
+        type=float,
+        help="distância (pixels) até o contorno aceita como acerto no jogo",
+    )
+    parser.add_argument(
+        "--pesos-metricas",
+        help="pesos da pontuação do jogo, como 'precisao=1,cobertura=1,hausdorff=0.5'",
+    )
+    parser.add_argument(
+        "--metricas-arquivo",
+        help="exporta as métricas de desempenho para este CSV/JSON a cada 5 s",
+    )
+    parser.add_argument(
+        "--metricas-porta",
+        type=int,
+        help="serve as métricas no formato Prometheus em 127.0.0.1:PORTA/metrics",
+    )
+    parser.add_argument(
+        "--hud-metricas",
+        action="store_true",
+        help="começa com o painel de desempenho aberto (tecla 'm' alterna)",
+    )
+    parser.add_argument(
+        "--diario",
+        help="pasta do diário de traços: grava o desenho enquanto se desenha"
+        " e o recupera ao abrir (reproduza com diario_tracos.py)",
+    )
+    parser.add_argument("--video", help="usa um arquivo de vídeo no lugar da webcam")
+    parser.add_argument(
+        "--landmarks", help="reproduz um registro JSONL de landmarks (sem detector)"
+    )
+    parser.add_argument(
+        "--gravar-landmarks", help="grava as mãos de cada quadro num registro JSONL"
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="não abre janela e roda o mais rápido possível",
+    )
+    args = parser.parse_args()
+
+    fonte = None
+    if args.landmarks:
+        fonte = FonteRegistroLandmarks(args.landmarks)
+    elif args.video:
+        fonte = FonteVideo(args.video)
+    saida = SaidaHeadless() if args.headless else None
+    pesos_metricas = None
+    if args.pesos_metricas:
+        pesos_metricas = {}
+        for item in args.pesos_metricas.split(","):
+            nome, _, peso = item.partition("=")
+            if nome.strip() not in PESOS_METRICAS:
+                parser.error(f"métrica desconhecida: {nome.strip()}")
+            try:
+                pesos_metricas[nome.strip()] = float(peso)
+            except ValueError:
+                parser.error(f"peso inválido para {nome.strip()}: {peso}")
+    formas = formas_padrao()
+    if args.formas:
+        formas += carregar_formas(args.formas)
+
+    lousa_app = LousaDigital(
+        escala_deteccao=args.escala_deteccao,
+        margem_roi=args.margem_roi,
+        fonte=fonte,
+        saida=saida,
+        tolerancia_tracos=args.tolerancia_tracos,
+        formas=formas,
+        tolerancia_jogo=args.tolerancia_jogo,
+        pesos_metricas=pesos_metricas,
+        intervalo_deteccao=args.intervalo_deteccao,
+        processo_deteccao=args.processo_deteccao,
+        metricas_arquivo=args.metricas_arquivo,
+        metricas_porta=args.metricas_porta,
+        servico_visao=args.servico_visao,
+        pose=args.pose,
+        diario=args.diario,
+    )
+    if args.hud_metricas:
+        lousa_app.instrumentacao.alternar_hud()
+    lousa_app.executar(pipeline=args.pipeline, gravar_landmarks=args.gravar_landmarks)
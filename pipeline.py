@@ -0,0 +1,126 @@
+import threading
+import time
+
+
+class Quadro:
+    """Um quadro da câmera com os momentos de cada etapa (time.perf_counter)"""
+
+    def __init__(self, img, momento_captura, momento=None):
+        self.img = img
+        self.momento_captura = momento_captura
+        # Momento do quadro usado pela lógica do jogo: o relógio de parede ao
+        # vivo, ou o tempo gravado quando o quadro vem de um vídeo ou registro
+        self.momento = time.time() if momento is None else momento
+        self.maos = []
+        self.dedos = []
+        self.momento_deteccao = None
+        # Posição na sequência da fonte (preenchida pelo ServicoVisao)
+        self.numero = None
+
+    def latencia(self):
+        """Tempo (s) desde a captura do quadro até agora"""
+        return time.perf_counter() - self.momento_captura
+
+
+class BufferUltimoQuadro:
+    """
+    Buffer de uma posição: um quadro novo substitui o que ainda não foi
+    consumido. Quem consome sempre recebe o quadro mais recente, e os quadros
+    velhos são descartados em vez de se acumularem.
+    """
+
+    def __init__(self):
+        self._condicao = threading.Condition()
+        self._quadro = None
+        self._fechado = False
+        self.descartados = 0
+
+    def colocar(self, quadro):
+        with self._condicao:
+            if self._quadro is not None:
+                self.descartados += 1
+            self._quadro = quadro
+            self._condicao.notify()
+
+    def pegar(self, timeout=None):
+        """Retorna o quadro mais recente, ou None se o buffer foi fechado"""
+        with self._condicao:
+            if not self._condicao.wait_for(
+                lambda: self._quadro is not None or self._fechado, timeout
+            ):
+                return None
+            quadro = self._quadro
+            self._quadro = None
+            return quadro
+
+    def fechar(self):
+        with self._condicao:
+            self._fechado = True
+            self._condicao.notify_all()
+
+
+class PipelineCaptura:
+    """
+    Captura e detecção de mãos em threads próprias.
+
+    Uma thread lê a fonte de quadros (ver fontes.py) e coloca cada quadro num
+    BufferUltimoQuadro; um worker de detecção pega sempre o quadro mais novo,
+    roda o detector e publica o resultado num segundo buffer, consumido pelo
+    loop principal (render e interface) com ``proximo()``.
+    """
+
+    def __init__(self, fonte, detector):
+        self.fonte = fonte
+        self.detector = detector
+        self.buffer_captura = BufferUltimoQuadro()
+        self.buffer_detectado = BufferUltimoQuadro()
+        self._parar = threading.Event()
+        self._threads = []
+
+    def iniciar(self):
+        self._threads = [
+            threading.Thread(target=self._capturar, daemon=True),
+            threading.Thread(target=self._detectar, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def parar(self):
+        self._parar.set()
+        self.buffer_captura.fechar()
+        self.buffer_detectado.fechar()
+        for thread in self._threads:
+            thread.join(timeout=1)
+
+    def proximo(self, timeout=None):
+        """Próximo quadro já processado pelo detector (None ao fim da captura)"""
+        return self.buffer_detectado.pegar(timeout)
+
+    def descartados(self):
+        return self.buffer_captura.descartados + self.buffer_detectado.descartados
+
+    def _capturar(self):
+        while not self._parar.is_set():
+            quadro = self.fonte.ler()
+            if quadro is None:
+                break
+            self.buffer_captura.colocar(quadro)
+        self.buffer_captura.fechar()
+
+    def _detectar(self):
+        while not self._parar.is_set():
+            quadro = self.buffer_captura.pegar()
+            if quadro is None:
+                break
+            if not self.fonte.fornece_maos:
+                quadro.maos, quadro.dedos = detectar_maos(self.detector, quadro.img)
+            quadro.momento_deteccao = time.perf_counter()
+            self.buffer_detectado.colocar(quadro)
+        self.buffer_detectado.fechar()
+
+
+def detectar_maos(detector, img):
+    """Roda o detector no quadro e retorna as mãos e os dedos levantados de cada uma"""
+    maos = detector.findHands(img, draw=False)[0]
+    dedos = [detector.fingersUp(mao) for mao in maos]
+    return maos, dedos
@@ -0,0 +1,40 @@
+import numpy as np
+
+
+class PoolBuffers:
+    """
+    Buffers reaproveitados entre quadros, para o loop não alocar imagens novas
+    a cada iteração (uma imagem 1280x720 BGR tem 2,7 MB).
+
+    Cada uso tem um nome (por exemplo "espelhado") e recebe sempre a mesma
+    memória: ``obter`` devolve uma visão com a forma e o tipo pedidos sobre
+    um bloco que só é realocado quando precisa crescer. Formas que mudam a
+    cada quadro (como o recorte da região da mão) não geram alocações.
+
+    O conteúdo de um buffer vale até a próxima chamada com o mesmo nome.
+    """
+
+    def __init__(self):
+        self._blocos = {}
+        self.alocacoes = 0
+
+    def obter(self, nome, forma, dtype=np.uint8):
+        """Array C-contíguo de ``forma`` e ``dtype`` (conteúdo indefinido)"""
+        dtype = np.dtype(dtype)
+        n_bytes = int(np.prod(forma)) * dtype.itemsize
+        bloco = self._blocos.get(nome)
+        if bloco is None or bloco.nbytes < n_bytes:
+            bloco = np.empty(n_bytes, np.uint8)
+            self._blocos[nome] = bloco
+            self.alocacoes += 1
+        return bloco[:n_bytes].view(dtype).reshape(forma)
+
+    def zerado(self, nome, forma, dtype=np.uint8):
+        """Como ``obter``, com o buffer preenchido com zeros"""
+        buffer = self.obter(nome, forma, dtype)
+        buffer.fill(0)
+        return buffer
+
+    def memoria(self):
+        """Bytes reservados pelo pool"""
+        return sum(bloco.nbytes for bloco in self._blocos.values())
@@ -0,0 +1,198 @@
+import bisect
+import os
+import threading
+
+# Casas decimais das pontuações gravadas
+CASAS_DECIMAIS = 4
+
+
+class ArmazemRanking:
+    """
+    Ranking mantido em memória, ordenado pela pontuação.
+
+    O arquivo (formato ``nome:=pontuacao`` por linha) só é relido quando o
+    mtime ou o tamanho mudam. Pontuações novas são acrescentadas ao fim do
+    arquivo em vez de reescrevê-lo; na leitura vale a maior pontuação de cada
+    jogador. Quando as linhas repetidas passam de ``fator_compactacao`` vezes
+    o número de jogadores, o arquivo é reescrito de forma atômica (arquivo
+    temporário + rename).
+
+    Cada linha pode registrar a versão da métrica que gerou a pontuação, como
+    ``nome:=0.8123;metrica=2``; linhas sem ela são da versão 1. Com
+    ``metrica`` definida, só as pontuações dessa versão entram no ranking; as
+    de outras versões (não comparáveis) continuam no arquivo, mas fora dele.
+    """
+
+    def __init__(self, caminho="ranking.txt", fator_compactacao=2.0, metrica=None):
+        self.caminho = caminho
+        self.fator_compactacao = fator_compactacao
+        self.metrica_ranking = metrica
+        self._pontuacoes = {}
+        # Melhor pontuação de outras versões da métrica: {nome: (pontuacao, metrica)}
+        self._outras = {}
+        # Versão da métrica da melhor pontuação de cada jogador
+        self._metricas = {}
+        # (-pontuacao, nome), em ordem crescente = maiores pontuações primeiro
+        self._ordenado = []
+        self._linhas_arquivo = 0
+        self._assinatura = None
+        self._trava = threading.RLock()
+
+    def melhores(self, k=10):
+        """Os ``k`` melhores jogadores, como lista de (nome, pontuacao)"""
+        with self._trava:
+            self._recarregar_se_mudou()
+            return [(nome, -negativo) for negativo, nome in self._ordenado[:k]]
+
+    def como_dict(self):
+        """Ranking completo, do maior para o menor (formato de carrega_ranking)"""
+        with self._trava:
+            self._recarregar_se_mudou()
+            return {nome: -negativo for negativo, nome in self._ordenado}
+
+    def metrica(self, nome_jogador):
+        """Versão da métrica da melhor pontuação do jogador (None se não existe)"""
+        with self._trava:
+            self._recarregar_se_mudou()
+            return self._metricas.get(nome_jogador)
+
+    def __len__(self):
+        with self._trava:
+            self._recarregar_se_mudou()
+            return len(self._pontuacoes)
+
+    def registrar(self, nome_jogador, pontuacao, metrica=1):
+        """
+        Registra a pontuação se for a melhor do jogador. Retorna True se o
+        ranking mudou.
+
+        :param metrica: Versão da métrica que gerou a pontuação.
+        """
+        nome_jogador = str(nome_jogador).replace("\n", " ").strip()
+        # Na precisão gravada no arquivo: o ranking em memória e o relido
+        # têm as mesmas posições e empates
+        pontuacao = round(float(pontuacao), CASAS_DECIMAIS)
+        with self._trava:
+            self._recarregar_se_mudou()
+            if self._fora_do_ranking(metrica):
+                if pontuacao <= self._outras.get(nome_jogador, (float("-inf"),))[0]:
+                    return False
+                self._outras[nome_jogador] = (pontuacao, metrica)
+                mudou = False
+            elif not self._atualizar(nome_jogador, pontuacao, metrica):
+                return False
+            else:
+                mudou = True
+
+            try:
+                with open(self.caminho, "a") as f:
+                    f.write(_linha(nome_jogador, pontuacao, metrica))
+                self._linhas_arquivo += 1
+                self._assinatura = self._ler_assinatura()
+            except Exception as e:
+                print(f"Erro ao salvar a pontuação: {e}")
+                return mudou
+
+            if self._linhas_arquivo > self.fator_compactacao * max(
+                len(self._pontuacoes) + len(self._outras), 16
+            ):
+                self.compactar()
+            return mudou
+
+    def compactar(self):
+        """Reescreve o arquivo com uma linha por jogador, de forma atômica"""
+        with self._trava:
+            temporario = f"{self.caminho}.tmp"
+            try:
+                with open(temporario, "w") as f:
+                    for negativo, nome in self._ordenado:
+                        f.write(_linha(nome, -negativo, self._metricas[nome]))
+                    for nome, (pontuacao, metrica) in self._outras.items():
+                        f.write(_linha(nome, pontuacao, metrica))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temporario, self.caminho)
+                self._linhas_arquivo = len(self._ordenado) + len(self._outras)
+                self._assinatura = self._ler_assinatura()
+            except Exception as e:
+                print(f"Erro ao compactar o ranking: {e}")
+
+    def _fora_do_ranking(self, metrica):
+        return self.metrica_ranking is not None and metrica != self.metrica_ranking
+
+    def _atualizar(self, nome_jogador, pontuacao, metrica):
+        anterior = self._pontuacoes.get(nome_jogador)
+        if anterior is not None:
+            if pontuacao <= anterior:
+                return False
+            indice = bisect.bisect_left(self._ordenado, (-anterior, nome_jogador))
+            del self._ordenado[indice]
+        self._pontuacoes[nome_jogador] = pontuacao
+        self._metricas[nome_jogador] = metrica
+        bisect.insort(self._ordenado, (-pontuacao, nome_jogador))
+        return True
+
+    def _ler_assinatura(self):
+        try:
+            estado = os.stat(self.caminho)
+        except FileNotFoundError:
+            return None
+        return (estado.st_mtime_ns, estado.st_size)
+
+    def _recarregar_se_mudou(self):
+        assinatura = self._ler_assinatura()
+        if assinatura == self._assinatura:
+            return
+        self._assinatura = assinatura
+
+        pontuacoes = {}
+        metricas = {}
+        outras = {}
+        linhas = 0
+        try:
+            with open(self.caminho, "r") as f:
+                for line in f:
+                    if ":=" in line:
+                        nome_jogador = line[: line.find(":=")].strip()
+                        pontuacao_str = line[line.find(":=") + 2 :].strip()
+                        # Campos extras depois da pontuação: ;chave=valor
+                        pontuacao_str, *campos = pontuacao_str.split(";")
+
+                        try:
+                            pontuacao_float = float(pontuacao_str)
+                            metrica = 1
+                            for campo in campos:
+                                chave, _, valor = campo.partition("=")
+                                if chave.strip() == "metrica":
+                                    metrica = int(valor)
+                        except ValueError:
+                            continue
+                        linhas += 1
+                        if self._fora_do_ranking(metrica):
+                            if (
+                                pontuacao_float
+                                > outras.get(nome_jogador, (float("-inf"),))[0]
+                            ):
+                                outras[nome_jogador] = (pontuacao_float, metrica)
+                        elif pontuacao_float > pontuacoes.get(
+                            nome_jogador, float("-inf")
+                        ):
+                            pontuacoes[nome_jogador] = pontuacao_float
+                            metricas[nome_jogador] = metrica
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Erro ao carregar o ranking: {e}")
+
+        self._pontuacoes = pontuacoes
+        self._metricas = metricas
+        self._outras = outras
+        self._ordenado = sorted((-score, nome) for nome, score in pontuacoes.items())
+        self._linhas_arquivo = linhas
+
+
+def _linha(nome_jogador, pontuacao, metrica):
+    if metrica == 1:
+        # Versão 1 no formato original, legível por versões antigas da lousa
+        return f"{nome_jogador}:={pontuacao:.{CASAS_DECIMAIS}f}\n"
+    return f"{nome_jogador}:={pontuacao:.{CASAS_DECIMAIS}f};metrica={metrica}\n"
@@ -0,0 +1,172 @@
+import math
+
+# Landmark da ponta do indicador (o ponto que desenha)
+PONTA_INDICADOR = 8
+
+
+class FiltroUmEuro:
+    """
+    Filtro One-Euro (Casiez et al., 2012) para um ponto 2D.
+
+    É um passa-baixas cuja frequência de corte cresce com a velocidade: com o
+    dedo parado o tremor do detector é filtrado com força, e em movimento
+    rápido o atraso fica pequeno. Guarda também a velocidade filtrada, usada
+    para prever a posição nos quadros sem detecção.
+    """
+
+    def __init__(self, corte_minimo=1.0, beta=0.2, corte_derivada=2.0):
+        """
+        :param corte_minimo: Frequência de corte (Hz) com o ponto parado.
+        :param beta: Quanto a frequência de corte cresce com a velocidade.
+        :param corte_derivada: Frequência de corte (Hz) da velocidade.
+        """
+        self.corte_minimo = corte_minimo
+        self.beta = beta
+        self.corte_derivada = corte_derivada
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.posicao = None
+        self.velocidade = (0.0, 0.0)
+        self.momento = None
+
+    def filtrar(self, x, y, momento):
+        """Filtra a posição (x, y) medida em ``momento`` (segundos)"""
+        if self.posicao is None or momento <= self.momento:
+            self.posicao = (float(x), float(y))
+            self.velocidade = (0.0, 0.0)
+            self.momento = momento
+            return self.posicao
+
+        dt = momento - self.momento
+        px, py = self.posicao
+        a = _alfa(self.corte_derivada, dt)
+        vx = a * (x - px) / dt + (1 - a) * self.velocidade[0]
+        vy = a * (y - py) / dt + (1 - a) * self.velocidade[1]
+
+        corte = self.corte_minimo + self.beta * math.hypot(vx, vy)
+        a = _alfa(corte, dt)
+        self.posicao = (a * x + (1 - a) * px, a * y + (1 - a) * py)
+        self.velocidade = (vx, vy)
+        self.momento = momento
+        return self.posicao
+
+    def prever(self, momento):
+        """Posição em ``momento`` supondo velocidade constante"""
+        dt = momento - self.momento
+        return (
+            self.posicao[0] + self.velocidade[0] * dt,
+            self.posicao[1] + self.velocidade[1] * dt,
+        )
+
+
+def _alfa(corte, dt):
+    tau = 1 / (2 * math.pi * corte)
+    return 1 / (1 + tau / dt)
+
+
+class RastreadorMaos:
+    """
+    Roda o detector só em parte dos quadros e prevê as mãos nos demais.
+
+    Em cada detecção a ponta do indicador passa por um FiltroUmEuro e a mão
+    inteira é deslocada para a posição filtrada (a forma da mão, e portanto os
+    dedos levantados, não muda). Nos quadros sem detecção a mão da última
+    detecção é deslocada para a posição prevista com velocidade constante.
+
+    O detector volta a rodar em todo quadro quando não há mão, quando o dedo
+    se move mais rápido que ``velocidade_maxima`` ou logo depois de os dedos
+    levantados mudarem, os casos em que a previsão erraria.
+
+    Tem a mesma interface usada de HandDetector (findHands/fingersUp).
+    """
+
+    def __init__(
+        self,
+        detector,
+        intervalo=2,
+        fps=30.0,
+        velocidade_maxima=900.0,
+        filtro=None,
+    ):
+        """
+        :param detector: Detector com findHands/fingersUp (ex.: DetectorMaos).
+        :param intervalo: Detecta a cada ``intervalo`` quadros (1 = todos).
+        :param fps: Quadros por segundo usados como base de tempo do filtro;
+            os quadros são contados, não cronometrados, para que o resultado
+            não dependa da carga da máquina.
+        :param velocidade_maxima: Velocidade da ponta (pixels/s) acima da qual
+            todo quadro é detectado.
+        :param filtro: Parâmetros do FiltroUmEuro (dict); None usa os padrões.
+        """
+        if intervalo < 1:
+            raise ValueError("intervalo deve ser 1 ou mais")
+        self.detector = detector
+        self.intervalo = intervalo
+        self.fps = fps
+        self.velocidade_maxima = velocidade_maxima
+        self.parametros_filtro = filtro or {}
+        self.filtros = []
+        self.maos = []
+        self.dedos = []
+        self.quadro = 0
+        self.quadro_deteccao = None
+        self.dedos_mudaram = False
+        self.deteccoes = 0
+
+    def findHands(self, img, draw=False, flipType=True):
+        momento = self.quadro / self.fps
+        self.quadro += 1
+
+        detectou = False
+        if self._precisa_detectar():
+            maos = self.detector.findHands(img, draw=draw, flipType=flipType)[0]
+            # Um detector assíncrono (DetectorProcesso) pode não ter resultado
+            # novo ainda; nesse caso o quadro é tratado como os sem detecção
+            detectou = getattr(self.detector, "resultado_novo", True)
+
+        if detectou:
+            self.deteccoes += 1
+            self.quadro_deteccao = self.quadro
+            dedos = [self.detector.fingersUp(mao) for mao in maos]
+            if len(maos) != len(self.filtros):
+                self.filtros = [FiltroUmEuro(**self.parametros_filtro) for _ in maos]
+            # Mudança nos dedos (caneta subindo ou descendo): detecta de novo
+            # no próximo quadro
+            self.dedos_mudaram = dedos != self.dedos
+            self.maos, self.dedos = maos, dedos
+            posicoes = [
+                filtro.filtrar(*mao["lmList"][PONTA_INDICADOR][:2], momento)
+                for filtro, mao in zip(self.filtros, maos)
+            ]
+        else:
+            posicoes = [filtro.prever(momento) for filtro in self.filtros]
+
+        return [_deslocar(m, p) for m, p in zip(self.maos, posicoes)], img
+
+    def fingersUp(self, myHand):
+        return self.detector.fingersUp(myHand)
+
+    def _precisa_detectar(self):
+        if not self.maos or self.quadro_deteccao is None or self.dedos_mudaram:
+            return True
+        if self.quadro - self.quadro_deteccao >= self.intervalo:
+            return True
+        velocidade = max(math.hypot(*filtro.velocidade) for filtro in self.filtros)
+        return velocidade > self.velocidade_maxima
+
+
+def _deslocar(mao, posicao):
+    """Cópia de ``mao`` com a ponta do indicador em ``posicao``"""
+    x, y = mao["lmList"][PONTA_INDICADOR][:2]
+    dx = int(round(posicao[0])) - x
+    dy = int(round(posicao[1])) - y
+    copia = dict(mao)
+    copia["lmList"] = [[px + dx, py + dy] + resto for px, py, *resto in mao["lmList"]]
+    if "bbox" in mao:
+        bx, by, bw, bh = mao["bbox"]
+        copia["bbox"] = (bx + dx, by + dy, bw, bh)
+    if "center" in mao:
+        cx, cy = mao["center"]
+        copia["center"] = (cx + dx, cy + dy)
+    return copia
@@ -0,0 +1,325 @@
+"""
+Serviço de visão: uma única câmera para vários analisadores.
+
+Uma thread lê a fonte de quadros (ver fontes.py) e entrega cada quadro aos
+analisadores (mãos, pose, holístico), cada um na sua thread e no seu ritmo:
+um analisador com ``intervalo`` 3 recebe um quadro a cada três. A conversão
+BGR→RGB é feita uma vez por quadro e compartilhada por todos os analisadores
+que usam RGB. O resultado mais recente de cada analisador fica em
+``ultimo(nome)`` e é publicado para quem assinou com ``assinar(nome, funcao)``.
+
+Um analisador é qualquer objeto com
+
+    nome          chave do resultado ("maos", "pose", ...)
+    intervalo     analisa um a cada ``intervalo`` quadros
+    entrada       "bgr" ou "rgb": a imagem passada a ``analisar``
+    iniciar()     chamado na thread do analisador antes do primeiro quadro
+    analisar(img, quadro) -> resultado
+    fechar()
+
+Os analisadores só leem a imagem, que não deve ser alterada.
+"""
+
+import threading
+
+import cv2
+
+from pipeline import BufferUltimoQuadro, detectar_maos
+
+# Pares de landmarks ligados no esqueleto da pose (os mesmos de
+# mediapipe.solutions.pose.POSE_CONNECTIONS), para desenhar sem importar o
+# MediaPipe na thread de renderização
+CONEXOES_POSE = (
+    (0, 1), (1, 2), (2, 3), (3, 7), (0, 4), (4, 5), (5, 6), (6, 8), (9, 10),
+    (11, 12), (11, 13), (13, 15), (15, 17), (15, 19), (15, 21), (17, 19),
+    (12, 14), (14, 16), (16, 18), (16, 20), (16, 22), (18, 20), (11, 23),
+    (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28), (27, 29),
+    (28, 30), (29, 31), (30, 32), (27, 31), (28, 32),
+)  # fmt: skip
+
+
+class ServicoVisao:
+    """
+    Dona da fonte de quadros; distribui os quadros aos analisadores e publica
+    os resultados.
+
+    Quem consome os quadros (a lousa, corpo.py) os recebe com ``proximo()``,
+    sempre o mais recente, e lê os resultados com ``ultimo(nome)``: o
+    resultado pode ser de um quadro anterior se o analisador for mais lento
+    que a câmera ou rodar só em parte dos quadros.
+    """
+
+    def __init__(self, fonte, analisadores=()):
+        """
+        :param fonte: Fonte de quadros (ver fontes.py); é liberada em ``parar``.
+        :param analisadores: Analisadores iniciais (ver ``adicionar``).
+        """
+        self.fonte = fonte
+        self.analisadores = {}
+        self.buffer_quadros = BufferUltimoQuadro()
+        self._buffers = {}
+        self._despachados = {}
+        self._resultados = {}
+        self._assinantes = {}
+        self._parar = threading.Event()
+        self._threads = []
+        self.quadros = 0
+        self.analises = {}
+        self.erros = {}
+        for analisador in analisadores:
+            self.adicionar(analisador)
+
+    def adicionar(self, analisador):
+        if self._threads:
+            raise RuntimeError("Analisadores devem ser adicionados antes de iniciar")
+        if analisador.nome in self.analisadores:
+            raise ValueError(f"Analisador repetido: {analisador.nome}")
+        if analisador.entrada not in ("bgr", "rgb"):
+            raise ValueError(f"Entrada desconhecida: {analisador.entrada}")
+        if analisador.intervalo < 1:
+            raise ValueError("intervalo deve ser 1 ou mais")
+        self.analisadores[analisador.nome] = analisador
+        self._buffers[analisador.nome] = BufferUltimoQuadro()
+        self.analises[analisador.nome] = 0
+
+    def assinar(self, nome, funcao):
+        """
+        Chama ``funcao(quadro, resultado)`` a cada resultado do analisador
+        ``nome``. A chamada é feita na thread do analisador, então a função
+        deve ser rápida e não mexer em estado da thread principal sem trava.
+        """
+        self._assinantes.setdefault(nome, []).append(funcao)
+
+    def ultimo(self, nome):
+        """(número do quadro, resultado) mais recente de ``nome``, ou (None, None)"""
+        return self._resultados.get(nome, (None, None))
+
+    def proximo(self, timeout=None):
+        """Quadro mais recente da fonte (None ao fim da captura)"""
+        return self.buffer_quadros.pegar(timeout)
+
+    def descartados(self):
+        """Quadros que ninguém chegou a pegar, somando consumidor e analisadores"""
+        return self.buffer_quadros.descartados + sum(
+            buffer.descartados for buffer in self._buffers.values()
+        )
+
+    def fonte_lousa(self, nome_maos="maos"):
+        """Fonte de quadros para a LousaDigital (ver FonteServico)"""
+        return FonteServico(self, nome_maos)
+
+    def iniciar(self):
+        if self._threads:
+            return
+        self._threads = [threading.Thread(target=self._capturar, daemon=True)]
+        for nome in self.analisadores:
+            self._threads.append(
+                threading.Thread(target=self._analisar, args=(nome,), daemon=True)
+            )
+        for thread in self._threads:
+            thread.start()
+
+    def parar(self):
+        """Encerra as threads, fecha os analisadores e libera a fonte"""
+        self._parar.set()
+        self.buffer_quadros.fechar()
+        for buffer in self._buffers.values():
+            buffer.fechar()
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self.fonte.liberar()
+
+    def _capturar(self):
+        while not self._parar.is_set():
+            quadro = self.fonte.ler()
+            if quadro is None:
+                break
+            numero = quadro.numero = self.quadros
+            self.quadros += 1
+
+            imagens = {}
+            for nome, analisador in self.analisadores.items():
+                ultimo = self._despachados.get(nome)
+                if ultimo is not None and numero - ultimo < analisador.intervalo:
+                    continue
+                self._despachados[nome] = numero
+                if analisador.entrada not in imagens:
+                    # Uma conversão por quadro, compartilhada pelos analisadores.
+                    # Os de BGR recebem uma cópia porque o consumidor desenha
+                    # no quadro enquanto eles ainda podem estar lendo
+                    if analisador.entrada == "rgb":
+                        imagens["rgb"] = cv2.cvtColor(quadro.img, cv2.COLOR_BGR2RGB)
+                    else:
+                        imagens["bgr"] = quadro.img.copy()
+                self._buffers[nome].colocar((quadro, imagens[analisador.entrada]))
+
+            self.buffer_quadros.colocar(quadro)
+        self.buffer_quadros.fechar()
+        for buffer in self._buffers.values():
+            buffer.fechar()
+
+    def _analisar(self, nome):
+        analisador = self.analisadores[nome]
+        buffer = self._buffers[nome]
+        try:
+            analisador.iniciar()
+            while not self._parar.is_set():
+                pedido = buffer.pegar()
+                if pedido is None:
+                    break
+                quadro, img = pedido
+                resultado = analisador.analisar(img, quadro)
+                self._resultados[nome] = (quadro.numero, resultado)
+                self.analises[nome] += 1
+                for funcao in self._assinantes.get(nome, ()):
+                    funcao(quadro, resultado)
+        except Exception as e:
+            # Um analisador com erro para sozinho; os outros e a câmera seguem
+            self.erros[nome] = e
+            print(f"Erro no analisador {nome}: {e}")
+        finally:
+            analisador.fechar()
+
+
+class FonteServico:
+    """
+    Quadros de um ServicoVisao como fonte da lousa (ver fontes.py), com as
+    mãos do analisador de mãos mais recente já preenchidas.
+    """
+
+    fornece_maos = True
+
+    def __init__(self, servico, nome_maos="maos"):
+        self.servico = servico
+        self.nome_maos = nome_maos
+
+    def ler(self):
+        quadro = self.servico.proximo()
+        if quadro is None:
+            return None
+        _, resultado = self.servico.ultimo(self.nome_maos)
+        if resultado is not None:
+            quadro.maos, quadro.dedos = resultado
+        return quadro
+
+    def liberar(self):
+        self.servico.parar()
+
+
+class AnalisadorMaos:
+    """
+    Mãos e dedos levantados com um detector de interface HandDetector
+    (DetectorMaos, RastreadorMaos, ...). Resultado: (maos, dedos).
+
+    Recebe o quadro em BGR porque o HandDetector do cvzone converte a imagem
+    que recebe, e o DetectorMaos só passa a ele o recorte reduzido da mão.
+    """
+
+    nome = "maos"
+    entrada = "bgr"
+
+    def __init__(self, detector, intervalo=1):
+        self.detector = detector
+        self.intervalo = intervalo
+
+    def iniciar(self):
+        pass
+
+    def analisar(self, img, quadro):
+        return detectar_maos(self.detector, img)
+
+    def fechar(self):
+        pass
+
+
+class AnalisadorPose:
+    """
+    Pose do corpo com o MediaPipe Pose. Resultado: 33 landmarks
+    [x, y, z, visibilidade] em pixels do quadro, ou [] sem pessoa.
+    """
+
+    nome = "pose"
+    entrada = "rgb"
+
+    def __init__(self, intervalo=2, **opcoes):
+        """
+        :param intervalo: Analisa um a cada ``intervalo`` quadros.
+        :param opcoes: Repassadas a mediapipe.solutions.pose.Pose.
+        """
+        self.intervalo = intervalo
+        self.opcoes = opcoes
+        self.modelo = None
+
+    def iniciar(self):
+        # O MediaPipe só é importado na thread do analisador (leva segundos)
+        import mediapipe as mp
+
+        self.modelo = mp.solutions.pose.Pose(**self.opcoes)
+
+    def analisar(self, img, quadro):
+        resultado = self.modelo.process(img)
+        return pontos_landmarks(resultado.pose_landmarks, img.shape)
+
+    def fechar(self):
+        if self.modelo is not None:
+            self.modelo.close()
+
+
+class AnalisadorHolistico:
+    """
+    Pose e mãos num só modelo (MediaPipe Holistic). Resultado: dict com
+    "pose", "mao_esquerda" e "mao_direita", cada um uma lista de landmarks
+    como a de AnalisadorPose.
+    """
+
+    nome = "holistico"
+    entrada = "rgb"
+
+    def __init__(self, intervalo=2, **opcoes):
+        """
+        :param intervalo: Analisa um a cada ``intervalo`` quadros.
+        :param opcoes: Repassadas a mediapipe.solutions.holistic.Holistic.
+        """
+        self.intervalo = intervalo
+        self.opcoes = opcoes
+        self.modelo = None
+
+    def iniciar(self):
+        import mediapipe as mp
+
+        self.modelo = mp.solutions.holistic.Holistic(**self.opcoes)
+
+    def analisar(self, img, quadro):
+        resultado = self.modelo.process(img)
+        return {
+            "pose": pontos_landmarks(resultado.pose_landmarks, img.shape),
+            "mao_esquerda": pontos_landmarks(resultado.left_hand_landmarks, img.shape),
+            "mao_direita": pontos_landmarks(resultado.right_hand_landmarks, img.shape),
+        }
+
+    def fechar(self):
+        if self.modelo is not None:
+            self.modelo.close()
+
+
+def pontos_landmarks(landmarks, forma):
+    """Landmarks normalizados do MediaPipe em [x, y, z, visibilidade] (pixels)"""
+    if landmarks is None:
+        return []
+    altura, largura = forma[:2]
+    return [
+        [int(lm.x * largura), int(lm.y * altura), int(lm.z * largura), lm.visibility]
+        for lm in landmarks.landmark
+    ]
+
+
+def desenhar_pose(img, pontos, cor=(0, 255, 0), visibilidade_minima=0.5):
+    """Desenha o esqueleto de uma pose (ver AnalisadorPose) na imagem"""
+    if not pontos:
+        return
+    for a, b in CONEXOES_POSE:
+        if min(pontos[a][3], pontos[b][3]) >= visibilidade_minima:
+            cv2.line(img, tuple(pontos[a][:2]), tuple(pontos[b][:2]), cor, 2)
+    for x, y, _, visibilidade in pontos:
+        if visibilidade >= visibilidade_minima:
+            cv2.circle(img, (x, y), 4, (0, 0, 255), cv2.FILLED)
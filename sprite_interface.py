@@ -0,0 +1,138 @@
+import cv2
+import numpy as np
+
+
+class SpriteInterface:
+    """
+    Elementos de interface desenhados uma única vez numa imagem BGR com canal
+    alfa e depois apenas compostos sobre cada quadro.
+
+    ``desenhar(img)`` é a função que desenha os elementos; ela só é chamada de
+    novo quando a ``chave`` passada a ``compor`` muda (por exemplo, a cor ou a
+    espessura selecionadas). A composição é feita só nas regiões que têm
+    algum elemento.
+    """
+
+    def __init__(self, desenhar):
+        self.desenhar = desenhar
+        self.chave = None
+        # O sprite BGRA fica em dois planos prontos para a composição: a cor
+        # já multiplicada pelo alfa e a transparência (255 - alfa)
+        self._cor = None
+        self._transparencia = None
+        self.regioes = []
+
+    def compor(self, img, chave):
+        altura, largura = img.shape[:2]
+        chave = (chave, largura, altura)
+        if chave != self.chave:
+            self.chave = chave
+            self._cor, self._transparencia = renderizar_com_alfa(
+                largura, altura, self.desenhar
+            )
+            self.regioes = regioes_ocupadas(self._transparencia)
+
+        for x1, y1, x2, y2 in self.regioes:
+            compor_regiao(
+                img[y1:y2, x1:x2],
+                self._cor[y1:y2, x1:x2],
+                self._transparencia[y1:y2, x1:x2],
+            )
+        return img
+
+
+class TextoCache:
+    """
+    Um texto dinâmico (por exemplo, o número de pontos) guardado como um
+    pequeno recorte; só é redesenhado quando o texto muda.
+    """
+
+    def __init__(self, origem, escala, cor, espessura, fonte=cv2.FONT_HERSHEY_SIMPLEX):
+        self.origem = origem
+        self.escala = escala
+        self.cor = cor
+        self.espessura = espessura
+        self.fonte = fonte
+        self.texto = None
+        self._recorte = None
+
+    def compor(self, img, texto):
+        if texto != self.texto:
+            self.texto = texto
+            (tw, th), base = cv2.getTextSize(
+                texto, self.fonte, self.escala, self.espessura
+            )
+            # Folga para a espessura do traço das letras
+            folga = self.espessura + 2
+            x, y = self.origem
+            x1, y1 = x - folga, y - th - folga
+            x2, y2 = x + tw + folga, y + base + folga
+
+            def desenhar(recorte):
+                cv2.putText(
+                    recorte,
+                    texto,
+                    (x - x1, y - y1),
+                    self.fonte,
+                    self.escala,
+                    self.cor,
+                    self.espessura,
+                )
+
+            cor, transparencia = renderizar_com_alfa(x2 - x1, y2 - y1, desenhar)
+            self._recorte = (x1, y1, cor, transparencia)
+
+        x1, y1, cor, transparencia = self._recorte
+        altura, largura = img.shape[:2]
+        # Parte do recorte que cai dentro do quadro
+        cx1, cy1 = max(x1, 0), max(y1, 0)
+        cx2 = min(x1 + cor.shape[1], largura)
+        cy2 = min(y1 + cor.shape[0], altura)
+        if cx1 < cx2 and cy1 < cy2:
+            compor_regiao(
+                img[cy1:cy2, cx1:cx2],
+                cor[cy1 - y1 : cy2 - y1, cx1 - x1 : cx2 - x1],
+                transparencia[cy1 - y1 : cy2 - y1, cx1 - x1 : cx2 - x1],
+            )
+        return img
+
+
+def renderizar_com_alfa(largura, altura, desenhar):
+    """
+    Chama ``desenhar`` sobre um fundo preto e sobre um fundo branco. Num pixel
+    com alfa ``a`` e cor ``c`` o fundo preto fica com ``c * a`` e o branco com
+    ``c * a + 255 * (1 - a)``, então a diferença entre os dois é a
+    transparência. Funciona também com texto suavizado (antialiasing).
+
+    Retorna (cor multiplicada pelo alfa, transparência), ambos BGR uint8.
+    """
+    fundo_preto = np.zeros((altura, largura, 3), np.uint8)
+    fundo_branco = np.full((altura, largura, 3), 255, np.uint8)
+    desenhar(fundo_preto)
+    desenhar(fundo_branco)
+    transparencia = cv2.subtract(fundo_branco, fundo_preto)
+    return fundo_preto, transparencia
+
+
+def compor_regiao(destino, cor, transparencia):
+    """``destino = cor + destino * transparencia / 255``, no próprio ``destino``"""
+    cv2.multiply(destino, transparencia, dst=destino, scale=1 / 255)
+    cv2.add(destino, cor, dst=destino)
+
+
+def regioes_ocupadas(transparencia, distancia=8):
+    """
+    Bounding boxes [x1, y1, x2, y2] dos grupos de pixels não transparentes,
+    juntando os que estão a menos de ``distancia`` pixels (as letras de um
+    mesmo texto).
+    """
+    opacos = cv2.compare(
+        cv2.cvtColor(transparencia, cv2.COLOR_BGR2GRAY), 255, cv2.CMP_LT
+    )
+    nucleo = np.ones((distancia, distancia), np.uint8)
+    grupos = cv2.dilate(opacos, nucleo)
+    n, _, estatisticas, _ = cv2.connectedComponentsWithStats(grupos)
+    regioes = []
+    for x, y, w, h, _ in estatisticas[1:n].tolist():
+        regioes.append([x, y, x + w, y + h])
+    return regioes
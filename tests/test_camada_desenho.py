@@ -0,0 +1,118 @@
+import cv2
+import numpy as np
+
+from camada_desenho import CamadaDesenho, CamadaLadrilhos, Vista
+from tracos import ArmazemTracos
+
+LARGURA = 640
+ALTURA = 480
+
+
+def camada_completa(desenho):
+    """
+    O desenho antigo, refeito do zero a cada chamada: um círculo por ponto e
+    uma linha até o anterior, no formato antigo de pontos. Retorna a imagem
+    e a máscara (255 onde há tinta).
+    """
+    desenho = list(desenho.pontos_legados())
+    imagem = np.zeros((ALTURA, LARGURA, 3), np.uint8)
+    mascara = np.zeros((ALTURA, LARGURA), np.uint8)
+    for i, (x, y, cor, espessura) in enumerate(desenho):
+        for destino, tinta in ((imagem, cor), (mascara, 255)):
+            if x != 0:
+                cv2.circle(destino, (x, y), espessura // 2, tinta, cv2.FILLED)
+            if i >= 1:
+                ax, ay, _, _ = desenho[i - 1]
+                if x != 0 and ax != 0:
+                    cv2.line(destino, (x, y), (ax, ay), tinta, espessura)
+    return imagem, mascara
+
+
+def desenhar_aleatorio(rng, desenho, a_cada_ponto, n_pontos, margem=-10):
+    """
+    Pontos de um traço em passeio aleatório, mudando a espessura no meio, a
+    ``margem`` pixels das bordas da tela; ``a_cada_ponto()`` é chamada depois
+    de cada ponto, como no loop da lousa
+    """
+    x = rng.integers(max(margem, 1), LARGURA - max(margem, 0))
+    y = rng.integers(max(margem, 0), ALTURA - max(margem, 0))
+    espessura = int(rng.integers(2, 30))
+    cor = tuple(int(c) for c in rng.integers(0, 256, 3))
+    for i in range(n_pontos):
+        # x == 0 marca o fim de um traço no formato antigo
+        x = int(np.clip(x + rng.integers(-25, 26), max(margem, 1), LARGURA - margem))
+        y = int(np.clip(y + rng.integers(-25, 26), margem, ALTURA - margem))
+        if i == n_pontos // 2:
+            espessura = int(rng.integers(2, 30))
+        desenho.adicionar_ponto(x, y, cor, espessura)
+        a_cada_ponto()
+    desenho.finalizar_traco()
+    a_cada_ponto()
+
+
+def test_camada_incremental_igual_ao_desenho_completo():
+    rng = np.random.default_rng(7)
+    desenho = ArmazemTracos()
+    camada = CamadaDesenho(LARGURA, ALTURA)
+
+    for passo in range(30):
+        if passo % 4 == 3:
+            removido = desenho.desfazer()
+            if removido is not None:
+                camada.remover(removido, desenho)
+        else:
+            desenhar_aleatorio(
+                rng,
+                desenho,
+                lambda: camada.atualizar(desenho),
+                int(rng.integers(1, 40)),
+            )
+
+        imagem, mascara = camada_completa(desenho)
+        assert np.array_equal(camada.mascara, mascara)
+        assert np.array_equal(camada.imagem, imagem)
+
+
+def test_redesenhar_igual_ao_desenho_completo():
+    rng = np.random.default_rng(3)
+    desenho = ArmazemTracos()
+    for _ in range(5):
+        desenhar_aleatorio(rng, desenho, lambda: None, 20)
+
+    camada = CamadaDesenho(LARGURA, ALTURA)
+    camada.redesenhar(desenho)
+    imagem, mascara = camada_completa(desenho)
+    assert np.array_equal(camada.mascara, mascara)
+    assert np.array_equal(camada.imagem, imagem)
+
+
+def test_ladrilhos_iguais_a_camada_inteira():
+    # Longe das bordas da tela, onde a CamadaDesenho recorta os traços, as
+    # emendas dos ladrilhos não podem aparecer
+    rng = np.random.default_rng(11)
+    desenho = ArmazemTracos()
+    ladrilhos = CamadaLadrilhos(lado=64, maximo_memoria=8)
+
+    for passo in range(30):
+        if passo % 4 == 3:
+            removido = desenho.desfazer()
+            if removido is not None:
+                ladrilhos.remover(removido, desenho)
+        else:
+            desenhar_aleatorio(
+                rng,
+                desenho,
+                lambda: ladrilhos.atualizar(desenho),
+                int(rng.integers(1, 40)),
+                margem=20,
+            )
+
+        completa = CamadaDesenho(LARGURA, ALTURA)
+        completa.redesenhar(desenho)
+        esperado = completa.compor(np.zeros((ALTURA, LARGURA, 3), np.uint8))
+        refeitos = CamadaLadrilhos(lado=64)
+        refeitos.redesenhar(desenho)
+        for camada in (ladrilhos, refeitos):
+            img = camada.compor(np.zeros((ALTURA, LARGURA, 3), np.uint8), Vista())
+            assert np.array_equal(img, esperado)
+    ladrilhos.fechar()
@@ -0,0 +1,107 @@
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+import deteccao_processo
+from deteccao_processo import DetectorProcesso
+
+QUADRO = np.zeros((48, 64, 3), np.uint8)
+
+
+class DetectorFalso:
+    """Sempre encontra a mesma mão"""
+
+    def findHands(self, img, draw=False, flipType=True):
+        return [{"lmList": [[10, 20, 0]] * 21}], img
+
+    def fingersUp(self, mao):
+        return [0, 1, 0, 0, 0]
+
+
+def criar_detector_falso(escala, margem_roi):
+    return DetectorFalso()
+
+
+def criar_detector_que_falha_no_processo(escala, margem_roi):
+    """O processo de detecção morre ao iniciar; no processo da lousa funciona"""
+    if mp.parent_process() is not None:
+        raise RuntimeError("modelo indisponível")
+    # Criar o detector demora: o loop de quadros não pode esperar por isso
+    time.sleep(0.5)
+    return DetectorFalso()
+
+
+def esperar_deteccao(detector, limite=30.0):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        maos, _ = detector.findHands(QUADRO)
+        if detector.resultado_novo:
+            return maos
+        time.sleep(0.01)
+    raise AssertionError("nenhuma detecção")
+
+
+def test_reinicia_o_processo_morto(monkeypatch):
+    monkeypatch.setattr(deteccao_processo, "ESPERA_REINICIO", 0.05)
+    detector = DetectorProcesso(criar_detector=criar_detector_falso)
+    try:
+        maos = esperar_deteccao(detector)
+        assert maos[0]["dedos"] == [0, 1, 0, 0, 0]
+
+        detector._processo.kill()
+        detector._processo.join()
+        antes = time.monotonic()
+        maos, _ = detector.findHands(QUADRO)
+        # Morte percebida: sem mãos até o reinício, depois da espera
+        assert maos == [] and not detector.resultado_novo
+        assert detector.falhas_seguidas == 1
+        assert detector._proximo_reinicio - antes >= 0.05 - 1e-3
+
+        esperar_deteccao(detector)
+        assert detector.reinicios == 1
+        assert detector.falhas_seguidas == 0
+        assert detector.detector_local is None
+    finally:
+        detector.fechar()
+
+
+def test_espera_crescente_e_deteccao_local(monkeypatch):
+    monkeypatch.setattr(deteccao_processo, "ESPERA_REINICIO", 0.05)
+    monkeypatch.setattr(deteccao_processo, "ESPERA_REINICIO_MAXIMA", 0.08)
+    detector = DetectorProcesso(
+        criar_detector=criar_detector_que_falha_no_processo, maximo_falhas=4
+    )
+    esperas = []
+    try:
+        fim = time.monotonic() + 60
+        while detector.detector_local is None and time.monotonic() < fim:
+            falhas = detector.falhas_seguidas
+            antes = time.monotonic()
+            detector.findHands(QUADRO)
+            depois = time.monotonic()
+            if detector.detector_local is not None:
+                # A troca para a detecção local não espera o detector ficar
+                # pronto
+                assert depois - antes < 0.3
+            elif detector.falhas_seguidas > falhas:
+                esperas.append(
+                    (
+                        detector._proximo_reinicio - depois,
+                        detector._proximo_reinicio - antes,
+                    )
+                )
+            time.sleep(0.01)
+
+        assert detector.detector_local is not None
+        assert detector.falhas_seguidas == 4
+        assert detector.reinicios == 3
+        assert "modelo indisponível" in detector.ultimo_erro
+        for (minima, maxima), esperada in zip(esperas, [0.05, 0.08, 0.08]):
+            assert minima - 1e-3 <= esperada <= maxima + 1e-3
+        assert len(esperas) == 3
+
+        maos = esperar_deteccao(detector)
+        assert maos[0]["dedos"] == [0, 1, 0, 0, 0]
+    finally:
+        detector.fechar()
@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+
+import formato_desenho
+from diario_tracos import (
+    PREFIXO_CHECKPOINT,
+    DiarioTracos,
+    ReprodutorDiario,
+    recuperar,
+)
+from tracos import ArmazemTracos
+
+CORES = [(0, 0, 255), (255, 0, 0), (0, 200, 0)]
+
+
+def tracos(desenho):
+    return [
+        (pontos.tolist(), tuple(cor), espessura) for pontos, cor, espessura in desenho
+    ]
+
+
+def desenhar_sessao(rng, desenho, diario, n_passos):
+    """Usa o armazém e o diário como a lousa: os mesmos eventos nos dois"""
+    x, y = 640, 360
+    cor, espessura = CORES[0], 5
+    for _ in range(n_passos):
+        sorteio = rng.random()
+        if sorteio < 0.04:
+            desenho.finalizar_traco()
+            diario.levantar()
+            cor = CORES[int(rng.integers(len(CORES)))]
+            espessura = int(rng.integers(1, 20))
+        elif sorteio < 0.05:
+            desenho.desfazer()
+            diario.desfazer()
+        elif sorteio < 0.053:
+            desenho.limpar()
+            diario.limpar()
+        else:
+            # Inclusive fora da tela: o quadro é infinito
+            x = int(np.clip(x + rng.integers(-30, 31), -2000, 3000))
+            y = int(np.clip(y + rng.integers(-30, 31), -2000, 3000))
+            desenho.adicionar_ponto(x, y, cor, espessura)
+            diario.ponto(x, y, cor, espessura)
+
+
+def checkpoints(pasta):
+    return sorted(f for f in os.listdir(pasta) if f.startswith(PREFIXO_CHECKPOINT))
+
+
+def test_recupera_e_reproduz_depois_de_uma_queda(tmp_path):
+    pasta = str(tmp_path / "diario")
+    rng = np.random.default_rng(11)
+    desenho = ArmazemTracos(tolerancia=1.0)
+    diario = DiarioTracos(pasta, desenho, tolerancia=1.0, eventos_checkpoint=150)
+    desenhar_sessao(rng, desenho, diario, 1500)
+    # Um traço fica aberto na hora da queda
+    desenho.adicionar_ponto(100, 100, CORES[1], 7)
+    diario.ponto(100, 100, CORES[1], 7)
+    desenho.adicionar_ponto(180, 140, CORES[1], 7)
+    diario.ponto(180, 140, CORES[1], 7)
+    diario.fechar()
+
+    # Só o checkpoint do início da sessão e o último periódico ficam
+    assert len(checkpoints(pasta)) == 2
+
+    # Queda no meio de um lote: os bytes cortados são ignorados
+    segmentos = sorted(f for f in os.listdir(pasta) if f.endswith(".lsj"))
+    with open(os.path.join(pasta, segmentos[-1]), "ab") as f:
+        f.write(b"\x40\x00\x00\x00\x01\x02")
+
+    desenho.finalizar_traco()
+    recuperado, cor, espessura = recuperar(pasta)
+    assert tracos(recuperado) == tracos(desenho)
+    assert (cor, espessura) == (CORES[1], 7)
+    assert recuperado.tolerancia == 1.0
+
+    # A reprodução desde o começo chega ao mesmo desenho
+    reprodutor = ReprodutorDiario(pasta, velocidade=1000.0)
+    while not reprodutor.terminou:
+        reprodutor.avancar(1.0)
+    reprodutor.desenho.finalizar_traco()
+    assert tracos(reprodutor.desenho) == tracos(desenho)
+
+
+def test_recupera_o_checkpoint_lendo_uma_vez(tmp_path, monkeypatch):
+    pasta = str(tmp_path / "diario")
+    desenho = ArmazemTracos()
+    desenho.adicionar_ponto(10, 10, CORES[0], 3)
+    desenho.adicionar_ponto(50, 20, CORES[0], 3)
+    desenho.finalizar_traco()
+    diario = DiarioTracos(pasta, desenho)
+    diario.ponto(60, 60, CORES[2], 4)
+    diario.fechar()
+
+    lidos = []
+    carregar = formato_desenho.carregar
+
+    def carregar_espiao(caminho):
+        lidos.append(caminho)
+        return carregar(caminho)
+
+    monkeypatch.setattr(formato_desenho, "carregar", carregar_espiao)
+    recuperado, _, _ = recuperar(pasta)
+    assert len(lidos) == 1
+    assert len(recuperado) == 3
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+import formato_desenho
+from tracos import ArmazemTracos
+
+
+def tracos(desenho):
+    """Traços como listas comparáveis: (pontos, cor, espessura)"""
+    return [
+        (pontos.tolist(), tuple(cor), espessura) for pontos, cor, espessura in desenho
+    ]
+
+
+def desenho_aleatorio(n_tracos, pontos_por_traco, semente=0):
+    rng = np.random.default_rng(semente)
+    desenho = ArmazemTracos()
+    cores = [(0, 0, 255), (255, 0, 0), (0, 255, 0), (12, 34, 56)]
+    for i in range(n_tracos):
+        cor = cores[i % len(cores)]
+        espessura = int(rng.integers(1, 40))
+        for x, y in rng.integers(-2000, 3000, (pontos_por_traco, 2)).tolist():
+            desenho.adicionar_ponto(x, y, cor, espessura)
+        desenho.finalizar_traco()
+    return desenho
+
+
+def test_desenho_vazio(tmp_path):
+    caminho = str(tmp_path / "vazio.lsd")
+    formato_desenho.salvar(ArmazemTracos(), caminho)
+
+    carregado = formato_desenho.carregar(caminho)
+    assert len(carregado) == 0
+    assert tracos(carregado) == []
+
+
+def test_ida_e_volta_com_cores_e_espessuras(tmp_path):
+    caminho = str(tmp_path / "desenho.lsd")
+    desenho = desenho_aleatorio(25, 40)
+    formato_desenho.salvar(desenho, caminho)
+
+    carregado = formato_desenho.carregar(caminho)
+    assert len(carregado) == len(desenho)
+    assert tracos(carregado) == tracos(desenho)
+    # O desenho lido continua editável
+    carregado.adicionar_ponto(5, 5, (1, 2, 3), 4)
+    assert len(carregado) == len(desenho) + 1
+
+
+def test_grava_em_blocos(tmp_path, monkeypatch):
+    monkeypatch.setattr(formato_desenho, "TAMANHO_BLOCO", 7)
+    caminho = str(tmp_path / "blocos.lsd")
+    desenho = desenho_aleatorio(5, 11, semente=1)
+    formato_desenho.salvar(desenho, caminho)
+
+    assert tracos(formato_desenho.carregar(caminho)) == tracos(desenho)
+
+
+def test_coordenada_fora_do_int16_falha_sem_deixar_arquivo(tmp_path):
+    caminho = tmp_path / "grande.lsd"
+    desenho = ArmazemTracos()
+    desenho.adicionar_ponto(10, 10, (0, 0, 255), 5)
+    desenho.adicionar_ponto(40000, 10, (0, 0, 255), 5)
+    desenho.finalizar_traco()
+
+    with pytest.raises(ValueError):
+        formato_desenho.salvar(desenho, str(caminho))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_carrega_por_memmap_e_solta_o_arquivo(tmp_path, monkeypatch):
+    mapeados = []
+    memmap = np.memmap
+
+    def memmap_espiao(*args, **kwargs):
+        mapeados.append(args[0])
+        return memmap(*args, **kwargs)
+
+    monkeypatch.setattr(formato_desenho.np, "memmap", memmap_espiao)
+    caminho = tmp_path / "desenho.lsd"
+    desenho = desenho_aleatorio(3, 20, semente=2)
+    formato_desenho.salvar(desenho, str(caminho))
+
+    carregado = formato_desenho.carregar(str(caminho))
+    assert mapeados == [str(caminho), str(caminho)]
+    # Os pontos foram copiados do mapeamento: o arquivo pode ser apagado
+    caminho.unlink()
+    assert tracos(carregado) == tracos(desenho)
+
+
+def test_rejeita_arquivo_invalido(tmp_path):
+    caminho = tmp_path / "invalido.lsd"
+    caminho.write_bytes(b"LSD")
+    with pytest.raises(ValueError):
+        formato_desenho.carregar(str(caminho))
+    caminho.write_bytes(b"XXXX" + bytes(12))
+    with pytest.raises(ValueError):
+        formato_desenho.carregar(str(caminho))
@@ -0,0 +1,97 @@
+import numpy as np
+
+from formas import TAMANHO_FORMA, formas_padrao
+from jogo_similaridade import AvaliadorForma
+from tracos import ArmazemTracos
+
+LARGURA = 1280
+ALTURA = 720
+TOLERANCIA = 12.5
+
+
+def metricas_completas(avaliador, desenho):
+    """Referência: as métricas recalculadas do zero com o desenho inteiro"""
+    amostras = desenho.amostrar(avaliador.passo)
+    if len(amostras) == 0:
+        return avaliador.metricas()
+    limite = avaliador.limite_hausdorff
+    distancias = avaliador.forma.distancias(amostras, LARGURA, ALTURA)
+    acertos = np.count_nonzero(distancias <= TOLERANCIA)
+    contorno = avaliador.amostras_contorno
+    diferencas = contorno[:, None, :] - amostras[None, :, :]
+    ate_desenho = np.minimum(np.sqrt((diferencas**2).sum(axis=2)).min(axis=1), limite)
+    cobertos = np.count_nonzero(ate_desenho <= TOLERANCIA)
+    comprimento_fora = (len(amostras) - acertos) * avaliador.passo
+    comprimento_contorno = len(contorno) * avaliador.passo_contorno
+    return {
+        "precisao": acertos / len(amostras),
+        "cobertura": cobertos / len(contorno),
+        "iou": cobertos
+        * avaliador.passo_contorno
+        / (comprimento_contorno + comprimento_fora),
+        "hausdorff": max(min(float(distancias.max()), limite), ate_desenho.max()),
+    }
+
+
+def quadrado(desenho, escala=1.0):
+    """Desenha o contorno do quadrado alvo, em um único traço"""
+    lado = TAMANHO_FORMA * escala
+    x1 = LARGURA // 2 - lado / 2
+    y1 = ALTURA // 2 - lado / 2
+    cantos = [(x1, y1), (x1 + lado, y1), (x1 + lado, y1 + lado), (x1, y1 + lado)]
+    for (xa, ya), (xb, yb) in zip(cantos, cantos[1:] + cantos[:1]):
+        for t in np.linspace(0, 1, 30, endpoint=False):
+            desenho.adicionar_ponto(
+                int(xa + (xb - xa) * t), int(ya + (yb - ya) * t), (0, 0, 255), 5
+            )
+    desenho.adicionar_ponto(int(x1), int(y1), (0, 0, 255), 5)
+    desenho.finalizar_traco()
+
+
+def test_traco_perfeito_pontua_perto_de_um():
+    desenho = ArmazemTracos()
+    quadrado(desenho)
+    avaliador = AvaliadorForma(formas_padrao()[0], LARGURA, ALTURA, TOLERANCIA)
+    avaliador.atualizar(desenho)
+
+    metricas = avaliador.metricas()
+    assert metricas["precisao"] == 1.0
+    assert metricas["cobertura"] == 1.0
+    assert metricas["hausdorff"] < 2
+    assert avaliador.pontuacao() > 0.95
+
+
+def test_traco_fora_da_forma_pontua_baixo():
+    desenho = ArmazemTracos()
+    # Quadrado menor dentro do alvo: longe de todo o contorno
+    quadrado(desenho, escala=0.4)
+    avaliador = AvaliadorForma(formas_padrao()[0], LARGURA, ALTURA, TOLERANCIA)
+    avaliador.atualizar(desenho)
+
+    metricas = avaliador.metricas()
+    assert metricas["precisao"] < 0.2
+    assert metricas["cobertura"] < 0.2
+    assert avaliador.pontuacao() < 0.2
+
+
+def test_metricas_incrementais_iguais_ao_calculo_completo():
+    rng = np.random.default_rng(7)
+    desenho = ArmazemTracos()
+    avaliador = AvaliadorForma(formas_padrao()[0], LARGURA, ALTURA, TOLERANCIA)
+    x, y = LARGURA // 2, ALTURA // 2
+    for i in range(600):
+        if rng.random() < 0.03:
+            desenho.finalizar_traco()
+        if rng.random() < 0.01 and desenho.desfazer() is not None:
+            # Como na lousa: desfazer reinicia o avaliador
+            avaliador.reiniciar()
+        x = int(np.clip(x + rng.integers(-25, 26), 1, LARGURA - 1))
+        y = int(np.clip(y + rng.integers(-25, 26), 0, ALTURA - 1))
+        desenho.adicionar_ponto(x, y, (0, 0, 255), 5)
+
+        if i % 20 == 0:
+            avaliador.atualizar(desenho)
+            esperado = metricas_completas(avaliador, desenho)
+            obtido = avaliador.metricas()
+            for nome, valor in esperado.items():
+                assert np.isclose(obtido[nome], valor), (i, nome)
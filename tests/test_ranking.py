@@ -0,0 +1,101 @@
+import os
+import random
+
+from ranking import ArmazemRanking
+
+
+def test_pontuacoes_de_outra_metrica_ficam_fora_do_ranking(tmp_path):
+    caminho = tmp_path / "ranking.txt"
+    caminho.write_text("ana:=0.9000\nbia:=0.5000\nbia:=0.7000;metrica=2\n")
+    ranking = ArmazemRanking(str(caminho), metrica=2)
+
+    assert ranking.melhores() == [("bia", 0.7)]
+    # Nova pontuação da versão antiga não entra no ranking
+    assert not ranking.registrar("caio", 0.99, metrica=1)
+    assert ranking.registrar("ana", 0.6, metrica=2)
+    assert ranking.melhores() == [("bia", 0.7), ("ana", 0.6)]
+
+    # As pontuações antigas sobrevivem à compactação
+    ranking.compactar()
+    todas = ArmazemRanking(str(caminho))
+    assert todas.como_dict() == {"caio": 0.99, "ana": 0.9, "bia": 0.7}
+    assert todas.metrica("ana") == 1
+
+
+def test_pontuacoes_novas_sao_acrescentadas(tmp_path):
+    caminho = tmp_path / "ranking.txt"
+    ranking = ArmazemRanking(str(caminho))
+
+    assert ranking.registrar("ana", 0.5)
+    assert ranking.registrar("bia", 0.7, metrica=2)
+    assert not ranking.registrar("ana", 0.4)
+    assert ranking.registrar("ana", 0.8)
+    assert caminho.read_text().splitlines() == [
+        "ana:=0.5000",
+        "bia:=0.7000;metrica=2",
+        "ana:=0.8000",
+    ]
+    assert ranking.melhores() == [("ana", 0.8), ("bia", 0.7)]
+
+
+def test_compactacao_deixa_uma_linha_por_jogador(tmp_path):
+    caminho = tmp_path / "ranking.txt"
+    ranking = ArmazemRanking(str(caminho), fator_compactacao=2.0)
+    for i in range(1, 33):
+        ranking.registrar("ana", i / 100)
+    # 32 linhas de um só jogador passam do limite (2 x 16) e o arquivo é
+    # reescrito
+    ranking.registrar("ana", 0.99)
+    assert caminho.read_text().splitlines() == ["ana:=0.9900"]
+    assert not (tmp_path / "ranking.txt.tmp").exists()
+    assert ranking.melhores() == [("ana", 0.99)]
+
+
+def test_relê_quando_o_arquivo_muda(tmp_path):
+    caminho = tmp_path / "ranking.txt"
+    ranking = ArmazemRanking(str(caminho))
+    assert ranking.melhores() == []
+
+    # Outra instância (ou outro processo) grava no mesmo arquivo
+    ArmazemRanking(str(caminho)).registrar("ana", 0.6)
+    assert ranking.melhores() == [("ana", 0.6)]
+
+    caminho.write_text("bia:=0.9000\n")
+    os.utime(caminho, ns=(1, 1))
+    assert ranking.melhores() == [("bia", 0.9)]
+
+
+def test_le_o_formato_legado(tmp_path):
+    caminho = tmp_path / "ranking.txt"
+    caminho.write_text(
+        "ana:=0.5\n"
+        "bia:=0.75\n"
+        "linha sem separador\n"
+        "caio:=abc\n"
+        "ana:=0.25\n"
+        "nome com espaço := 0.6 \n"
+    )
+    ranking = ArmazemRanking(str(caminho))
+
+    assert ranking.como_dict() == {"bia": 0.75, "nome com espaço": 0.6, "ana": 0.5}
+    assert ranking.metrica("ana") == 1
+    assert len(ranking) == 3
+
+
+def test_ida_e_volta_mantem_posicoes_e_empates(tmp_path):
+    caminho = tmp_path / "ranking.txt"
+    ranking = ArmazemRanking(str(caminho))
+    rng = random.Random(5)
+    for i in range(300):
+        # Pontuações que só diferem depois da 4ª casa empatam
+        ranking.registrar(f"jogador{i % 40}", rng.random() / 3 + i * 1e-6)
+    ranking.registrar("empate1", 0.12341)
+    ranking.registrar("empate2", 0.12344)
+
+    relido = ArmazemRanking(str(caminho))
+    assert relido.melhores(40) == ranking.melhores(40)
+    assert relido.como_dict() == ranking.como_dict()
+    assert ranking.como_dict()["empate1"] == ranking.como_dict()["empate2"]
+
+    ranking.compactar()
+    assert ArmazemRanking(str(caminho)).melhores(50) == ranking.melhores(50)
@@ -0,0 +1,79 @@
+import math
+
+import numpy as np
+
+from rastreamento import PONTA_INDICADOR, RastreadorMaos
+
+
+class DetectorSintetico:
+    """Detector falso: uma mão cuja ponta segue ``trajetoria`` com ruído"""
+
+    def __init__(self, trajetoria, ruido=2.0, semente=3):
+        self.trajetoria = trajetoria
+        self.rng = np.random.default_rng(semente)
+        self.ruido = ruido
+        self.quadro = 0
+        self.chamadas = 0
+
+    def findHands(self, img, draw=False, flipType=True):
+        self.chamadas += 1
+        posicao = self.trajetoria[self.quadro]
+        if posicao is None:
+            return [], img
+        x, y = np.rint(posicao + self.rng.normal(0, self.ruido, 2)).astype(int)
+        # Os demais landmarks ficam a um deslocamento fixo da ponta
+        lmlist = [[int(x) + 5 * i, int(y) + 3 * i, 0] for i in range(21)]
+        lmlist[PONTA_INDICADOR] = [int(x), int(y), 0]
+        return [{"lmList": lmlist, "bbox": (int(x) - 50, int(y), 100, 150)}], img
+
+    def fingersUp(self, mao):
+        return [0, 1, 0, 0, 0]
+
+
+def circulo(n_quadros, fps=30.0, raio=120.0, voltas_por_segundo=0.4):
+    angulos = 2 * math.pi * voltas_por_segundo * np.arange(n_quadros) / fps
+    return [
+        np.array([640 + raio * math.cos(a), 360 + raio * math.sin(a)]) for a in angulos
+    ]
+
+
+def rastrear(rastreador, detector, n_quadros):
+    pontas = []
+    for quadro in range(n_quadros):
+        detector.quadro = quadro
+        maos, _ = rastreador.findHands(None)
+        pontas.append(
+            np.array(maos[0]["lmList"][PONTA_INDICADOR][:2]) if maos else None
+        )
+    return pontas
+
+
+def test_previsao_segue_a_trajetoria():
+    trajetoria = circulo(150)
+    detector = DetectorSintetico(trajetoria)
+    rastreador = RastreadorMaos(detector, intervalo=2)
+    pontas = rastrear(rastreador, detector, len(trajetoria))
+
+    # Metade dos quadros é prevista, e todos ficam perto do caminho real
+    assert detector.chamadas <= len(trajetoria) // 2 + 2
+    erros = [
+        np.hypot(*(ponta - real)) for ponta, real in zip(pontas[10:], trajetoria[10:])
+    ]
+    assert max(erros) < 15
+
+
+def test_estado_reinicia_quando_a_mao_some():
+    trajetoria = circulo(40)
+    trajetoria[20:25] = [None] * 5
+    # A mão volta longe de onde sumiu
+    trajetoria[25:] = [np.array([200.0, 150.0])] * 15
+    detector = DetectorSintetico(trajetoria, ruido=0.0)
+    rastreador = RastreadorMaos(detector, intervalo=2)
+    pontas = rastrear(rastreador, detector, len(trajetoria))
+
+    # No máximo um quadro previsto antes de a próxima detecção notar a falta
+    assert all(ponta is None for ponta in pontas[21:25])
+    assert rastreador.filtros and rastreador.filtros[0].posicao == (200.0, 150.0)
+    # Sem filtro antigo, a primeira detecção já é a posição real (sem
+    # arrastar a velocidade de antes)
+    assert all((ponta == (200, 150)).all() for ponta in pontas[25:])
@@ -0,0 +1,382 @@
+import numpy as np
+
+# Colunas da tabela de traços
+INICIO, FIM, COR, ESPESSURA, X1, Y1, X2, Y2 = range(8)
+# Limite de pontos pendentes na simplificação; ao atingir, o último é fixado
+MAX_PENDENTES = 64
+
+
+class ArmazemTracos:
+    """
+    Armazena o desenho como traços explícitos.
+
+    As coordenadas de todos os pontos ficam num único buffer NumPy (int32,
+    8 bytes por ponto) que cresce por duplicação. Cada traço é uma linha da
+    tabela ``tracos`` com o intervalo [inicio, fim) dos seus pontos no buffer,
+    o índice da cor na ``paleta``, a espessura e a bounding box dos pontos.
+
+    Não existe mais o ponto (0, 0) como marcador de caneta levantada: um traço
+    termina com ``finalizar_traco()``, então x == 0 é um ponto como outro
+    qualquer.
+
+    Com ``tolerancia`` > 0 os pontos recebidos por ``adicionar_ponto`` são
+    simplificados enquanto o traço é desenhado: um ponto só é guardado quando
+    a linha reta desde o último ponto guardado deixaria algum ponto recebido a
+    mais de ``tolerancia`` pixels. Os pontos ainda não decididos ficam em
+    ``cauda()``, que é desenhada direto no quadro e não entra na camada.
+    """
+
+    def __init__(self, capacidade=1024, tolerancia=0.0):
+        self.pontos = np.empty((capacidade, 2), np.int32)
+        self.n_pontos = 0
+        self.tracos = np.empty((max(capacidade // 16, 16), 8), np.int32)
+        self.n_tracos = 0
+        self.paleta = []
+        self._indices_paleta = {}
+        # Verdadeiro enquanto o último traço ainda recebe pontos
+        self.traco_aberto = False
+        self.tolerancia = tolerancia
+        # Pontos recebidos depois do último ponto guardado do traço aberto
+        self._pendentes = []
+
+    @classmethod
+    def de_legado(cls, pontos):
+        """
+        Cria o armazém a partir da lista antiga de tuplas (x, y, cor, espessura),
+        em que x == 0 marcava a caneta levantada.
+        """
+        armazem = cls(max(len(pontos), 1))
+        trecho = []
+        chave = None
+        for x, y, cor, espessura in pontos:
+            if x == 0:
+                if trecho:
+                    armazem.adicionar_traco(trecho, *chave)
+                trecho = []
+                continue
+            cor = tuple(cor)
+            if trecho and (cor, espessura) != chave:
+                # Cor ou espessura mudou no meio do traço: mesmo critério de
+                # adicionar_ponto, o traço novo começa no último ponto
+                armazem.adicionar_traco(trecho, *chave)
+                trecho = trecho[-1:]
+            chave = (cor, espessura)
+            trecho.append((x, y))
+        if trecho:
+            armazem.adicionar_traco(trecho, *chave)
+        return armazem
+
+    @classmethod
+    def de_arrays(cls, pontos, inicios, fins, cores, espessuras):
+        """
+        Cria o armazém a partir de arrays já prontos (por exemplo, mapeados de
+        um arquivo), sem criar objetos Python por ponto.
+
+        :param pontos: Array (n, 2) com as coordenadas de todos os traços.
+        :param inicios: Início de cada traço em ``pontos``.
+        :param fins: Fim (exclusivo) de cada traço em ``pontos``.
+        :param cores: Array (n_tracos, 3) com a cor BGR de cada traço.
+        :param espessuras: Espessura de cada traço.
+        """
+        n_pontos = len(pontos)
+        n_tracos = len(inicios)
+        armazem = cls(max(n_pontos, 16))
+        armazem.pontos[:n_pontos] = pontos
+        armazem.n_pontos = n_pontos
+        if n_tracos == 0:
+            return armazem
+
+        while len(armazem.tracos) < n_tracos:
+            armazem.tracos = _crescer(armazem.tracos)
+        tabela = armazem.tracos[:n_tracos]
+        tabela[:, INICIO] = inicios
+        tabela[:, FIM] = fins
+        tabela[:, ESPESSURA] = espessuras
+        for i, cor in enumerate(map(tuple, np.asarray(cores).tolist())):
+            if cor not in armazem._indices_paleta:
+                armazem._indices_paleta[cor] = len(armazem.paleta)
+                armazem.paleta.append(cor)
+            tabela[i, COR] = armazem._indices_paleta[cor]
+        # Bounding boxes de todos os traços de uma vez
+        validos = armazem.pontos[:n_pontos]
+        tabela[:, X1 : Y1 + 1] = np.minimum.reduceat(validos, tabela[:, INICIO])
+        tabela[:, X2 : Y2 + 1] = np.maximum.reduceat(validos, tabela[:, INICIO])
+        armazem.n_tracos = n_tracos
+        return armazem
+
+    def __len__(self):
+        """Número de pontos (mostrado no HUD)"""
+        return self.n_pontos
+
+    def __iter__(self):
+        """Itera sobre os traços como (pontos, cor, espessura)"""
+        for i in range(self.n_tracos):
+            yield self.traco(i)
+
+    def traco(self, i):
+        inicio, fim, indice_cor, espessura = self.tracos[i, :4]
+        return self.pontos[inicio:fim], self.paleta[indice_cor], int(espessura)
+
+    def adicionar_ponto(self, x, y, cor, espessura):
+        """
+        Adiciona um ponto ao traço aberto. Se não houver traço aberto, ou se a
+        cor ou a espessura mudaram, começa um traço novo; no segundo caso o
+        traço novo começa no último ponto do anterior, para continuar a linha.
+        """
+        if self.traco_aberto:
+            traco = self.tracos[self.n_tracos - 1]
+            if (
+                self.paleta[traco[COR]] != cor or traco[ESPESSURA] != espessura
+            ) and traco[FIM] > traco[INICIO]:
+                self.fixar_cauda()
+                ultimo_x, ultimo_y = self.pontos[self.n_pontos - 1]
+                self._iniciar_traco(cor, espessura)
+                self._adicionar(int(ultimo_x), int(ultimo_y))
+            elif self.tolerancia > 0:
+                self._simplificar(x, y)
+                return
+        else:
+            self._iniciar_traco(cor, espessura)
+        self._adicionar(x, y)
+
+    def adicionar_traco(self, pontos, cor, espessura):
+        """Adiciona um traço completo de uma vez (pontos: sequência de (x, y))"""
+        pontos = np.asarray(pontos, np.int32).reshape(-1, 2)
+        if len(pontos) == 0:
+            return
+        while self.n_pontos + len(pontos) > len(self.pontos):
+            self.pontos = _crescer(self.pontos)
+        self._iniciar_traco(cor, espessura)
+        fim = self.n_pontos + len(pontos)
+        self.pontos[self.n_pontos : fim] = pontos
+        self.n_pontos = fim
+
+        traco = self.tracos[self.n_tracos - 1]
+        traco[FIM] = fim
+        traco[X1 : Y1 + 1] = pontos.min(axis=0)
+        traco[X2 : Y2 + 1] = pontos.max(axis=0)
+        self.traco_aberto = False
+
+    def finalizar_traco(self):
+        """Caneta levantada: o próximo ponto começa um traço novo"""
+        self.fixar_cauda()
+        self.traco_aberto = False
+
+    def fixar_cauda(self):
+        """Guarda o último ponto pendente sem terminar o traço"""
+        if self._pendentes:
+            self._adicionar(*self._pendentes[-1])
+            self._pendentes = []
+
+    def cauda(self):
+        """
+        Trecho ainda não guardado do traço aberto, como (pontos, cor,
+        espessura), começando no último ponto guardado; None se não houver.
+        """
+        if not self._pendentes:
+            return None
+        _, cor, espessura = self.traco(self.n_tracos - 1)
+        pontos = np.array([self.pontos[self.n_pontos - 1]] + self._pendentes, np.int32)
+        return pontos, cor, espessura
+
+    def desfazer(self):
+        """
+        Remove o último traço em tempo constante. Retorna (pontos, cor,
+        espessura) do traço removido, ou None se não havia traço.
+        """
+        if self.n_tracos == 0:
+            return None
+        removido = self.traco(self.n_tracos - 1)
+        self.n_pontos = int(self.tracos[self.n_tracos - 1, INICIO])
+        self.n_tracos -= 1
+        self.traco_aberto = False
+        self._pendentes = []
+        # Os pontos continuam no buffer até serem sobrescritos; a cópia
+        # protege quem guardou o traço removido
+        return removido[0].copy(), removido[1], removido[2]
+
+    def limpar(self):
+        self.n_pontos = 0
+        self.n_tracos = 0
+        self.traco_aberto = False
+        self._pendentes = []
+
+    def tracos_a_partir(self, n_pontos):
+        """
+        Itera sobre os trechos de traço com pontos de índice >= ``n_pontos``,
+        como (pontos, cor, espessura, com_anterior). Com ``com_anterior`` o
+        primeiro ponto é o anterior ao trecho, já desenhado, e serve só para
+        ligar a linha.
+        """
+        if n_pontos >= self.n_pontos:
+            return
+        # Os traços são contíguos no buffer: busca o primeiro que termina depois
+        primeiro = int(
+            np.searchsorted(self.tracos[: self.n_tracos, FIM], n_pontos, "right")
+        )
+        for i in range(primeiro, self.n_tracos):
+            inicio, fim, indice_cor, espessura = self.tracos[i, :4]
+            com_anterior = n_pontos > inicio
+            a = n_pontos - 1 if com_anterior else inicio
+            cor = self.paleta[indice_cor]
+            yield self.pontos[a:fim], cor, int(espessura), com_anterior
+
+    def tabela(self):
+        """
+        Visão (inicio, fim, cores BGR, espessura) de todos os traços, para
+        gravação em arquivo.
+        """
+        tabela = self.tracos[: self.n_tracos]
+        cores = np.array(self.paleta, np.uint8).reshape(-1, 3)[tabela[:, COR]]
+        return tabela[:, INICIO], tabela[:, FIM], cores, tabela[:, ESPESSURA]
+
+    def caixas(self):
+        """Bounding boxes [x1, y1, x2, y2] e espessuras de todos os traços"""
+        tabela = self.tracos[: self.n_tracos]
+        return tabela[:, X1:], tabela[:, ESPESSURA]
+
+    def amostrar(self, passo=2.0, a_partir=0):
+        """
+        Pontos (float64, (m, 2)) ao longo dos traços, espaçados de no máximo
+        ``passo`` pixels, para pontuar o desenho sem rasterizá-lo: os pontos
+        guardados mais os intermediários de cada segmento.
+
+        Com ``a_partir`` só entram os pontos de índice >= ``a_partir`` e os
+        segmentos que terminam neles, para amostrar só o que foi adicionado
+        desde a última chamada.
+        """
+        n = self.n_pontos
+        a_partir = max(a_partir, 0)
+        vertices = self.pontos[a_partir:n].astype(np.float64)
+        inicio = max(a_partir - 1, 0)
+        if n - inicio < 2:
+            return vertices
+
+        # Segmentos entre pontos consecutivos, exceto os que ligam dois traços
+        pontos = self.pontos[inicio:n].astype(np.float64)
+        no_mesmo_traco = np.ones(n - inicio - 1, bool)
+        inicios = self.tracos[1 : self.n_tracos, INICIO]
+        inicios = inicios[inicios > inicio]
+        no_mesmo_traco[inicios - inicio - 1] = False
+        deltas = pontos[1:] - pontos[:-1]
+        comprimentos = np.hypot(deltas[:, 0], deltas[:, 1])
+        # Pontos intermediários por segmento (as pontas já estão em vertices)
+        por_segmento = np.where(
+            no_mesmo_traco, np.maximum(np.ceil(comprimentos / passo) - 1, 0), 0
+        ).astype(np.intp)
+
+        segmentos = np.repeat(np.arange(len(deltas)), por_segmento)
+        posicoes = (
+            1
+            + np.arange(len(segmentos))
+            - np.repeat(np.cumsum(por_segmento) - por_segmento, por_segmento)
+        )
+        t = posicoes / (por_segmento[segmentos] + 1)
+        intermediarios = pontos[segmentos] + deltas[segmentos] * t[:, None]
+        return np.concatenate([vertices, intermediarios])
+
+    def pontos_legados(self):
+        """Tuplas (x, y, cor, espessura) do formato antigo, com (0, 0, ...) entre traços"""
+        for i, (pontos, cor, espessura) in enumerate(self):
+            if i > 0:
+                yield (0, 0, cor, espessura)
+            for x, y in pontos.tolist():
+                yield (x, y, cor, espessura)
+
+    def copia(self):
+        """
+        Cópia só com os traços guardados (sem traço aberto nem pendentes),
+        para ser gravada em outra thread enquanto o desenho continua.
+        """
+        copia = ArmazemTracos(max(self.n_pontos, 16), self.tolerancia)
+        copia.pontos[: self.n_pontos] = self.pontos[: self.n_pontos]
+        copia.n_pontos = self.n_pontos
+        while len(copia.tracos) < self.n_tracos:
+            copia.tracos = _crescer(copia.tracos)
+        copia.tracos[: self.n_tracos] = self.tracos[: self.n_tracos]
+        copia.n_tracos = self.n_tracos
+        copia.paleta = list(self.paleta)
+        copia._indices_paleta = dict(self._indices_paleta)
+        return copia
+
+    def memoria(self):
+        """Bytes usados pelos buffers"""
+        return self.pontos.nbytes + self.tracos.nbytes
+
+    def _iniciar_traco(self, cor, espessura):
+        if cor not in self._indices_paleta:
+            self._indices_paleta[cor] = len(self.paleta)
+            self.paleta.append(cor)
+
+        if self.n_tracos == len(self.tracos):
+            self.tracos = _crescer(self.tracos)
+        traco = self.tracos[self.n_tracos]
+        traco[INICIO] = traco[FIM] = self.n_pontos
+        traco[COR] = self._indices_paleta[cor]
+        traco[ESPESSURA] = espessura
+        traco[X1] = traco[Y1] = np.iinfo(np.int32).max
+        traco[X2] = traco[Y2] = np.iinfo(np.int32).min
+        self.n_tracos += 1
+        self.traco_aberto = True
+
+    def _simplificar(self, x, y):
+        """
+        Simplificação online (janela deslizante, no espírito do
+        Ramer-Douglas-Peucker): enquanto todos os pontos pendentes ficam a no
+        máximo ``tolerancia`` do segmento entre o último ponto guardado e o
+        ponto novo, nenhum ponto é guardado.
+        """
+        self._pendentes.append((x, y))
+        if len(self._pendentes) == 1:
+            return
+        ancora = self.pontos[self.n_pontos - 1].tolist()
+        if len(self._pendentes) > MAX_PENDENTES or _fora_da_tolerancia(
+            self._pendentes[:-1], ancora, (x, y), self.tolerancia
+        ):
+            # O fim anterior ainda representava bem todos os pontos até ele
+            self._adicionar(*self._pendentes[-2])
+            self._pendentes = self._pendentes[-1:]
+
+    def _adicionar(self, x, y):
+        if self.n_pontos == len(self.pontos):
+            self.pontos = _crescer(self.pontos)
+        self.pontos[self.n_pontos] = (x, y)
+        self.n_pontos += 1
+
+        traco = self.tracos[self.n_tracos - 1]
+        traco[FIM] = self.n_pontos
+        traco[X1] = min(traco[X1], x)
+        traco[Y1] = min(traco[Y1], y)
+        traco[X2] = max(traco[X2], x)
+        traco[Y2] = max(traco[Y2], y)
+
+
+def _fora_da_tolerancia(pontos, a, b, limite):
+    """
+    Verdadeiro se algum dos ``pontos`` fica a mais de ``limite`` do segmento
+    de ``a`` a ``b``. Laço em Python puro: a janela é pequena, e assim o
+    custo por ponto fica abaixo do de criar arrays NumPy.
+    """
+    ax, ay = a
+    dx = b[0] - ax
+    dy = b[1] - ay
+    comprimento = dx * dx + dy * dy
+    limite2 = limite * limite
+    for px, py in pontos:
+        rx = px - ax
+        ry = py - ay
+        if comprimento > 0:
+            t = (rx * dx + ry * dy) / comprimento
+            t = 0.0 if t < 0.0 else 1.0 if t > 1.0 else t
+            rx -= t * dx
+            ry -= t * dy
+        if rx * rx + ry * ry > limite2:
+            return True
+    return False
+
+
+def _crescer(buffer):
+    """Dobra a capacidade do buffer (crescimento amortizado O(1))"""
+    novo = np.empty((max(len(buffer) * 2, 16),) + buffer.shape[1:], buffer.dtype)
+    novo[: len(buffer)] = buffer
+    return novo